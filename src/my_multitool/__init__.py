@@ -4,4 +4,10 @@ Multitool for the My Project. Can be used to do a few tasks, like creating the
 database schema and updating the credentials for users.
 """
 
+from time import perf_counter
+
+# Recorded before anything else is imported, so the `--timings` report can
+# include the time it takes to import the application.
+import_start = perf_counter()
+
 __version__ = '1.0.6'
@@ -4,22 +4,28 @@ This module contains the `main()` method that exposes the CLI arguments for the
 script. The CLI argument groups are imported from other modules.
 """
 
+import json
 import logging
 import sys
+from time import perf_counter
+from typing import Any, Optional
 
+import click
 import typer
 from my_data import __version__ as my_data_version
 from my_data.exceptions import MyDataError
 from my_model import __version__ as my_model_version
 from pydantic import __version__ as pydantic_version
-from rich.logging import RichHandler
 from sqlalchemy import __version__ as sqlalchemy_version
 from sqlmodel import __version__ as sqlmodel_version
 from typer import __version__ as typer_version
+from typer.core import TyperGroup
 
 from . import __version__ as my_multitool_version
+from . import import_start
 from .cli_config import app as config_app
 from .cli_database import app as database_app
+from .cli_metrics import app as metrics_app
 from .cli_users import app as users_app
 from .exceptions import (
     ConfigFileNotFoundError,
@@ -29,75 +35,330 @@ from .exceptions import (
     SQLError,
 )
 from .globals import config
-from .style import ConsoleFactory, get_table, print_error
+from .log_pipeline import log_pipeline
+from .memory_profile import memory_profiler
+from .metrics import get_command_name, metrics
+from .models import LogFormat, OutputFormat, TraceFormat
+from .output import Column, get_writer
+from .replicas import replica_selector
+from .stats import format_size
+from .style import print_error
+from .timings import timings
+from .tracing import write_trace
+
+
+class MainGroup(TyperGroup):
+    """Group for the main app that keeps the arguments for the subcommands.
+
+    Click clears the arguments for the subcommands before the callback of the
+    group runs. The callback needs them to find the name of the command for
+    the metrics.
+    """
+
+    def invoke(self, ctx: click.Context) -> Any:  # noqa: ANN401
+        """Invoke the group and the subcommands.
+
+        Args:
+            ctx: the context of the group.
+
+        Returns:
+            The result of the subcommand.
+        """
+        ctx.meta['arguments'] = [*ctx.protected_args, *ctx.args]
+        return super().invoke(ctx)
+
 
 # Create the Typer App
-app = typer.Typer(no_args_is_help=True)
+app = typer.Typer(no_args_is_help=True, cls=MainGroup)
 
 
-@app.command(name='version')
-def version() -> None:
-    """Display version information.
+TIMINGS_COLUMNS = [
+    Column(key='phase', title='Phase'),
+    Column(key='count', title='Count', justify='right'),
+    Column(key='time', title='Time (ms)', justify='right'),
+    Column(key='percentage', title='%', justify='right'),
+]
 
-    Shows version information for the tool and all related libraries.
+MEMORY_COLUMNS = [
+    Column(key='phase', title='Phase'),
+    Column(key='count', title='Count', justify='right'),
+    Column(key='allocated', title='Allocated', justify='right'),
+    Column(key='peak', title='Peak', justify='right'),
+]
+
+ALLOCATION_COLUMNS = [
+    Column(key='location', title='Location'),
+    Column(key='size', title='Size', justify='right'),
+    Column(key='count', title='Allocations', justify='right'),
+]
+
+
+def print_timings(output: OutputFormat) -> None:
+    """Print the timings report for the command.
+
+    The report is printed to stderr, so it doesn't interfere with the output
+    of the command itself.
+
+    Args:
+        output: the format for the report.
+    """
+    report = timings.report()
+    if output == OutputFormat.JSON:
+        sys.stderr.write(json.dumps(report.model_dump(), indent=4) + '\n')
+        sys.stderr.flush()
+    else:
+        with get_writer(
+            OutputFormat.TABLE,
+            TIMINGS_COLUMNS,
+            title=f'Timings (total {report.total_ms:.2f} ms)',
+            stderr=True,
+        ) as writer:
+            for phase in report.phases:
+                writer.write_row(
+                    {
+                        'phase': phase.name,
+                        'count': phase.count,
+                        'time': f'{phase.total_ms:.2f}',
+                        'percentage': (
+                            f'{phase.total_ms / report.total_ms * 100:.1f}'
+                        ),
+                    }
+                )
+
+
+def report_timings(
+    command: str,
+    timings_format: OutputFormat | None,
+    trace_file: str | None,
+    trace_format: TraceFormat,
+) -> None:
+    """Report the recorded phases of the command and stop the recorder.
+
+    Args:
+        command: the name of the command.
+        timings_format: the format for the timings report, or None for no
+            report.
+        trace_file: the file to write the trace to, or None for no trace.
+        trace_format: the format for the trace file.
+    """
+    if trace_file:
+        write_trace(trace_file, timings, command, trace_format)
+    if timings_format:
+        print_timings(timings_format)
+    timings.stop()
+
+
+def _format_change(size_bytes: int) -> str:
+    return ('-' if size_bytes < 0 else '+') + format_size(abs(size_bytes))
+
+
+def report_memory(output: OutputFormat) -> None:
+    """Print the memory report for the command and stop the profiler.
+
+    The report is printed to stderr, so it doesn't interfere with the output
+    of the command itself.
+
+    Args:
+        output: the format for the report.
     """
-    console = ConsoleFactory.get_console()
+    report = memory_profiler.report()
+    memory_profiler.stop()
+    if output == OutputFormat.JSON:
+        sys.stderr.write(json.dumps(report.model_dump(), indent=4) + '\n')
+        sys.stderr.flush()
+        return
 
-    table = get_table()
-    table.add_column('Library')
-    table.add_column('Version')
+    with get_writer(
+        OutputFormat.TABLE,
+        MEMORY_COLUMNS,
+        title=f'Memory (peak {format_size(report.peak_bytes)})',
+        stderr=True,
+    ) as writer:
+        for phase in report.phases:
+            writer.write_row(
+                {
+                    'phase': phase.name,
+                    'count': phase.count,
+                    'allocated': _format_change(phase.allocated_bytes),
+                    'peak': format_size(phase.peak_bytes),
+                }
+            )
+    with get_writer(
+        OutputFormat.TABLE,
+        ALLOCATION_COLUMNS,
+        title=(
+            'Top allocation sites (at '
+            + f'{format_size(report.sites_bytes)} in use)'
+        ),
+        stderr=True,
+    ) as writer:
+        for site in report.allocation_sites:
+            writer.write_row(
+                {
+                    'location': site.location,
+                    'size': format_size(site.size_bytes),
+                    'count': site.count,
+                }
+            )
 
-    table.add_row('My Model', my_model_version)
-    table.add_row('My Data', my_data_version)
-    table.add_row('My Multitool', my_multitool_version)
-    table.add_row('Pydantic', pydantic_version)
-    table.add_row('SQLModel', sqlmodel_version)
-    table.add_row('SQLAlchemy', sqlalchemy_version)
-    table.add_row('Typer', typer_version)
 
-    console.print(table)
+@app.callback()
+def global_options(
+    ctx: typer.Context,
+    show_timings: bool = typer.Option(
+        False,
+        '--timings',
+        help='Report the time spent in each phase of the command.',
+    ),
+    timings_format: OutputFormat = typer.Option(
+        OutputFormat.TABLE, help='The format for the timings report.'
+    ),
+    log_format: Optional[LogFormat] = typer.Option(
+        None, help='The format for log messages for this command.'
+    ),
+    log_file: Optional[str] = typer.Option(
+        None, help='A file to write the log messages to for this command.'
+    ),
+    metrics_file: Optional[str] = typer.Option(
+        None, help='Add the metrics of the command to this file.'
+    ),
+    trace_file: Optional[str] = typer.Option(
+        None, '--trace', help='Write a trace of the command to this file.'
+    ),
+    trace_format: TraceFormat = typer.Option(
+        TraceFormat.CHROME, help='The format for the trace file.'
+    ),
+    memprofile: bool = typer.Option(
+        False,
+        '--memprofile',
+        help='Report the peak memory and where the memory is allocated.',
+    ),
+    memprofile_format: OutputFormat = typer.Option(
+        OutputFormat.TABLE, help='The format for the memory report.'
+    ),
+) -> None:
+    """Set the global options for all commands.
+
+    Args:
+        ctx: the Typer context.
+        show_timings: if set to True, a report with the time spent in each
+            phase of the command is printed after the command.
+        timings_format: the format for the timings report.
+        log_format: the format for log messages. Overrides the format in the
+            configuration.
+        log_file: a file to write log messages to. Overrides the file in the
+            configuration.
+        metrics_file: a file in the Prometheus text format to add the
+            metrics of the command to. The file is written by `main()` when
+            the command is done.
+        trace_file: a file to write a trace of the phases of the command to,
+            like loading the configuration, queries and rendering.
+        trace_format: the format for the trace file.
+        memprofile: if set to True, a report with the peak memory, the
+            memory per phase of the command and the lines of code that
+            allocate the most memory is printed after the command.
+        memprofile_format: the format for the memory report.
+    """
+    command = get_command_name(ctx.command, ctx.meta['arguments'])
+    if metrics_file:
+        metrics.start(metrics_file, command, origin=import_start)
+    if log_format or log_file:
+        # Messages after the command, like errors and metrics, are written
+        # with the pipeline from `main()` again.
+        previous_settings = log_pipeline.settings
+        log_pipeline.start(
+            level=config.config.logging_level,
+            log_format=log_format or config.config.log_format,
+            log_file=log_file or config.config.log_file,
+        )
+        ctx.call_on_close(lambda: log_pipeline.restore(previous_settings))
+    if show_timings or trace_file:
+        # When started from `main()`, the recorder is already running so the
+        # startup of the application is included.
+        timings.start()
+        ctx.call_on_close(
+            lambda: report_timings(
+                command,
+                timings_format if show_timings else None,
+                trace_file,
+                trace_format,
+            )
+        )
+    if memprofile:
+        # When started from `main()`, the profiler is already running so the
+        # configuration is included.
+        memory_profiler.start()
+        ctx.call_on_close(lambda: report_memory(memprofile_format))
+
+
+@app.command(name='version')
+def version(output: OutputFormat = OutputFormat.TABLE) -> None:
+    """Display version information.
+
+    Shows version information for the tool and all related libraries.
+
+    Args:
+        output: the output format.
+    """
+    versions = {
+        'My Model': my_model_version,
+        'My Data': my_data_version,
+        'My Multitool': my_multitool_version,
+        'Pydantic': pydantic_version,
+        'SQLModel': sqlmodel_version,
+        'SQLAlchemy': sqlalchemy_version,
+        'Typer': typer_version,
+    }
+    columns = [
+        Column(key='library', title='Library'),
+        Column(key='version', title='Version'),
+    ]
+    with get_writer(output, columns) as writer:
+        for library, library_version in versions.items():
+            writer.write_row({'library': library, 'version': library_version})
 
 
 # Add subcommand's
 app.add_typer(database_app, name='database', help='Database management')
 app.add_typer(users_app, name='users', help='User management')
 app.add_typer(config_app, name='config', help='Configuration for My Multitool')
+app.add_typer(metrics_app, name='metrics', help='Metrics for dashboards')
 
 
-def main() -> int:  # pragma: no cover
-    """Entry point for the CLI script.
+def _get_exit_code(exception: SystemExit) -> int:
+    if isinstance(exception.code, int):
+        return exception.code
+    return 0 if exception.code is None else 1
 
-    Defines the commands for the CLI script and makes sure the correct
-    functions get called when running a specific CLI command.
+
+# The exit code that Python uses for uncaught exceptions
+UNEXPECTED_ERROR_CODE = 1
+
+
+def run_app() -> int:
+    """Run the Typer app and convert the outcome to a return code.
+
+    The metrics of the command are recorded with the return code. Unexpected
+    exceptions are recorded with `UNEXPECTED_ERROR_CODE` and raised again.
 
     Returns:
-        The return code for the program. The calling code should use this as
-        the exit code for the application.
+        The exit code of Typer, or the return code for the error that stopped
+        the command.
     """
-    # Load the configurationfile
-    config.configure('~/.my_multitool_config.yaml')
+    return_code = UNEXPECTED_ERROR_CODE
     try:
-        config.load()
-    except ConfigFileNotFoundError:
-        config.set_default_config()
-        config.save()
-    except ConfigFileNotValidError:
-        print_error('Configurationfile not valid', prefix='Configuration')
-        sys.exit(1)
+        return_code = _run_typer_app()
+    finally:
+        metrics.finish(return_code)
+    return return_code
 
-    # Configure logging
-    logging.basicConfig(
-        level=config.config.logging_level,
-        format='%(message)s',
-        datefmt='[%X]',
-        handlers=[RichHandler()],
-    )
-    logger = logging.getLogger('MAIN')
-    logger.debug('Logging is configured!')
 
-    # Run the Typer app
+def _run_typer_app() -> int:
     try:
         app()
+    except SystemExit as exception:
+        # Typer exits when the command is done
+        return _get_exit_code(exception)
     except NoConfirmationError as exception:
         print_error(str(exception), prefix='CLI error')
         return 1
@@ -113,5 +374,54 @@ def main() -> int:  # pragma: no cover
     return 0
 
 
+def main() -> int:  # pragma: no cover
+    """Entry point for the CLI script.
+
+    Defines the commands for the CLI script and makes sure the correct
+    functions get called when running a specific CLI command.
+
+    Returns:
+        The return code for the program. The calling code should use this as
+        the exit code for the application.
+    """
+    # The `--timings`, `--trace` and `--memprofile` options are handled by
+    # Typer, but that is after the configuration is loaded. To include the
+    # startup in the reports, the recorder and profiler are started here.
+    if any(
+        argument in ('--timings', '--trace') or argument.startswith('--trace=')
+        for argument in sys.argv[1:]
+    ):
+        timings.start(origin=import_start)
+        timings.add('import', import_start, perf_counter())
+    if '--memprofile' in sys.argv[1:]:
+        memory_profiler.start()
+
+    # Load the configurationfile
+    with timings.phase('config.load'):
+        config.configure('~/.my_multitool_config.yaml')
+        replica_selector.state_file = '~/.my_multitool_replicas.json'
+        try:
+            config.load()
+        except ConfigFileNotFoundError:
+            config.set_default_config()
+            config.save()
+        except ConfigFileNotValidError:
+            print_error('Configurationfile not valid', prefix='Configuration')
+            sys.exit(1)
+
+    # Configure logging
+    with timings.phase('logging setup'):
+        log_pipeline.start(
+            level=config.config.logging_level,
+            log_format=config.config.log_format,
+            log_file=config.config.log_file,
+        )
+    logger = logging.getLogger('MAIN')
+    logger.debug('Logging is configured!')
+
+    # Run the Typer app
+    return run_app()
+
+
 if __name__ == '__main__':  # pragma: no cover
     sys.exit(main())
@@ -0,0 +1,291 @@
+"""Module with the benchmark workload for a database.
+
+This module contains the functions to run a repeatable workload against the
+database of a context. The workload uses the same code paths as the commands
+of the CLI app, so the results can be used to compare database hosts and
+configuration changes (like pooling or pragmas).
+"""
+
+import random
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from logging import getLogger
+
+from my_data.my_data import MyData
+from my_model import User
+from pydantic import BaseModel
+
+from .user_listing import iter_user_rows
+
+
+class BenchmarkResult(BaseModel):
+    """Result for one benchmarked operation.
+
+    Attributes:
+        name: the name of the operation.
+        operations: the number of times the operation was executed.
+        total_seconds: the total time for all operations.
+        throughput: the number of operations per second.
+        p50_ms: the median latency in milliseconds.
+        p90_ms: the 90th percentile latency in milliseconds.
+        p99_ms: the 99th percentile latency in milliseconds.
+        max_ms: the highest latency in milliseconds.
+    """
+
+    name: str
+    operations: int
+    total_seconds: float
+    throughput: float
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Calculate a percentile with linear interpolation.
+
+    Args:
+        values: the values to calculate the percentile for.
+        pct: the percentile to calculate, between 0 and 100.
+
+    Returns:
+        The percentile, or 0.0 if there are no values.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (
+        position - lower
+    )
+
+
+def summarize(
+    name: str, latencies: list[float], operations: int | None = None
+) -> BenchmarkResult:
+    """Create a BenchmarkResult for a list of latencies.
+
+    Args:
+        name: the name of the operation.
+        latencies: the latencies for the operation in seconds.
+        operations: the number of operations. Defaults to the number of
+            latencies; use this when one latency covers multiple operations.
+
+    Returns:
+        The BenchmarkResult for the operation.
+    """
+    if operations is None:
+        operations = len(latencies)
+    total = sum(latencies)
+    return BenchmarkResult(
+        name=name,
+        operations=operations,
+        total_seconds=round(total, 6),
+        throughput=round(operations / total, 2) if total else 0.0,
+        p50_ms=round(percentile(latencies, 50) * 1000, 3),
+        p90_ms=round(percentile(latencies, 90) * 1000, 3),
+        p99_ms=round(percentile(latencies, 99) * 1000, 3),
+        max_ms=round(max(latencies, default=0.0) * 1000, 3),
+    )
+
+
+class LatencyRecorder:
+    """Recorder for the latencies of operations."""
+
+    def __init__(self) -> None:
+        """Set the default values."""
+        self.latencies: dict[str, list[float]] = {}
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        """Measure the duration of a operation.
+
+        Args:
+            name: the name of the operation.
+
+        Yields:
+            Nothing; the duration of the `with` block is recorded.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.latencies.setdefault(name, []).append(
+                time.perf_counter() - start
+            )
+
+
+class Benchmark:
+    """Workload to benchmark the database of a context.
+
+    The workload creates synthetic users, looks them up, scans the users table
+    and updates passwords. Every operation is executed in its own context, the
+    same way the CLI commands do. The synthetic users are removed afterwards.
+    """
+
+    def __init__(
+        self,
+        data: MyData,
+        root_user: User,
+        users: int = 100,
+        batch_size: int = 50,
+        lookups: int = 100,
+        scans: int = 10,
+        password_updates: int = 5,
+        seed: int = 0,
+    ) -> None:
+        """Set the parameters for the workload.
+
+        Args:
+            data: the MyData object for the database.
+            root_user: the root user to use for the contexts.
+            users: the number of users to insert row-by-row and in bulk.
+            batch_size: the number of users per bulk insert.
+            lookups: the number of lookups by username.
+            scans: the number of full scans of the users table.
+            password_updates: the number of password updates.
+            seed: the seed for the random choices in the workload.
+        """
+        self._logger = getLogger('benchmark')
+        self.data = data
+        self.root_user = root_user
+        self.users = users
+        self.batch_size = batch_size
+        self.lookups = lookups
+        self.scans = scans
+        self.password_updates = password_updates
+        self.random = random.Random(seed)
+        self.prefix = f'benchmark.{uuid.uuid4().hex[:8]}'
+        self.recorder = LatencyRecorder()
+        self.usernames: list[str] = []
+
+    def _new_user(self, number: int) -> User:
+        """Create a synthetic User object.
+
+        Args:
+            number: the sequence number for the user.
+
+        Returns:
+            The created User object.
+        """
+        username = f'{self.prefix}.{number}'
+        self.usernames.append(username)
+        return User(
+            fullname=f'Benchmark user {number}',
+            username=username,
+            email=f'{username}@benchmark.example.com',
+        )
+
+    def _insert_row_by_row(self) -> None:
+        """Insert users one at a time, each in its own transaction."""
+        for number in range(self.users):
+            with (
+                self.recorder.measure('insert-row'),
+                self.data.get_context(user=self.root_user) as context,
+            ):
+                context.users.create(self._new_user(number))
+
+    def _insert_bulk(self) -> None:
+        """Insert users in batches, one transaction per batch."""
+        for start in range(0, self.users, self.batch_size):
+            batch = [
+                self._new_user(self.users + number)
+                for number in range(
+                    start, min(start + self.batch_size, self.users)
+                )
+            ]
+            with (
+                self.recorder.measure('insert-bulk'),
+                self.data.get_context(user=self.root_user) as context,
+            ):
+                context.users.create(batch)
+
+    def _lookup_by_username(self) -> None:
+        """Look up users by username, like `users set-password` does."""
+        for _ in range(self.lookups):
+            username = self.random.choice(self.usernames)
+            with (
+                self.recorder.measure('lookup-username'),
+                self.data.get_context(user=self.root_user) as context,
+            ):
+                context.users.retrieve(
+                    User.username == username  # type: ignore
+                )
+
+    def _scan(self) -> None:
+        """Retrieve all users.
+
+        Measures both retrieving complete `User` objects through the ORM and
+        retrieving only the listed columns, like `users list` does.
+        """
+        for _ in range(self.scans):
+            with (
+                self.recorder.measure('scan-users'),
+                self.data.get_context(user=self.root_user) as context,
+            ):
+                context.users.retrieve()
+            with (
+                self.recorder.measure('scan-users-projected'),
+                self.data.get_context(user=self.root_user) as context,
+            ):
+                for _ in iter_user_rows(context):
+                    pass
+
+    def _update_password(self) -> None:
+        """Update passwords, like `users set-password` does."""
+        for _ in range(self.password_updates):
+            username = self.random.choice(self.usernames)
+            password = uuid.uuid4().hex
+            with (
+                self.recorder.measure('password-update'),
+                self.data.get_context(user=self.root_user) as context,
+            ):
+                users = context.users.retrieve(
+                    User.username == username  # type: ignore
+                )
+                users[0].set_password(password)
+                context.users.update(users)
+
+    def cleanup(self) -> None:
+        """Remove the synthetic users from the database."""
+        self._logger.debug('Removing %d benchmark users', len(self.usernames))
+        with self.data.get_context(user=self.root_user) as context:
+            users = context.users.retrieve(
+                User.username.startswith(  # type: ignore
+                    f'{self.prefix}.', autoescape=True
+                )
+            )
+            context.users.delete(users)
+
+    def run(self) -> list[BenchmarkResult]:
+        """Run the workload.
+
+        Returns:
+            A list with a BenchmarkResult per operation.
+        """
+        phases: list[Callable[[], None]] = [
+            self._insert_row_by_row,
+            self._insert_bulk,
+            self._lookup_by_username,
+            self._scan,
+            self._update_password,
+        ]
+        try:
+            for phase in phases:
+                self._logger.info('Running "%s"', phase.__name__)
+                phase()
+        finally:
+            self.cleanup()
+
+        results: list[BenchmarkResult] = []
+        for name, latencies in self.recorder.latencies.items():
+            operations = None
+            if name == 'insert-bulk':
+                operations = self.users
+            results.append(summarize(name, latencies, operations))
+        return results
@@ -0,0 +1,433 @@
+"""Module with the benchmark suite for the hot paths of the application.
+
+Where the `database benchmark` command measures the database of a context,
+this suite measures the application itself, so releases can be compared. It
+runs the hot paths against SQLite databases in a temporary directory: the
+start of the CLI, loading and saving the configuration, importing data,
+listing users and setting a password. The CLI commands are run in a separate
+process, like users run them. The results are added to a JSON history file,
+and the last run can be compared with the earlier runs to find regressions.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections.abc import Callable
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from platform import python_version
+from time import perf_counter
+
+from my_data.my_data import MyData
+from my_data.my_data_table_creator import MyDataTableCreator
+from my_model import User
+from pydantic import BaseModel
+
+from . import __version__
+from .config import ConfigManager, ConfigModel, ContextModel
+from .data_generator import DataGenerator
+from .exceptions import BenchmarkSuiteError
+
+# The credentials for the service user and root user in the databases
+SERVICE_USER = 'service.user'
+SERVICE_PASSWORD = 'service_password'
+ROOT_USER = 'root'
+
+# The ID of the first generated user, after the root user and service user
+FIRST_USER_ID = 3
+
+
+class SuiteRun(BaseModel):
+    """The results of one run of the suite.
+
+    Attributes:
+        timestamp: the moment the run finished.
+        version: the version of the application.
+        python: the version of Python.
+        metrics: the median duration in seconds per metric.
+    """
+
+    timestamp: datetime
+    version: str
+    python: str
+    metrics: dict[str, float]
+
+
+class SuiteHistory(BaseModel):
+    """The history of runs of the suite.
+
+    Attributes:
+        runs: the runs, from old to new.
+    """
+
+    runs: list[SuiteRun] = []
+
+
+class MetricComparison(BaseModel):
+    """The comparison of a metric with earlier runs.
+
+    Attributes:
+        name: the name of the metric.
+        baseline: the median of the metric in the earlier runs, in seconds.
+        current: the metric in the last run, in seconds.
+        change: the relative change; `0.1` means 10% slower.
+        regression: whether the change is more than the threshold.
+    """
+
+    name: str
+    baseline: float
+    current: float
+    change: float
+    regression: bool
+
+
+def load_history(path: str) -> SuiteHistory:
+    """Load the history file.
+
+    Args:
+        path: the history file.
+
+    Returns:
+        The history; empty when the file does not exist yet.
+    """
+    try:
+        with open(Path(path).expanduser(), encoding='utf-8') as history_file:
+            return SuiteHistory.model_validate(json.load(history_file))
+    except FileNotFoundError:
+        return SuiteHistory()
+
+
+def save_history(path: str, history: SuiteHistory) -> None:
+    """Save the history file.
+
+    Args:
+        path: the history file.
+        history: the history to save.
+    """
+    with open(Path(path).expanduser(), 'w', encoding='utf-8') as history_file:
+        history_file.write(history.model_dump_json(indent=2))
+
+
+def compare_runs(
+    history: SuiteHistory, threshold: float = 0.2, baseline_runs: int = 5
+) -> list[MetricComparison]:
+    """Compare the last run with the earlier runs.
+
+    The baseline for a metric is the median of the metric in the earlier
+    runs, which makes a single slow run in the history less important.
+    Metrics that are not in the earlier runs are skipped.
+
+    Args:
+        history: the history with the runs.
+        threshold: the relative change at which a metric is a regression;
+            `0.2` means 20% slower.
+        baseline_runs: the number of earlier runs to use for the baseline.
+
+    Returns:
+        The comparison per metric of the last run.
+
+    Raises:
+        BenchmarkSuiteError: when there are less than two runs to compare.
+    """
+    if len(history.runs) < 2:
+        raise BenchmarkSuiteError('At least two runs are needed to compare')
+
+    current = history.runs[-1]
+    earlier = history.runs[-baseline_runs - 1 : -1]
+    comparisons = []
+    for name, value in current.metrics.items():
+        values = [run.metrics[name] for run in earlier if name in run.metrics]
+        if not values:
+            continue
+        baseline = statistics.median(values)
+        change = value / baseline - 1 if baseline else 0.0
+        comparisons.append(
+            MetricComparison(
+                name=name,
+                baseline=baseline,
+                current=value,
+                change=change,
+                regression=change > threshold,
+            )
+        )
+    return comparisons
+
+
+def get_users_data(count: int) -> dict[str, list]:
+    """Create the data for a JSON file with users.
+
+    Besides the given number of generated users, the data contains the root
+    user and the service user. The generated users are the same for every
+    run.
+
+    Args:
+        count: the number of generated users.
+
+    Returns:
+        The data in the format of `JSONDataSource`.
+    """
+    users: list[dict] = [
+        {
+            'id': 1,
+            'fullname': 'root',
+            'username': ROOT_USER,
+            'email': 'root@example.com',
+            'role': 1,
+        },
+        {
+            'id': 2,
+            'fullname': 'Service user',
+            'username': SERVICE_USER,
+            'email': 'service.user@example.com',
+            'role': 2,
+            '_password': SERVICE_PASSWORD,
+        },
+    ]
+    users.extend(
+        DataGenerator(users=count, start_id=FIRST_USER_ID).iter_users()
+    )
+    return {'api_scopes': [], 'api_token_scopes': [], 'users': users}
+
+
+class BenchmarkSuite:
+    """The benchmark suite.
+
+    Every metric is measured a number of times; the median is used as the
+    result. The suite needs an empty directory for the configuration and the
+    databases.
+
+    Attributes:
+        directory: the directory for the configuration and databases.
+        repeat: the number of times every metric is measured.
+        config_contexts: the numbers of contexts in the configuration.
+        import_rows: the numbers of users to import.
+        list_users: the number of users to list.
+        password_updates: the number of passwords to set.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        repeat: int = 3,
+        config_contexts: tuple[int, ...] = (10, 1000, 10000),
+        import_rows: tuple[int, ...] = (1000, 100000),
+        list_users: int = 100000,
+        password_updates: int = 5,
+    ) -> None:
+        """Set the parameters for the suite.
+
+        Args:
+            directory: the directory for the configuration and databases.
+            repeat: the number of times every metric is measured.
+            config_contexts: the numbers of contexts in the configuration.
+            import_rows: the numbers of users to import.
+            list_users: the number of users to list.
+            password_updates: the number of passwords to set.
+        """
+        self.directory = Path(directory)
+        self.repeat = repeat
+        self.config_contexts = config_contexts
+        self.import_rows = import_rows
+        self.list_users = list_users
+        self.password_updates = password_updates
+        self._databases = 0
+
+    def _measure(
+        self,
+        function: Callable[[], object],
+        setup: Callable[[], object] | None = None,
+    ) -> float:
+        durations = []
+        for _ in range(self.repeat):
+            if setup:
+                setup()
+            start = perf_counter()
+            function()
+            durations.append(perf_counter() - start)
+        return statistics.median(durations)
+
+    def _run_cli(self, *arguments: str) -> None:
+        # The configuration of the application is in the home directory, so
+        # the suite uses the directory as home directory.
+        result = subprocess.run(
+            [sys.executable, '-m', 'my_multitool', *arguments],
+            env={**os.environ, 'HOME': str(self.directory)},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            check=False,
+        )
+        if result.returncode != 0:
+            raise BenchmarkSuiteError(
+                f'Command "{" ".join(arguments)}" failed: '
+                + result.stderr.decode(errors='replace').strip()
+            )
+
+    def _create_database(self) -> str:
+        """Create a database with tables and configure it in a context.
+
+        Returns:
+            The connection string for the database.
+        """
+        self._databases += 1
+        path = self.directory / f'database-{self._databases}.sqlite'
+        db_string = f'sqlite:///{path}'
+        data = MyData()
+        data.configure(db_connection_str=db_string)
+        MyDataTableCreator(my_data_object=data).create_db_tables()
+        if data.database_engine:
+            data.database_engine.dispose()
+
+        config = ConfigManager()
+        config.configure(str(self.directory / '.my_multitool_config.yaml'))
+        config.config = ConfigModel(
+            active_context='default',
+            contexts=[
+                ContextModel(
+                    name='default',
+                    db_string=db_string,
+                    service_user=SERVICE_USER,
+                    service_pass=SERVICE_PASSWORD,
+                    root_user=ROOT_USER,
+                )
+            ],
+        )
+        config.save()
+        return db_string
+
+    def _write_users_file(self, count: int) -> str:
+        path = self.directory / f'users-{count}.json'
+        with open(path, 'w', encoding='utf-8') as users_file:
+            json.dump(get_users_data(count), users_file)
+        return str(path)
+
+    def cold_start(self) -> dict[str, float]:
+        """Measure the start of the CLI with the `version` command.
+
+        Returns:
+            The metric.
+        """
+        self._create_database()
+        return {
+            'cli cold start': self._measure(lambda: self._run_cli('version'))
+        }
+
+    def config_load_save(self) -> dict[str, float]:
+        """Measure loading and saving the configuration.
+
+        Returns:
+            The metrics per number of contexts.
+        """
+        results = {}
+        for count in self.config_contexts:
+            config = ConfigManager()
+            config.configure(str(self.directory / f'config-{count}.yaml'))
+            config.config = ConfigModel(
+                active_context='context-0',
+                contexts=[
+                    ContextModel(
+                        name=f'context-{number}',
+                        db_string=f'sqlite:///context-{number}.sqlite',
+                    )
+                    for number in range(count)
+                ],
+            )
+            results[f'config save ({count} contexts)'] = self._measure(
+                config.save
+            )
+            results[f'config load ({count} contexts)'] = self._measure(
+                config.load
+            )
+        return results
+
+    def import_json(self) -> dict[str, float]:
+        """Measure the `database import-json` command.
+
+        Every import is done in a new database.
+
+        Returns:
+            The metrics per number of users.
+        """
+        results = {}
+        for count in self.import_rows:
+            filename = self._write_users_file(count)
+            results[f'database import-json ({count} rows)'] = self._measure(
+                partial(self._run_cli, 'database', 'import-json', filename),
+                setup=self._create_database,
+            )
+        return results
+
+    def users_list(self) -> dict[str, float]:
+        """Measure the `users list` command and setting a password.
+
+        Both use the same database, with the users to list.
+
+        Returns:
+            The metrics.
+        """
+        db_string = self._create_database()
+        self._run_cli(
+            'database',
+            'import-json',
+            self._write_users_file(self.list_users),
+        )
+        results = {
+            f'users list ({self.list_users} users)': self._measure(
+                lambda: self._run_cli('users', 'list')
+            ),
+            'set_password': self._set_password(db_string),
+        }
+        return results
+
+    def _set_password(self, db_string: str) -> float:
+        """Measure setting a password, like `users set-password` does.
+
+        Args:
+            db_string: the connection string for the database.
+
+        Returns:
+            The median duration of a password update.
+        """
+        data = MyData()
+        data.configure(
+            db_connection_str=db_string,
+            service_username=SERVICE_USER,
+            service_password=SERVICE_PASSWORD,
+        )
+        with data.get_context_for_service_user() as context:
+            root_user = context.get_user_account_by_username(ROOT_USER)
+
+        durations = []
+        for number in range(self.password_updates):
+            start = perf_counter()
+            with data.get_context(user=root_user) as context:
+                users = context.users.retrieve(
+                    User.id == FIRST_USER_ID + number  # type: ignore
+                )
+                users[0].set_password(f'password-{number}')
+                context.users.update(users)
+            durations.append(perf_counter() - start)
+        if data.database_engine:
+            data.database_engine.dispose()
+        return statistics.median(durations)
+
+    def run(self) -> SuiteRun:
+        """Run the suite.
+
+        Returns:
+            The results of the run.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        metrics: dict[str, float] = {}
+        metrics.update(self.cold_start())
+        metrics.update(self.config_load_save())
+        metrics.update(self.import_json())
+        metrics.update(self.users_list())
+        return SuiteRun(
+            timestamp=datetime.now(tz=timezone.utc),
+            version=__version__,
+            python=python_version(),
+            metrics=metrics,
+        )
@@ -1,12 +1,15 @@
 """The `config` portion of the app."""
 
 import logging
+from typing import Optional
 
 import typer
 
 from .cli_config_contexts import app as contexts_app
+from .exceptions import GenericCLIError
 from .globals import config
-from .models import LoggingLevel
+from .models import LogFormat, LoggingLevel
+from .result_cache import get_result_cache
 from .style import ConsoleFactory
 
 app = typer.Typer(no_args_is_help=True)
@@ -30,4 +33,109 @@ def set_logging_level(level: LoggingLevel) -> None:
     console.print('Logging level set')
 
 
+@app.command(name='set-logging-format')
+def set_logging_format(
+    log_format: LogFormat,
+    log_file: Optional[str] = typer.Option(
+        None, help='A file to write the log messages to, next to stderr.'
+    ),
+    no_log_file: bool = typer.Option(
+        False, '--no-log-file', help='Stop writing to the log file.'
+    ),
+) -> None:
+    """Set the format and file for log messages.
+
+    Log messages are written as text or as JSON objects, one per line. JSON
+    messages can be collected by tools like log shippers. The messages can be
+    written to a log file as well. The settings will be saved in the
+    configurationfile.
+
+    Args:
+        log_format: the format for the log messages.
+        log_file: a file to write the log messages to. Not changed if not
+            given.
+        no_log_file: if set to True, the log file is removed from the
+            configuration.
+
+    Raises:
+        GenericCLIException: when a log file is given and removed at the
+            same time.
+    """
+    logger = logging.getLogger('set_logging_format')
+    console = ConsoleFactory.get_console()
+    if log_file and no_log_file:
+        raise GenericCLIError('Cannot set and remove the log file at once')
+
+    config.config.log_format = log_format
+    if log_file:
+        config.config.log_file = log_file
+    if no_log_file:
+        config.config.log_file = None
+    logger.debug(
+        'Log format "%s", log file "%s"', log_format, config.config.log_file
+    )
+    config.save()
+    console.print('Logging format set')
+
+
+@app.command(name='set-cache')
+def set_cache(
+    enabled: Optional[bool] = typer.Option(
+        None, '--enable/--disable', help='Enable or disable the cache.'
+    ),
+    ttl: Optional[int] = typer.Option(
+        None, help='The number of seconds a cached result is valid.'
+    ),
+    max_size: Optional[int] = typer.Option(
+        None, help='The maximum size of the cache in bytes.'
+    ),
+    directory: Optional[str] = typer.Option(
+        None, help='The directory for the cache files.'
+    ),
+) -> None:
+    """Configure the result cache.
+
+    The result cache stores the results of read commands, like `users list`
+    and `database stats`, on disk. Running the same command again within the
+    TTL doesn't query the database. The settings will be saved in the
+    configurationfile.
+
+    Args:
+        enabled: enable or disable the cache. Not changed if not given.
+        ttl: the number of seconds a cached result is valid.
+        max_size: the maximum size of the cache in bytes.
+        directory: the directory for the cache files.
+
+    Raises:
+        GenericCLIException: when the TTL or the maximum size is invalid.
+    """
+    logger = logging.getLogger('set_cache')
+    console = ConsoleFactory.get_console()
+    settings = config.config.cache
+    if ttl is not None and ttl < 1:
+        raise GenericCLIError('TTL should be at least 1 second')
+    if max_size is not None and max_size < 1:
+        raise GenericCLIError('Maximum size should be at least 1 byte')
+
+    if enabled is not None:
+        settings.enabled = enabled
+    if ttl is not None:
+        settings.ttl = ttl
+    if max_size is not None:
+        settings.max_size = max_size
+    if directory is not None:
+        settings.directory = directory
+    logger.debug('Cache settings: %s', settings)
+    config.save()
+    console.print('Cache settings set')
+
+
+@app.command(name='clear-cache')
+def clear_cache() -> None:
+    """Remove all cached results."""
+    console = ConsoleFactory.get_console()
+    get_result_cache().clear()
+    console.print('Cache cleared')
+
+
 app.add_typer(contexts_app, name='contexts', help='Context management')
@@ -14,7 +14,10 @@ import typer
 from .config import ContextModel
 from .exceptions import GenericCLIError
 from .globals import config
-from .style import ConsoleFactory, get_table
+from .models import OutputFormat, SQLiteProfile
+from .output import Column, get_writer
+from .ping import PingTarget, ping_databases
+from .style import ConsoleFactory
 
 app = typer.Typer(no_args_is_help=True)
 
@@ -27,6 +30,10 @@ def create(
     service_user: Optional[str] = None,
     service_pass: Optional[str] = None,
     root_user: Optional[str] = None,
+    sqlite_profile: SQLiteProfile = SQLiteProfile.DEFAULT,
+    read_replica: Optional[list[str]] = typer.Option(
+        None, help='A read replica for read-only commands. Can be repeated.'
+    ),
 ) -> None:
     """Create a context.
 
@@ -40,6 +47,9 @@ def create(
         service_user: the service user to use when connecting to this instance.
         service_pass: the password for the service user.
         root_user: the username of a root user to use when working with users.
+        sqlite_profile: the performance profile to use for SQLite databases.
+        read_replica: the connection strings for read replicas of the
+            database.
 
     Raises:
         GenericCLIException: when there is already a context with this name.
@@ -56,44 +66,48 @@ def create(
             service_user=service_user,
             service_pass=service_pass,
             root_user=root_user,
+            sqlite_profile=sqlite_profile,
+            read_replicas=read_replica or [],
         )
     )
     config.save()
     console.print(f'Context with name "{name}" is created')
 
 
+CONTEXT_COLUMNS = [
+    Column(key='active', title='*', table_format=lambda x: '*' if x else ''),
+    Column(key='name', title='Name'),
+    Column(key='db_string', title='Database string'),
+    Column(
+        key='warning', title='Warning', table_format=lambda x: '*' if x else ''
+    ),
+    Column(key='service_user', title='Service user'),
+    Column(key='root_user', title='Root user'),
+]
+
+
 @app.command(name='list')
-def retrieve() -> None:
+def retrieve(output: OutputFormat = OutputFormat.TABLE) -> None:
     """List configured contexts.
 
     Lists all configured contexts.
+
+    Args:
+        output: the output format.
     """
-    console = ConsoleFactory.get_console()
     contexts = config.contexts
-    table = get_table()
-    table.add_column('*')
-    table.add_column('Name')
-    table.add_column('Database string')
-    table.add_column('Warning')
-    table.add_column('Service user')
-    table.add_column('Root user')
-
-    for name, context in contexts.items():
-        active = ''
-        warning = ''
-        if config.config:
-            if config.config.active_context == name:
-                active = '*'
-            warning = '*' if context.warning else ''
-        table.add_row(
-            active,
-            f'{name}',
-            context.db_string_with_masked_pwd,
-            warning,
-            context.service_user,
-            context.root_user,
-        )
-    console.print(table)
+    with get_writer(output, CONTEXT_COLUMNS) as writer:
+        for name, context in contexts.items():
+            writer.write_row(
+                {
+                    'active': config.config.active_context == name,
+                    'name': name,
+                    'db_string': context.db_string_with_masked_pwd,
+                    'warning': context.warning,
+                    'service_user': context.service_user,
+                    'root_user': context.root_user,
+                }
+            )
 
 
 @app.command(name='set')
@@ -105,6 +119,15 @@ def update(
     service_user: Optional[str] = None,
     service_pass: Optional[str] = None,
     root_user: Optional[str] = None,
+    sqlite_profile: Optional[SQLiteProfile] = None,
+    read_replica: Optional[list[str]] = typer.Option(
+        None,
+        help='A read replica for read-only commands. Can be repeated; '
+        + 'replaces the configured read replicas.',
+    ),
+    no_read_replicas: bool = typer.Option(
+        False, help='Remove all read replicas.'
+    ),
 ) -> None:
     """Update a configured context.
 
@@ -119,6 +142,10 @@ def update(
         service_user: the service user to use when connecting to this instance.
         service_pass: the password for the service user.
         root_user: the username of a root user to use when working with users.
+        sqlite_profile: the performance profile to use for SQLite databases.
+        read_replica: the connection strings for read replicas of the
+            database. Replaces the configured read replicas.
+        no_read_replicas: if set to True, all read replicas are removed.
 
     Raises:
         GenericCLIException: when the given context doesn't exist.
@@ -142,6 +169,12 @@ def update(
             selected_context.service_pass = service_pass
         if root_user is not None:
             selected_context.root_user = root_user
+        if sqlite_profile is not None:
+            selected_context.sqlite_profile = sqlite_profile
+        if read_replica:
+            selected_context.read_replicas = read_replica
+        if no_read_replicas:
+            selected_context.read_replicas = []
 
         config.save()
         console.print(f'Context with name "{name}" is updated')
@@ -197,3 +230,77 @@ def use(context: str) -> None:
         console.print(f'Now using "{context}"')
         return
     raise GenericCLIError(f'Context "{context}" is not configured.')
+
+
+PING_COLUMNS = [
+    Column(key='name', title='Context'),
+    Column(key='reachable', title='Reachable'),
+    Column(key='connect_ms', title='Connect ms'),
+    Column(key='checkout_ms', title='Checkout ms'),
+    Column(key='p50_ms', title='p50 ms'),
+    Column(key='p90_ms', title='p90 ms'),
+    Column(key='p99_ms', title='p99 ms'),
+    Column(key='error', title='Error'),
+]
+
+
+@app.command(name='ping')
+def ping(
+    ping_all: bool = typer.Option(
+        False, '--all', help='Probe all contexts instead of the active one.'
+    ),
+    samples: int = 10,
+    timeout: float = 5.0,
+    workers: int = 8,
+    output: OutputFormat = OutputFormat.TABLE,
+) -> None:
+    """Check if the databases of contexts can be reached.
+
+    Connects to the database of the active context, or of all contexts, and
+    reports the time to connect, the latency of `SELECT 1` and the time to
+    get a connection from the connection pool. The read replicas of the
+    contexts are probed as well. The databases are probed at the same time.
+
+    Args:
+        ping_all: if set to True, all contexts are probed.
+        samples: the number of times `SELECT 1` is run per database.
+        timeout: the time in seconds to wait for a database.
+        workers: the maximum number of databases to probe at the same time.
+        output: the output format.
+
+    Raises:
+        GenericCLIException: when the options are invalid, or when a database
+            cannot be reached.
+    """
+    if samples < 1 or timeout <= 0 or workers < 1:
+        raise GenericCLIError(
+            'Samples, timeout and workers should be positive'
+        )
+
+    contexts = (
+        list(config.contexts.values()) if ping_all else [config.active_context]
+    )
+    targets = []
+    for context in contexts:
+        targets.append(
+            PingTarget(name=context.name, db_string=context.db_string)
+        )
+        targets.extend(
+            PingTarget(
+                name=f'{context.name} (replica {number})', db_string=replica
+            )
+            for number, replica in enumerate(context.read_replicas, start=1)
+        )
+
+    results = ping_databases(
+        targets, samples=samples, timeout=timeout, workers=workers
+    )
+    with get_writer(output, PING_COLUMNS) as writer:
+        for result in results:
+            writer.write_row(result.model_dump())
+
+    unreachable = [result.name for result in results if not result.reachable]
+    if unreachable:
+        raise GenericCLIError(
+            'Cannot reach: ' + ', '.join(f'"{name}"' for name in unreachable)
+        )
@@ -4,22 +4,96 @@ Exposes the `database` commands for the CLI app.
 """
 
 from logging import getLogger
+from pathlib import Path
+from typing import Optional
 
 import typer
 from my_data.data_loader import DataLoader, JSONDataSource
 from my_data.my_data_table_creator import MyDataTableCreator
-from sqlalchemy.exc import IntegrityError
+from pydantic import TypeAdapter
+from sqlalchemy.exc import DBAPIError, IntegrityError, OperationalError
 
 from my_multitool.exceptions import (
     GenericCLIError,
+    InvalidImportDataError,
     NoConfirmationError,
     SQLError,
+    UnsafeSchemaChangeError,
+    UnsupportedDialectError,
 )
 
-from .globals import config, get_my_data_object_for_context
+from .benchmark import Benchmark, BenchmarkResult
+from .config import ContextModel
+from .data_generator import (
+    DataGenerator,
+    get_start_id,
+    insert_data,
+    write_json,
+    write_ndjson,
+)
+from .globals import (
+    config,
+    get_my_data_object_for_context,
+    get_root_user_for_context,
+)
+from .metrics import metrics
+from .models import DataFileFormat, Intent, OnConflict, OutputFormat
+from .output import Column, get_model_columns, get_writer
+from .result_cache import cached, invalidate_cache
+from .schema_sync import apply_schema_changes, get_schema_changes
+from .sql_profiler import echo_sql_statements, sql_profiling_options
+from .stats import TableStats, format_size, get_table_stats
+from .streaming_copy import copy_tables
 from .style import ConsoleFactory
+from .timings import timings
+from .upsert import upsert_models
+
+app = typer.Typer(no_args_is_help=True, callback=sql_profiling_options)
+
+COPY_COLUMNS = [
+    Column(key='table', title='Table'),
+    Column(key='rows', title='Rows'),
+]
+
+BENCHMARK_COLUMNS = [
+    Column(key='name', title='Operation'),
+    Column(key='operations', title='Count'),
+    Column(key='throughput', title='Ops/s'),
+    Column(key='p50_ms', title='p50 ms'),
+    Column(key='p90_ms', title='p90 ms'),
+    Column(key='p99_ms', title='p99 ms'),
+    Column(key='max_ms', title='Max ms'),
+]
+
+STATS_COLUMNS = [
+    Column(key='name', title='Table'),
+    Column(key='rows', title='Rows'),
+    Column(key='size', title='Size'),
+    Column(key='indexes', title='Indexes'),
+]
+
 
-app = typer.Typer(no_args_is_help=True)
+def _confirm_context_warning(context: ContextModel) -> None:
+    """Ask for confirmation if the context mandates a warning.
+
+    Args:
+        context: the context that is going to be changed.
+
+    Raises:
+        NoConfirmationException: when the user presses 'N' at the question if
+            he wants to continue.
+    """
+    if context.warning:
+        logger = getLogger('database-confirm')
+        logger.warning('Context mandates a warning for this action')
+        console = ConsoleFactory.get_console()
+        confirm = console.input(
+            '[yellow]'
+            + f'You are working on context "{context.name}". '
+            + 'This action can be fatal. Continue? [ Y/n ] [/yellow]'
+        )
+        if confirm.lower().strip() != 'y' and confirm.strip() != '':
+            raise NoConfirmationError
 
 
 @app.command(name='create')
@@ -30,7 +104,8 @@ def create(echo_sql: bool = False, drop_tables: bool = False) -> None:
 
     Args:
         echo_sql: if set to True, the SQL queries that are executed will be
-            displayed. This can be usefull to see what is happening.
+            displayed with their latency. This can be usefull to see what is
+            happening.
         drop_tables: if set to True, all tables will be dropped which will
             result in data loss.
 
@@ -41,21 +116,12 @@ def create(echo_sql: bool = False, drop_tables: bool = False) -> None:
     logger = getLogger('database-create')
     console = ConsoleFactory.get_console()
     logger.info('Using config "%s"', config.active_context.name)
-
-    if config.active_context.warning:
-        logger.warning('Context mandates a warning for this action')
-        confirm = console.input(
-            '[yellow]'
-            + f'You are working on context "{config.active_context.name}". '
-            + 'This action can be fatal. Continue? [ Y/n ] [/yellow]'
-        )
-        if confirm.lower().strip() != 'y' and confirm.strip() != '':
-            raise NoConfirmationError
+    _confirm_context_warning(config.active_context)
 
     logger.debug('Creating MyData object')
-    data = get_my_data_object_for_context(
-        context_name=None, db_args={'echo': echo_sql}
-    )
+    if echo_sql:
+        echo_sql_statements()
+    data = get_my_data_object_for_context(context_name=None)
 
     if drop_tables:
         logger.warning('All current data in the database will be lost!')
@@ -63,40 +129,419 @@ def create(echo_sql: bool = False, drop_tables: bool = False) -> None:
     logger.debug('Creating tables')
     creator = MyDataTableCreator(my_data_object=data)
     creator.create_db_tables(drop_tables=drop_tables)
+    invalidate_cache()
     console.print('Created tables')
 
 
+@app.command(name='sync-schema')
+def sync_schema(echo_sql: bool = False, dry_run: bool = False) -> None:
+    """Synchronize the database schema.
+
+    Compares the schema of the database for the currently activated context
+    with the models and creates the missing tables, columns and indexes.
+    Existing tables and data are left alone.
+
+    Args:
+        echo_sql: if set to True, the SQL queries that are executed will be
+            displayed with their latency. This can be usefull to see what is
+            happening.
+        dry_run: if set to True, the DDL statements are displayed instead of
+            executed.
+
+    Raises:
+        GenericCLIError: when a missing column cannot be added safely.
+        SQLError: when an SQL error occurs while applying the changes.
+    """
+    logger = getLogger('database-sync-schema')
+    console = ConsoleFactory.get_console()
+    logger.info('Using config "%s"', config.active_context.name)
+
+    logger.debug('Creating MyData object')
+    if echo_sql:
+        echo_sql_statements()
+    data = get_my_data_object_for_context(context_name=None)
+    data.create_engine()
+    engine = data.database_engine
+
+    try:
+        statements = get_schema_changes(engine)  # type: ignore
+    except UnsafeSchemaChangeError as exception:
+        raise GenericCLIError(str(exception)) from exception
+    if not statements:
+        console.print('Schema is up to date')
+        return
+
+    if dry_run:
+        for statement in statements:
+            console.print(f'{statement};', markup=False, highlight=False)
+        return
+
+    _confirm_context_warning(config.active_context)
+    logger.info('Applying %d schema changes', len(statements))
+    try:
+        apply_schema_changes(engine, statements)  # type: ignore
+    except DBAPIError as exception:
+        raise SQLError(str(exception.orig)) from exception
+    finally:
+        invalidate_cache()
+    console.print(f'Applied {len(statements)} schema changes')
+
+
 @app.command(name='import-json')
-def import_json(filename: str, echo_sql: bool = False) -> None:
+def import_json(
+    filename: str,
+    echo_sql: bool = False,
+    on_conflict: OnConflict = OnConflict.FAIL,
+) -> None:
     """Import data from a JSON file.
 
     Args:
         filename: the name of the file to import.
         echo_sql: if set to True, the SQL queries that are executed will be
-            displayed. This can be usefull to see what is happening.
+            displayed with their latency. This can be usefull to see what is
+            happening.
+        on_conflict: what to do with records that already exist in the
+            database. `fail` stops the import, `skip` leaves the existing
+            records alone and `update` overwrites existing records that are
+            different from the imported records.
 
     Raises:
-        GenericCLIException: when the file to import is not found.
+        GenericCLIException: when the file to import is not found, or when
+            the data cannot be upserted.
         SQLError: when an SQL error occurs.
     """
     logger = getLogger('database-import-json')
     console = ConsoleFactory.get_console()
 
     logger.debug('Creating MyData object')
-    data = get_my_data_object_for_context(
-        context_name=None, db_args={'echo': echo_sql}
-    )
+    if echo_sql:
+        echo_sql_statements()
+    data = get_my_data_object_for_context(context_name=None)
     data.create_engine()
 
-    loader = DataLoader(
-        my_data_object=data, data_source=JSONDataSource(filename)
-    )
+    source = JSONDataSource(filename)
     logger.info('Importing data from file "%s"', filename)
 
     try:
-        loader.load()
+        with timings.phase('data load'):
+            if on_conflict == OnConflict.FAIL:
+                loader = DataLoader(my_data_object=data, data_source=source)
+                loader.load()
+            else:
+                written = upsert_models(
+                    engine=data.database_engine,  # type: ignore
+                    models=source.load(),
+                    on_conflict=on_conflict,
+                )
+                for table, count in written.items():
+                    logger.info('Rows written to "%s": %d', table, count)
+                    metrics.add_rows(table, 'imported', count)
     except FileNotFoundError as exception:
         raise GenericCLIError(f'File not found: {filename}') from exception
+    except (UnsupportedDialectError, InvalidImportDataError) as exception:
+        raise GenericCLIError(str(exception)) from exception
     except IntegrityError as exception:
         raise SQLError(','.join(exception.args)) from exception
+    finally:
+        invalidate_cache()
     console.print('Imported data')
+
+
+@app.command(name='copy')
+def copy(
+    source: str = typer.Option(..., '--from', help='Context to copy from.'),
+    target: str = typer.Option(..., '--to', help='Context to copy to.'),
+    batch_size: int = 1000,
+    queue_size: int = 4,
+) -> None:
+    """Copy all data from one context to another context.
+
+    Streams all tables from the database of one context to the database of
+    another context. Rows are read and inserted in batches; reading and
+    writing happen at the same time. Missing tables are created in the target
+    database. The source is read from a read replica when it has one.
+
+    Args:
+        source: the name of the context to copy from.
+        target: the name of the context to copy to.
+        batch_size: the number of rows to read and insert at once.
+        queue_size: the maximum number of batches that are read ahead.
+
+    Raises:
+        GenericCLIException: when one of the contexts does not exist, or when
+            the source and target are the same context.
+        SQLError: when an SQL error occurs.
+    """
+    logger = getLogger('database-copy')
+
+    for name in (source, target):
+        if name not in config.contexts:
+            raise GenericCLIError(f'Context "{name}" is not configured.')
+    if source == target:
+        raise GenericCLIError('Source and target context are the same')
+    if batch_size < 1 or queue_size < 1:
+        raise GenericCLIError('Batch size and queue size should be positive')
+
+    _confirm_context_warning(config.contexts[target])
+
+    logger.debug('Creating MyData objects')
+    source_data = get_my_data_object_for_context(
+        context_name=source, intent=Intent.READ
+    )
+    target_data = get_my_data_object_for_context(context_name=target)
+    source_data.create_engine()
+    target_data.create_engine()
+
+    logger.debug('Creating missing tables in "%s"', target)
+    MyDataTableCreator(my_data_object=target_data).create_db_tables()
+
+    logger.info('Copying data from "%s" to "%s"', source, target)
+    try:
+        copied = copy_tables(
+            source=source_data.database_engine,  # type: ignore
+            target=target_data.database_engine,  # type: ignore
+            batch_size=batch_size,
+            queue_size=queue_size,
+        )
+    except (IntegrityError, OperationalError) as exception:
+        raise SQLError(str(exception.orig)) from exception
+    finally:
+        invalidate_cache(target)
+
+    with get_writer(OutputFormat.TABLE, COPY_COLUMNS) as writer:
+        for table_name, count in copied.items():
+            metrics.add_rows(table_name, 'exported', count)
+            metrics.add_rows(table_name, 'imported', count)
+            writer.write_row({'table': table_name, 'rows': count})
+
+
+@app.command(name='generate')
+def generate(
+    users: int = 1000,
+    scopes: int = 0,
+    tokens: int = 0,
+    seed: int = 0,
+    batch_size: int = 1000,
+    to_file: Optional[str] = None,
+    file_format: Optional[DataFileFormat] = None,
+    start_id: Optional[int] = None,
+    root_share: float = 0.0,
+) -> None:
+    """Generate synthetic data for load tests.
+
+    Generates realistic users, API scopes and API tokens. The same seed always
+    gives the same data, so load tests and benchmarks can be repeated. The
+    data is inserted in the database of the active context in batches, or
+    written to a file. JSON files can be imported with `database
+    import-json`; NDJSON files only contain the users and can be imported
+    with `users import`.
+
+    Args:
+        users: the number of users.
+        scopes: the number of API scopes.
+        tokens: the number of API tokens, divided over the users.
+        seed: the seed for the random data.
+        batch_size: the number of records to insert at once.
+        to_file: the file to write the data to, instead of the database.
+        file_format: the format of the file. If not given, the format is
+            determined from the extension of the file.
+        start_id: the first ID for the records. For the database, the
+            default is the first ID that is not used yet; for files, it is 1.
+        root_share: the share of the users that get the `root` role, from 0
+            to 1. The other users get the `user` role.
+
+    Raises:
+        GenericCLIException: when the numbers are invalid, or when API scopes
+            or API tokens are written to a NDJSON file.
+        SQLError: when an SQL error occurs.
+    """
+    logger = getLogger('database-generate')
+
+    if min(users, scopes, tokens) < 0:
+        raise GenericCLIError('The numbers of records cannot be negative')
+    if batch_size < 1:
+        raise GenericCLIError('Batch size should be positive')
+    if tokens and not users:
+        raise GenericCLIError('API tokens need users to belong to')
+    if not 0 <= root_share <= 1:
+        raise GenericCLIError('Root share should be between 0 and 1')
+
+    generator = DataGenerator(
+        users=users,
+        scopes=scopes,
+        tokens=tokens,
+        seed=seed,
+        root_share=root_share,
+    )
+
+    if to_file:
+        if not file_format:
+            file_format = (
+                DataFileFormat.NDJSON
+                if Path(to_file).suffix.lower() in ('.ndjson', '.jsonl')
+                else DataFileFormat.JSON
+            )
+        if file_format == DataFileFormat.NDJSON and (scopes or tokens):
+            raise GenericCLIError(
+                'NDJSON files only contain users; use JSON for API scopes '
+                + 'and API tokens'
+            )
+        generator.start_id = start_id or 1
+        logger.info('Writing data to file "%s"', to_file)
+        with open(to_file, 'w', encoding='utf-8') as output_file:
+            if file_format == DataFileFormat.NDJSON:
+                written = write_ndjson(generator, output_file)
+            else:
+                written = write_json(generator, output_file)
+    else:
+        logger.info('Using config "%s"', config.active_context.name)
+        _confirm_context_warning(config.active_context)
+        data = get_my_data_object_for_context()
+        data.create_engine()
+        engine = data.database_engine
+        try:
+            generator.start_id = start_id or get_start_id(
+                engine  # type: ignore
+            )
+            written = insert_data(
+                engine,  # type: ignore
+                generator,
+                batch_size=batch_size,
+            )
+        except (IntegrityError, OperationalError) as exception:
+            raise SQLError(str(exception.orig)) from exception
+        finally:
+            invalidate_cache()
+        for table_name, count in written.items():
+            metrics.add_rows(table_name, 'imported', count)
+
+    with get_writer(OutputFormat.TABLE, COPY_COLUMNS) as writer:
+        for table_name, count in written.items():
+            writer.write_row({'table': table_name, 'rows': count})
+
+
+@app.command(name='benchmark')
+def benchmark(
+    users: int = 100,
+    batch_size: int = 50,
+    lookups: int = 100,
+    scans: int = 10,
+    password_updates: int = 5,
+    seed: int = 0,
+    output: OutputFormat = OutputFormat.TABLE,
+) -> None:
+    """Benchmark the database of the active context.
+
+    Runs a repeatable workload against the database of the active context:
+    users are inserted row-by-row and in bulk, looked up by username, listed
+    and their passwords are updated. The synthetic users are removed
+    afterwards. Like the `users` commands, this needs a Service Account and a
+    Root account.
+
+    Args:
+        users: the number of users to insert row-by-row and in bulk.
+        batch_size: the number of users per bulk insert.
+        lookups: the number of lookups by username.
+        scans: the number of full scans of the users table.
+        password_updates: the number of password updates.
+        seed: the seed for the random choices in the workload.
+        output: the output format for the results.
+
+    Raises:
+        GenericCLIException: when the parameters are invalid, or when no
+            Service user or Root user is set in the active context.
+    """
+    logger = getLogger('database-benchmark')
+    logger.info('Using config "%s"', config.active_context.name)
+
+    if users < 1 or batch_size < 1:
+        raise GenericCLIError('Users and batch size should be positive')
+
+    _confirm_context_warning(config.active_context)
+
+    logger.debug('Creating MyData object')
+    data = get_my_data_object_for_context()
+    root_user = get_root_user_for_context(data)
+
+    results = Benchmark(
+        data=data,
+        root_user=root_user,
+        users=users,
+        batch_size=batch_size,
+        lookups=lookups,
+        scans=scans,
+        password_updates=password_updates,
+        seed=seed,
+    ).run()
+
+    if output != OutputFormat.TABLE:
+        with get_writer(output, get_model_columns(BenchmarkResult)) as writer:
+            for result in results:
+                writer.write_row(result.model_dump())
+        return
+
+    with get_writer(output, BENCHMARK_COLUMNS) as writer:
+        for result in results:
+            writer.write_row(
+                {
+                    'name': result.name,
+                    'operations': result.operations,
+                    'throughput': f'{result.throughput:.1f}',
+                    'p50_ms': f'{result.p50_ms:.2f}',
+                    'p90_ms': f'{result.p90_ms:.2f}',
+                    'p99_ms': f'{result.p99_ms:.2f}',
+                    'max_ms': f'{result.max_ms:.2f}',
+                }
+            )
+
+
+@app.command(name='stats')
+def stats(
+    exact: bool = False, output: OutputFormat = OutputFormat.TABLE
+) -> None:
+    """Display statistics for the database.
+
+    Displays the number of rows, the on-disk size and the indexes for every
+    table in the database of the active context. Where the database allows
+    it, the number of rows is estimated from the statistics of the database
+    instead of counting all rows.
+
+    Args:
+        exact: if set to True, the rows are counted with `COUNT(*)`.
+        output: the output format for the statistics.
+    """
+    logger = getLogger('database-stats')
+    logger.info('Using config "%s"', config.active_context.name)
+
+    def stats_from_database() -> list[TableStats]:
+        logger.debug('Creating MyData object')
+        data = get_my_data_object_for_context(intent=Intent.READ)
+        data.create_engine()
+        return get_table_stats(
+            data.database_engine,  # type: ignore
+            exact=exact,
+        )
+
+    table_stats = cached(
+        'database stats',
+        {'exact': exact},
+        TypeAdapter(list[TableStats]),
+        stats_from_database,
+    )
+
+    if output != OutputFormat.TABLE:
+        with get_writer(output, get_model_columns(TableStats)) as writer:
+            for item in table_stats:
+                writer.write_row(item.model_dump())
+        return
+
+    with get_writer(output, STATS_COLUMNS) as writer:
+        for item in table_stats:
+            writer.write_row(
+                {
+                    'name': item.name,
+                    'rows': f'{item.rows}' if item.exact else f'~{item.rows}',
+                    'size': format_size(item.size_bytes),
+                    'indexes': ', '.join(item.indexes),
+                }
+            )
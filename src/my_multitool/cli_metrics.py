@@ -0,0 +1,56 @@
+"""The `metrics` portion of the app."""
+
+from logging import getLogger
+
+import typer
+
+from .exceptions import GenericCLIError
+from .metrics import MetricsServer
+from .style import ConsoleFactory
+
+app = typer.Typer(no_args_is_help=True)
+
+
+@app.command(name='serve')
+def serve(
+    metrics_file: str = typer.Option(
+        ..., help='The metrics file that commands write to.'
+    ),
+    host: str = typer.Option('127.0.0.1', help='The address to listen on.'),
+    port: int = typer.Option(9464, help='The port to listen on.'),
+) -> None:
+    """Serve the metrics of commands over HTTP.
+
+    Serves the metrics file that commands write to with the `--metrics-file`
+    option on `http://HOST:PORT/metrics`, so Prometheus can scrape it. The
+    file is read on every request, so the metrics of commands that run while
+    serving are included. Stop the server with Ctrl-C.
+
+    Args:
+        metrics_file: the metrics file to serve.
+        host: the address to listen on.
+        port: the port to listen on.
+
+    Raises:
+        GenericCLIException: when the server cannot listen on the address.
+    """
+    logger = getLogger('metrics-serve')
+    console = ConsoleFactory.get_console()
+    try:
+        server = MetricsServer(metrics_file, host, port)
+    except OSError as exc:
+        raise GenericCLIError(
+            f'Cannot listen on {host}:{port}: {exc.strerror}'
+        ) from exc
+
+    console.print(
+        f'Serving "{metrics_file}" on '
+        + f'http://{host}:{server.server_port}/metrics',
+        markup=False,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info('Stopping the metrics server')
+    finally:
+        server.server_close()
@@ -4,21 +4,110 @@ Exposes the `users` commands for the CLI app.
 """
 
 import getpass
+from collections.abc import Callable
+from functools import partial
 from logging import getLogger
+from typing import Optional
 
 import typer
-from my_data.exceptions import UnknownUserAccountError
-from my_model import User
+from my_data.context import UserContext
+from my_model import User, UserRole
+from pydantic import TypeAdapter
+from sqlalchemy.sql.elements import ColumnElement
 
-from .exceptions import GenericCLIError
-from .globals import config, get_my_data_object_for_context
-from .style import ConsoleFactory, get_table
+from .exceptions import GenericCLIError, InvalidRecordsError
+from .globals import (
+    check_context_credentials,
+    config,
+    get_my_data_object_for_context,
+    get_root_user_for_context,
+)
+from .metrics import metrics
+from .models import (
+    Intent,
+    OutputFormat,
+    RecordFormat,
+    UserRoleFilter,
+    YesNo,
+)
+from .output import Column, get_writer
+from .passwords import generate_password, hash_passwords
+from .records import batched, read_records
+from .result_cache import cached, get_result_cache, invalidate_cache
+from .sql_profiler import sql_profiling_options
+from .style import ConsoleFactory
+from .timings import timings
+from .user_batches import (
+    BatchResult,
+    NumberedRecord,
+    apply_in_batches,
+    create_users,
+    delete_users,
+    update_users,
+)
+from .user_listing import (
+    UserGroup,
+    UserRow,
+    get_user_filters,
+    iter_user_rows,
+    summarize_users,
+)
 
-app = typer.Typer(no_args_is_help=True)
+app = typer.Typer(no_args_is_help=True, callback=sql_profiling_options)
+
+
+USER_ROWS: TypeAdapter[list[UserRow]] = TypeAdapter(list[UserRow])
+
+USER_COLUMNS = [
+    Column(key='id', title='#', width=8),
+    Column(key='fullname', title='Fullname', width=24),
+    Column(key='username', title='Username', width=24),
+    Column(key='role', title='Role', width=16),
+    Column(key='second_factor', title='Second factor', width=13),
+]
+
+
+def _get_filters(
+    role: list[UserRoleFilter] | None,
+    username_prefix: str | None,
+    email_domain: str | None,
+    second_factor: YesNo | None,
+) -> list[ColumnElement[bool]]:
+    """Create the SQL filters for the filter options of a command.
+
+    Args:
+        role: only users with one of these roles.
+        username_prefix: only users with a username that starts with this.
+        email_domain: only users with a email address in this domain.
+        second_factor: only users with (`yes`) or without (`no`) a second
+            factor.
+
+    Returns:
+        A list with the filters.
+    """
+    with_second_factor = None
+    if second_factor is not None:
+        with_second_factor = second_factor == YesNo.YES
+    return get_user_filters(
+        roles=[UserRole[item.name] for item in role] if role else None,
+        username_prefix=username_prefix,
+        email_domain=email_domain,
+        second_factor=with_second_factor,
+    )
 
 
 @app.command(name='list')
-def retrieve() -> None:
+def retrieve(
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None,
+    stream: bool = False,
+    chunk_size: int = 1000,
+    output: OutputFormat = OutputFormat.TABLE,
+    role: Optional[list[UserRoleFilter]] = None,
+    username_prefix: Optional[str] = None,
+    email_domain: Optional[str] = None,
+    second_factor: Optional[YesNo] = None,
+) -> None:
     """List users in the database.
 
     Lists all users in the database. It needs a Service Account and a Root
@@ -26,58 +115,235 @@ def retrieve() -> None:
     the root account doesn't need this since the service account can just
     retrieve it.
 
+    Users are retrieved in chunks, ordered by their ID. To get the next page of
+    a paginated list, use the ID of the last user as `--after-id`.
+
+    Args:
+        limit: the maximum number of users to list.
+        after_id: only list users with a ID higher than this.
+        stream: if set to True, the users are printed per chunk while they
+            are retrieved instead of in one table at the end. This keeps the
+            memory usage flat for large databases.
+        chunk_size: the number of users to retrieve at once.
+        output: the output format. Formats other than `table` always write
+            the users while they are retrieved.
+        role: only list users with this role. Can be given multiple times.
+        username_prefix: only list users with a username that starts with
+            this.
+        email_domain: only list users with a email address in this domain.
+        second_factor: only list users with (`yes`) or without (`no`) a
+            second factor.
+
     Raises:
         GenericCLIException: when no Service user or password is set in the
-            active context.
+            active context, or when the limit or chunk size is invalid.
     """
     logger = getLogger('users-list')
-    console = ConsoleFactory.get_console()
     logger.info('Using config "%s"', config.active_context.name)
 
+    if limit is not None and limit < 1:
+        raise GenericCLIError('Limit should be at least 1')
+    if chunk_size < 1:
+        raise GenericCLIError('Chunk size should be at least 1')
+
+    # Arguments that determine which users are listed, for the cache
+    arguments = {
+        'limit': limit,
+        'after_id': after_id,
+        'role': role,
+        'username_prefix': username_prefix,
+        'email_domain': email_domain,
+        'second_factor': second_factor,
+    }
+    # A cached result is used without the database, so only the
+    # configuration of the credentials is checked before the cache is used.
+    check_context_credentials()
+    cache = get_result_cache() if config.config.cache.enabled else None
+    if cache:
+        rows = cache.get(
+            config.active_context, 'users list', arguments, USER_ROWS
+        )
+        if rows is not None:
+            with get_writer(output, USER_COLUMNS, stream=stream) as writer:
+                for user_row in rows:
+                    writer.write_row(user_row.model_dump())
+            metrics.add_rows('user', 'exported', len(rows))
+            return
+
     logger.debug('Creating MyData object')
-    data = get_my_data_object_for_context()
+    data = get_my_data_object_for_context(intent=Intent.READ)
+    user = get_root_user_for_context(data)
+    filters = _get_filters(role, username_prefix, email_domain, second_factor)
+
+    # The rows are collected for the cache while they are written. A row is
+    # at least 64 bytes in the cache, so listings with more rows would not
+    # fit in the cache anyway.
+    collected: list[UserRow] | None = [] if cache else None
+    max_rows = config.config.cache.max_size // 64
 
-    user = None
-    if any(
-        (
-            config.active_context.service_user is None,
-            config.active_context.service_pass is None,
-            config.active_context.root_user is None,
+    if user:
+        with (
+            data.get_context(user=user) as context,
+            get_writer(output, USER_COLUMNS, stream=stream) as writer,
+        ):
+            for chunk in iter_user_rows(
+                context,
+                flt=filters,
+                after_id=after_id,
+                limit=limit,
+                chunk_size=chunk_size,
+            ):
+                logger.debug('Retrieved %d users', len(chunk))
+                for row in chunk:
+                    writer.write_row(row)
+                writer.flush()
+                metrics.add_rows('user', 'exported', len(chunk))
+                if collected is not None:
+                    collected.extend(
+                        UserRow.model_validate(row) for row in chunk
+                    )
+                    if len(collected) > max_rows:
+                        collected = None
+
+    if cache and collected is not None:
+        cache.set(
+            config.active_context,
+            'users list',
+            arguments,
+            USER_ROWS,
+            collected,
         )
-    ):
-        raise GenericCLIError(
-            'Service user credentials or root user not set in active context'
+
+
+@app.command(name='count')
+def count(
+    output: OutputFormat = OutputFormat.TABLE,
+    role: Optional[list[UserRoleFilter]] = None,
+    username_prefix: Optional[str] = None,
+    email_domain: Optional[str] = None,
+    second_factor: Optional[YesNo] = None,
+) -> None:
+    """Count the users in the database.
+
+    The users are counted by the database with `COUNT(*)`, so no users are
+    retrieved. This makes it cheap to poll the number of users. The same
+    filters as for `list` can be used.
+
+    Args:
+        output: the output format. For `table`, only the number is printed.
+        role: only count users with this role. Can be given multiple times.
+        username_prefix: only count users with a username that starts with
+            this.
+        email_domain: only count users with a email address in this domain.
+        second_factor: only count users with (`yes`) or without (`no`) a
+            second factor.
+    """
+    logger = getLogger('users-count')
+    logger.info('Using config "%s"', config.active_context.name)
+
+    # Only the configuration is checked before the cache; see `users list`
+    check_context_credentials()
+
+    def count_in_database() -> int:
+        logger.debug('Creating MyData object')
+        data = get_my_data_object_for_context(intent=Intent.READ)
+        user = get_root_user_for_context(data)
+        filters = _get_filters(
+            role, username_prefix, email_domain, second_factor
         )
+        with data.get_context(user=user) as context:
+            users = context.users.count(filters)
+        return users
 
-    with data.get_context_for_service_user() as context:
-        try:
-            user = context.get_user_account_by_username(
-                str(config.active_context.root_user)
-            )
-        except UnknownUserAccountError as exc:
-            raise GenericCLIError(
-                f'Unknown root user: "{config.active_context.root_user}"'
-            ) from exc
+    users = cached(
+        'users count',
+        {
+            'role': role,
+            'username_prefix': username_prefix,
+            'email_domain': email_domain,
+            'second_factor': second_factor,
+        },
+        TypeAdapter(int),
+        count_in_database,
+    )
 
-    if user:
+    if output == OutputFormat.TABLE:
+        ConsoleFactory.get_console().print(users)
+        return
+    with get_writer(output, [Column(key='users', title='Users')]) as writer:
+        writer.write_row({'users': users})
+
+
+SUMMARY_COLUMNS = [
+    Column(key='role', title='Role'),
+    Column(key='second_factor', title='Second factor'),
+    Column(key='users', title='Users'),
+]
+
+
+@app.command(name='summary')
+def summary(
+    output: OutputFormat = OutputFormat.TABLE,
+    role: Optional[list[UserRoleFilter]] = None,
+    username_prefix: Optional[str] = None,
+    email_domain: Optional[str] = None,
+    second_factor: Optional[YesNo] = None,
+) -> None:
+    """Display the number of users per role and second factor status.
+
+    The users are counted by the database with one `GROUP BY` query, so no
+    users are retrieved. The same filters as for `list` can be used.
+
+    Args:
+        output: the output format. For `table`, a row with the totals is
+            added.
+        role: only count users with this role. Can be given multiple times.
+        username_prefix: only count users with a username that starts with
+            this.
+        email_domain: only count users with a email address in this domain.
+        second_factor: only count users with (`yes`) or without (`no`) a
+            second factor.
+    """
+    logger = getLogger('users-summary')
+    logger.info('Using config "%s"', config.active_context.name)
+
+    # Only the configuration is checked before the cache; see `users list`
+    check_context_credentials()
+
+    def summarize_in_database() -> list[UserGroup]:
+        logger.debug('Creating MyData object')
+        data = get_my_data_object_for_context(intent=Intent.READ)
+        user = get_root_user_for_context(data)
+        filters = _get_filters(
+            role, username_prefix, email_domain, second_factor
+        )
         with data.get_context(user=user) as context:
-            users = context.users.retrieve()
-            table = get_table()
-            table.add_column('#')
-            table.add_column('Fullname')
-            table.add_column('Username')
-            table.add_column('Role')
-            table.add_column('Second factor')
-
-            for user in users:
-                table.add_row(
-                    str(user.id),
-                    user.fullname,
-                    user.username,
-                    str(user.role),
-                    'Yes' if user.second_factor else 'No',
-                )
-            console.print(table)
+            groups = summarize_users(context, filters)
+        return groups
+
+    groups = cached(
+        'users summary',
+        {
+            'role': role,
+            'username_prefix': username_prefix,
+            'email_domain': email_domain,
+            'second_factor': second_factor,
+        },
+        TypeAdapter(list[UserGroup]),
+        summarize_in_database,
+    )
+
+    with get_writer(output, SUMMARY_COLUMNS) as writer:
+        for group in groups:
+            writer.write_row(group.model_dump())
+        if output == OutputFormat.TABLE:
+            writer.write_row(
+                {
+                    'role': 'Total',
+                    'second_factor': '',
+                    'users': sum(group.users for group in groups),
+                }
+            )
 
 
 @app.command()
@@ -99,27 +365,7 @@ def set_password(username: str) -> None:
     logger.debug('Creating MyData object')
     data = get_my_data_object_for_context()
 
-    user = None
-    if any(
-        (
-            config.active_context.service_user is None,
-            config.active_context.service_pass is None,
-            config.active_context.root_user is None,
-        )
-    ):
-        raise GenericCLIError(
-            'Service user credentials or root user not set in active context'
-        )
-
-    with data.get_context_for_service_user() as context:
-        try:
-            user = context.get_user_account_by_username(
-                str(config.active_context.root_user)
-            )
-        except UnknownUserAccountError as exc:
-            raise GenericCLIError(
-                f'Unknown root user: "{config.active_context.root_user}"'
-            ) from exc
+    user = get_root_user_for_context(data)
 
     if user:
         new_password = getpass.getpass('Password: ')
@@ -137,5 +383,358 @@ def set_password(username: str) -> None:
             )
             if len(users_accounts) != 1:
                 raise GenericCLIError(f'User "{username}" not found.')
-            users_accounts[0].set_password(new_password)
+            with timings.phase('password hashing'):
+                users_accounts[0].set_password(new_password)
             context.users.update(users_accounts)
+        invalidate_cache()
+
+
+def _read_passwords(
+    filename: str, file_format: RecordFormat | None, generate: bool
+) -> dict[str, str]:
+    """Read the usernames and passwords from a file.
+
+    Args:
+        filename: the file with the records, or `-` for stdin.
+        file_format: the format of the file.
+        generate: if set to True, a password is generated for every user.
+
+    Returns:
+        The passwords, keyed by username.
+
+    Raises:
+        GenericCLIException: when a record is invalid or when a user is given
+            twice.
+    """
+    passwords: dict[str, str] = {}
+    for number, record in enumerate(
+        read_records(filename, file_format), start=1
+    ):
+        username = str(record.get('username') or '')
+        password = generate_password() if generate else record.get('password')
+        if not username:
+            raise GenericCLIError(f'Record {number} has no username')
+        if not password or not isinstance(password, str):
+            raise GenericCLIError(f'Record {number} has no password')
+        if username in passwords:
+            raise GenericCLIError(f'User "{username}" is given twice')
+        passwords[username] = password
+    return passwords
+
+
+@app.command(name='set-passwords')
+def set_passwords(
+    from_file: str = typer.Option(
+        ...,
+        '--from-file',
+        help='CSV or NDJSON file with usernames and passwords; - for stdin.',
+    ),
+    file_format: Optional[RecordFormat] = typer.Option(None, '--format'),
+    generate: bool = False,
+    batch_size: int = 500,
+    workers: Optional[int] = None,
+    output: OutputFormat = OutputFormat.TABLE,
+) -> None:
+    """Set the passwords for a list of users.
+
+    Reads records with a `username` and a `password` from a file, or with only
+    a `username` when the passwords are generated. All users are retrieved
+    with one query. The passwords are hashed in a pool of processes and the
+    users are updated in batches, with one transaction per batch.
+
+    Args:
+        from_file: the file with the records, or `-` for stdin.
+        file_format: the format of the file. If not given, the format is
+            determined from the extension of the file.
+        generate: if set to True, a random password is generated for every
+            user. The generated passwords are displayed.
+        batch_size: the number of users to update per transaction.
+        workers: the number of processes to hash passwords with. Defaults to
+            the number of CPUs.
+        output: the output format for the generated passwords.
+
+    Raises:
+        GenericCLIException: when no Service user or password is set in the
+            active context, when the file is invalid or when users don't
+            exist.
+    """
+    logger = getLogger('users-set-passwords')
+    console = ConsoleFactory.get_console()
+    logger.info('Using config "%s"', config.active_context.name)
+
+    if batch_size < 1:
+        raise GenericCLIError('Batch size should be at least 1')
+    if workers is not None and workers < 1:
+        raise GenericCLIError('Workers should be at least 1')
+
+    # Read and validate all records before changing anything
+    try:
+        passwords = _read_passwords(from_file, file_format, generate)
+    except FileNotFoundError as exc:
+        raise GenericCLIError(f'File "{from_file}" not found') from exc
+    except InvalidRecordsError as exc:
+        raise GenericCLIError(str(exc)) from exc
+    logger.info('Read %d records', len(passwords))
+
+    logger.debug('Creating MyData object')
+    data = get_my_data_object_for_context()
+
+    user = get_root_user_for_context(data)
+
+    with data.get_context(user=user) as context:
+        users_accounts = context.users.retrieve(
+            User.username.in_(list(passwords))  # type: ignore
+        )
+    missing = set(passwords) - {account.username for account in users_accounts}
+    if missing:
+        raise GenericCLIError(
+            f'{len(missing)} users not found: '
+            + ', '.join(f'"{username}"' for username in sorted(missing)[:10])
+        )
+
+    with timings.phase('password hashing'):
+        hashes = hash_passwords(
+            [passwords[account.username] for account in users_accounts],
+            workers=workers,
+        )
+    for account, (password_hash, password_date) in zip(users_accounts, hashes):
+        account.password_hash = password_hash
+        account.password_date = password_date
+
+    for batch in batched(users_accounts, batch_size):
+        with data.get_context(user=user) as context:
+            context.users.update(batch)
+        logger.info('Updated %d users', len(batch))
+    invalidate_cache()
+
+    if generate:
+        columns = [
+            Column(key='username', title='Username'),
+            Column(key='password', title='Password'),
+        ]
+        with get_writer(output, columns) as writer:
+            for username, password in passwords.items():
+                writer.write_row({'username': username, 'password': password})
+    else:
+        console.print(f'Updated {len(users_accounts)} passwords')
+
+
+BATCH_COLUMNS = [
+    Column(key='batch', title='Batch', width=8),
+    Column(key='first_record', title='First record', width=12),
+    Column(key='last_record', title='Last record', width=12),
+    Column(key='status', title='Status', width=8),
+    Column(key='error', title='Error'),
+]
+
+
+def _check_workers(workers: int | None) -> None:
+    """Check the number of processes to hash passwords with.
+
+    Args:
+        workers: the number of processes, or None for the number of CPUs.
+
+    Raises:
+        GenericCLIException: when the number is lower than 1.
+    """
+    if workers is not None and workers < 1:
+        raise GenericCLIError('Workers should be at least 1')
+
+
+def _apply_records(
+    name: str,
+    action: Callable[[UserContext, list[NumberedRecord]], None],
+    from_file: str,
+    file_format: RecordFormat | None,
+    batch_size: int,
+    stop_on_error: bool,
+    output: OutputFormat,
+) -> None:
+    """Apply a action to the records in a file and report every batch.
+
+    Args:
+        name: the name of the command, for logging.
+        action: the function to apply to a batch, like `create_users`.
+        from_file: the file with the records, or `-` for stdin.
+        file_format: the format of the file.
+        batch_size: the number of records per transaction.
+        stop_on_error: if set to True, no batches are applied after a failed
+            batch.
+        output: the output format for the report.
+
+    Raises:
+        GenericCLIException: when no Service user or password is set in the
+            active context, when the file cannot be read or when batches
+            failed.
+    """
+    logger = getLogger(f'users-{name}')
+    logger.info('Using config "%s"', config.active_context.name)
+
+    if batch_size < 1:
+        raise GenericCLIError('Batch size should be at least 1')
+
+    logger.debug('Creating MyData object')
+    data = get_my_data_object_for_context()
+
+    user = get_root_user_for_context(data)
+
+    results: list[BatchResult] = []
+    try:
+        with get_writer(output, BATCH_COLUMNS, stream=True) as writer:
+            for result in apply_in_batches(
+                data,
+                user,
+                read_records(from_file, file_format),
+                action,
+                batch_size=batch_size,
+                stop_on_error=stop_on_error,
+            ):
+                logger.info('Batch %d: %s', result.batch, result.error or 'ok')
+                results.append(result)
+                if name == 'import' and not result.error:
+                    metrics.add_rows('user', 'imported', result.records)
+                writer.write_row(
+                    {
+                        **result.model_dump(),
+                        'status': 'failed' if result.error else 'ok',
+                    }
+                )
+                writer.flush()
+    except FileNotFoundError as exc:
+        raise GenericCLIError(f'File "{from_file}" not found') from exc
+    except InvalidRecordsError as exc:
+        raise GenericCLIError(str(exc)) from exc
+    finally:
+        invalidate_cache()
+
+    failed = [result for result in results if result.error]
+    if failed:
+        raise GenericCLIError(
+            f'{len(failed)} of {len(results)} batches failed; '
+            + f'{sum(result.records for result in failed)} records were not '
+            + 'applied'
+        )
+
+
+@app.command(name='import')
+def import_users(
+    from_file: str = typer.Option(
+        ..., '--from-file', help='CSV or NDJSON file with users; - for stdin.'
+    ),
+    file_format: Optional[RecordFormat] = typer.Option(None, '--format'),
+    batch_size: int = 500,
+    workers: Optional[int] = None,
+    stop_on_error: bool = False,
+    output: OutputFormat = OutputFormat.TABLE,
+) -> None:
+    """Create users from a file.
+
+    Reads records with the `fullname`, `username`, `email` and optionally the
+    `role` and `password` for new users. The users are created in batches,
+    with one transaction per batch. A report with the result for every batch
+    is displayed.
+
+    Args:
+        from_file: the file with the records, or `-` for stdin.
+        file_format: the format of the file. If not given, the format is
+            determined from the extension of the file.
+        batch_size: the number of users to create per transaction.
+        workers: the number of processes to hash passwords with. Defaults to
+            the number of CPUs.
+        stop_on_error: if set to True, the import stops at the first failed
+            batch.
+        output: the output format for the report.
+    """
+    _check_workers(workers)
+    _apply_records(
+        'import',
+        partial(create_users, workers=workers),
+        from_file,
+        file_format,
+        batch_size,
+        stop_on_error,
+        output,
+    )
+
+
+@app.command(name='update')
+def update_users_from_file(
+    from_file: str = typer.Option(
+        ...,
+        '--from-file',
+        help='CSV or NDJSON file with the changes; - for stdin.',
+    ),
+    file_format: Optional[RecordFormat] = typer.Option(None, '--format'),
+    batch_size: int = 500,
+    workers: Optional[int] = None,
+    stop_on_error: bool = False,
+    output: OutputFormat = OutputFormat.TABLE,
+) -> None:
+    """Update users from a file.
+
+    Reads records with the `username` of existing users and the fields to
+    change; `fullname`, `email`, `role` or `password`. Fields that are not
+    given, or empty, are not changed. The users are updated in batches, with
+    one transaction per batch. A report with the result for every batch is
+    displayed.
+
+    Args:
+        from_file: the file with the records, or `-` for stdin.
+        file_format: the format of the file. If not given, the format is
+            determined from the extension of the file.
+        batch_size: the number of users to update per transaction.
+        workers: the number of processes to hash passwords with. Defaults to
+            the number of CPUs.
+        stop_on_error: if set to True, the update stops at the first failed
+            batch.
+        output: the output format for the report.
+    """
+    _check_workers(workers)
+    _apply_records(
+        'update',
+        partial(update_users, workers=workers),
+        from_file,
+        file_format,
+        batch_size,
+        stop_on_error,
+        output,
+    )
+
+
+@app.command(name='delete')
+def delete_users_from_file(
+    from_file: str = typer.Option(
+        ...,
+        '--from-file',
+        help='CSV or NDJSON file with usernames; - for stdin.',
+    ),
+    file_format: Optional[RecordFormat] = typer.Option(None, '--format'),
+    batch_size: int = 500,
+    stop_on_error: bool = False,
+    output: OutputFormat = OutputFormat.TABLE,
+) -> None:
+    """Delete users from a file.
+
+    Reads records with the `username` of the users to delete. Other fields
+    are ignored, so the output of `users list` can be used as input. The
+    users are deleted in batches, with one transaction per batch. A report
+    with the result for every batch is displayed.
+
+    Args:
+        from_file: the file with the records, or `-` for stdin.
+        file_format: the format of the file. If not given, the format is
+            determined from the extension of the file.
+        batch_size: the number of users to delete per transaction.
+        stop_on_error: if set to True, the deletion stops at the first failed
+            batch.
+        output: the output format for the report.
+    """
+    _apply_records(
+        'delete',
+        delete_users,
+        from_file,
+        file_format,
+        batch_size,
+        stop_on_error,
+        output,
+    )
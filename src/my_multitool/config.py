@@ -6,11 +6,73 @@ application.
 
 import re
 from os.path import expanduser
+from typing import Literal
 
 import yaml
 from pydantic import BaseModel, ConfigDict
 
 from .exceptions import ConfigFileNotFoundError, NoConfigToSaveError
+from .models import LogFormat, SQLiteProfile
+
+
+def mask_password(db_string: str) -> str:
+    """Mask the password in a database string.
+
+    Args:
+        db_string: the database string.
+
+    Returns:
+        The database string with the password displayed as three asteriks.
+    """
+    return re.sub(
+        r'//(\S+):(\S+)@', lambda x: f'//{x.group(1)}:***@', db_string
+    )
+
+
+class SQLiteSettingsModel(BaseModel):
+    """BaseModel for SQLite performance settings.
+
+    Contains the PRAGMA settings that are applied to every new connection to
+    a SQLite database. Settings that are not set are left to SQLite.
+
+    Attributes:
+        journal_mode: the journal mode, for instance `WAL`.
+        synchronous: how often SQLite syncs data to disk.
+        cache_size: the size of the page cache. A negative value is in KiB,
+            a positive value is in pages.
+        mmap_size: the maximum number of bytes to use for memory-mapped I/O.
+        temp_store: where temporary tables and indexes are stored.
+        busy_timeout: the time in milliseconds to wait for a locked database.
+    """
+
+    model_config = ConfigDict(extra='forbid')
+
+    journal_mode: (
+        Literal['DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'] | None
+    ) = None
+    synchronous: Literal['OFF', 'NORMAL', 'FULL', 'EXTRA'] | None = None
+    cache_size: int | None = None
+    mmap_size: int | None = None
+    temp_store: Literal['DEFAULT', 'FILE', 'MEMORY'] | None = None
+    busy_timeout: int | None = None
+
+
+class CacheSettingsModel(BaseModel):
+    """BaseModel for the result cache settings.
+
+    Attributes:
+        enabled: if set to True, the results of read commands are cached.
+        ttl: the number of seconds a cached result is valid.
+        max_size: the maximum size of the cache on disk, in bytes.
+        directory: the directory for the cache files.
+    """
+
+    model_config = ConfigDict(extra='forbid')
+
+    enabled: bool = False
+    ttl: int = 60
+    max_size: int = 16 * 1024 * 1024
+    directory: str = '~/.my_multitool_cache'
 
 
 class ContextModel(BaseModel):
@@ -22,6 +84,10 @@ class ContextModel(BaseModel):
         name: the name of the context.
         db_string: the database connection string for the context.
         warning: determines if a warning should be given
+        sqlite_profile: the named performance profile for SQLite databases.
+        sqlite_settings: SQLite settings that override the profile.
+        read_replicas: connection strings for read replicas of the database.
+            Commands that only read data use these instead of `db_string`.
     """
 
     # We disallow extra fields. This makes sure the user cannot specify
@@ -35,6 +101,9 @@ class ContextModel(BaseModel):
     service_user: str | None = None
     service_pass: str | None = None
     root_user: str | None = None
+    sqlite_profile: SQLiteProfile = SQLiteProfile.DEFAULT
+    sqlite_settings: SQLiteSettingsModel = SQLiteSettingsModel()
+    read_replicas: list[str] = []
 
     @property
     def db_string_with_masked_pwd(self) -> str:
@@ -48,9 +117,7 @@ class ContextModel(BaseModel):
         Returns:
             The DB string without the password.
         """
-        return re.sub(
-            r'//(\S+):(\S+)@', lambda x: f'//{x.group(1)}:***@', self.db_string
-        )
+        return mask_password(self.db_string)
 
 
 class ConfigModel(BaseModel):
@@ -62,6 +129,10 @@ class ConfigModel(BaseModel):
     Attributes:
         active_context: the currently activated context.
         contexts: a list with configured contexts.
+        logging_level: the logging level for the application.
+        log_format: the format for log messages.
+        log_file: a file to write the log messages to, next to stderr.
+        cache: the settings for the result cache.
     """
 
     # We disallow extra fields. This makes sure the user cannot specify
@@ -72,6 +143,9 @@ class ConfigModel(BaseModel):
     active_context: str
     contexts: list[ContextModel] = []
     logging_level: int = 30
+    log_format: LogFormat = LogFormat.TEXT
+    log_file: str | None = None
+    cache: CacheSettingsModel = CacheSettingsModel()
 
 
 class ConfigManager:
@@ -132,7 +206,7 @@ class ConfigManager:
         """
         if self.config and self.yaml_file:
             with open(self.yaml_file, 'w', encoding='utf-8') as output_file:
-                yaml.dump(self.config.model_dump(), output_file)
+                yaml.dump(self.config.model_dump(mode='json'), output_file)
         else:
             raise NoConfigToSaveError('Configuration not set yet')
 
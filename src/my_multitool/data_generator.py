@@ -0,0 +1,363 @@
+"""Module with the generator for synthetic data.
+
+This module contains the `DataGenerator` that creates realistic users, API
+scopes and API tokens for load tests and benchmarks. The data is created from
+a seed, so the same seed always gives the same data. The records are created
+one at a time and written in batches, so large amounts of data don't have to
+fit in memory. The data can be written to the database of a context, or to a
+file in the format of `JSONDataSource` or as NDJSON records for
+`users import`.
+"""
+
+import json
+import random
+import string
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+from typing import Any, TextIO
+
+from my_model import APIScope, APIToken, APITokenScope, User, UserRole
+from sqlalchemy import Table, func, select
+from sqlalchemy.future import Engine
+
+from .records import batched
+from .streaming_copy import reset_sequences
+
+FIRST_NAMES = (
+    'Alice', 'Bram', 'Chloe', 'Daan', 'Emma', 'Finn', 'Greta', 'Hugo',
+    'Iris', 'Jasper', 'Julia', 'Lars', 'Lotte', 'Milan', 'Noah', 'Olivia',
+    'Pieter', 'Sara', 'Sem', 'Tess', 'Thomas', 'Vera', 'Willem', 'Zoe',
+)  # fmt: skip
+
+LAST_NAMES = (
+    'Bakker', 'Brouwer', 'de Boer', 'de Groot', 'de Jong', 'de Vries',
+    'Dekker', 'Jansen', 'Janssen', 'Meijer', 'Mulder', 'Peters', 'Smit',
+    'van den Berg', 'van der Meer', 'van Dijk', 'Visser', 'Vos', 'Willems',
+)  # fmt: skip
+
+EMAIL_DOMAINS = ('example.com', 'example.org', 'example.net')
+
+SCOPE_MODULES = ('users', 'tags', 'tokens', 'settings', 'notes', 'feeds')
+
+SCOPE_SUBJECTS = ('retrieve', 'create', 'update', 'delete')
+
+TOKEN_TITLES = (
+    'Mobile app', 'Laptop', 'Backup script', 'Home automation',
+    'Dashboard', 'CI pipeline', 'Sync service',
+)  # fmt: skip
+
+# The chance for a generated API token to be disabled
+DISABLED_TOKEN_CHANCE = 0.1
+
+# The maximum number of API scopes per API token
+MAX_TOKEN_SCOPES = 3
+
+SCOPE_TABLE: Table = APIScope.__table__  # type: ignore
+USER_TABLE: Table = User.__table__  # type: ignore
+TOKEN_TABLE: Table = APIToken.__table__  # type: ignore
+TOKEN_SCOPE_TABLE: Table = APITokenScope.__table__  # type: ignore
+
+
+class DataGenerator:
+    """Generator for synthetic users, API scopes and API tokens.
+
+    The records are dictionaries in the format of `JSONDataSource`: the API
+    tokens are in the `_api_tokens` field of their user. All records have an
+    ID, so the API tokens can be linked to the API scopes. The IDs start at
+    `start_id` for every table.
+
+    Attributes:
+        users: the number of users.
+        scopes: the number of API scopes.
+        tokens: the number of API tokens, divided over the users.
+        seed: the seed for the random data.
+        start_id: the first ID for the records.
+        root_share: the chance for a user to get the `root` role; the other
+            users get the `user` role.
+    """
+
+    def __init__(
+        self,
+        users: int,
+        scopes: int = 0,
+        tokens: int = 0,
+        seed: int = 0,
+        start_id: int = 1,
+        root_share: float = 0.0,
+    ) -> None:
+        """Set the parameters for the generator.
+
+        Args:
+            users: the number of users.
+            scopes: the number of API scopes.
+            tokens: the number of API tokens, divided over the users.
+            seed: the seed for the random data.
+            start_id: the first ID for the records.
+            root_share: the chance for a user to get the `root` role; the
+                other users get the `user` role.
+        """
+        self.users = users
+        self.scopes = scopes
+        self.tokens = tokens
+        self.seed = seed
+        self.start_id = start_id
+        self.root_share = root_share
+
+    def iter_scopes(self) -> Iterator[dict[str, Any]]:
+        """Create the API scopes.
+
+        Yields:
+            The records for the API scopes.
+        """
+        combinations = len(SCOPE_MODULES) * len(SCOPE_SUBJECTS)
+        for number in range(self.scopes):
+            module = SCOPE_MODULES[number % len(SCOPE_MODULES)]
+            if number >= combinations:
+                module = f'{module}{number // combinations}'
+            yield {
+                'id': self.start_id + number,
+                'module': module,
+                'subject': SCOPE_SUBJECTS[
+                    number // len(SCOPE_MODULES) % len(SCOPE_SUBJECTS)
+                ],
+            }
+
+    def _token_counts(self) -> list[int]:
+        """Divide the API tokens over the users.
+
+        Returns:
+            The number of API tokens for every user.
+        """
+        counts = [0] * self.users
+        if self.users:
+            rng = random.Random(self.seed + 1)
+            for _ in range(self.tokens):
+                counts[rng.randrange(self.users)] += 1
+        return counts
+
+    def iter_users(self) -> Iterator[dict[str, Any]]:
+        """Create the users with their API tokens.
+
+        Yields:
+            The records for the users.
+        """
+        rng = random.Random(self.seed)
+        token_id = self.start_id
+        for number, token_count in enumerate(self._token_counts()):
+            user_id = self.start_id + number
+            first_name = rng.choice(FIRST_NAMES)
+            last_name = rng.choice(LAST_NAMES)
+            name = f'{first_name}.{last_name}'.lower().replace(' ', '')
+            tokens = []
+            for _ in range(token_count):
+                tokens.append(
+                    {
+                        'id': token_id,
+                        'title': rng.choice(TOKEN_TITLES),
+                        'token': ''.join(
+                            rng.choices(
+                                string.ascii_letters + string.digits, k=32
+                            )
+                        ),
+                        'enabled': rng.random() >= DISABLED_TOKEN_CHANCE,
+                    }
+                )
+                token_id += 1
+            yield {
+                'id': user_id,
+                'fullname': f'{first_name} {last_name}',
+                'username': f'{name}.{user_id}',
+                'email': f'{name}.{user_id}@{rng.choice(EMAIL_DOMAINS)}',
+                'role': (
+                    UserRole.ROOT.value
+                    if rng.random() < self.root_share
+                    else UserRole.USER.value
+                ),
+                '_api_tokens': tokens,
+            }
+
+    def iter_token_scopes(self) -> Iterator[dict[str, Any]]:
+        """Create the links between the API tokens and API scopes.
+
+        Every API token gets one or more API scopes, if there are API scopes.
+
+        Yields:
+            The records for the links.
+        """
+        if not self.scopes:
+            return
+        rng = random.Random(self.seed + 2)
+        for number in range(self.tokens):
+            scopes = rng.sample(
+                range(self.scopes),
+                rng.randint(1, min(MAX_TOKEN_SCOPES, self.scopes)),
+            )
+            for scope in sorted(scopes):
+                yield {
+                    'api_token_id': self.start_id + number,
+                    'api_scope_id': self.start_id + scope,
+                }
+
+
+def _write_json_array(file: TextIO, records: Iterator[dict[str, Any]]) -> int:
+    """Write records as a JSON array, one record per line.
+
+    Args:
+        file: the file to write to.
+        records: the records to write.
+
+    Returns:
+        The number of records.
+    """
+    count = 0
+    file.write('[')
+    for count, record in enumerate(records, start=1):
+        file.write(',\n' if count > 1 else '\n')
+        file.write(json.dumps(record))
+    file.write('\n]' if count else ']')
+    return count
+
+
+def write_json(generator: DataGenerator, file: TextIO) -> dict[str, int]:
+    """Write the data to a file in the format of `JSONDataSource`.
+
+    The records are written while they are created, so the data never has
+    to fit in memory.
+
+    Args:
+        generator: the generator for the data.
+        file: the file to write to.
+
+    Returns:
+        The number of records per table.
+    """
+    written = {}
+    file.write('{\n"api_scopes": ')
+    written[SCOPE_TABLE.name] = _write_json_array(
+        file, generator.iter_scopes()
+    )
+    file.write(',\n"users": ')
+    written[USER_TABLE.name] = _write_json_array(file, generator.iter_users())
+    written[TOKEN_TABLE.name] = generator.tokens
+    file.write(',\n"api_token_scopes": ')
+    written[TOKEN_SCOPE_TABLE.name] = _write_json_array(
+        file, generator.iter_token_scopes()
+    )
+    file.write('\n}\n')
+    return written
+
+
+def write_ndjson(generator: DataGenerator, file: TextIO) -> dict[str, int]:
+    """Write the users to a file as NDJSON records for `users import`.
+
+    API scopes and API tokens cannot be imported with `users import`, so
+    only the users are written.
+
+    Args:
+        generator: the generator for the data.
+        file: the file to write to.
+
+    Returns:
+        The number of records per table.
+    """
+    count = 0
+    for user in generator.iter_users():
+        record = {
+            'fullname': user['fullname'],
+            'username': user['username'],
+            'email': user['email'],
+            'role': UserRole(user['role']).name.lower(),
+        }
+        file.write(json.dumps(record) + '\n')
+        count += 1
+    return {USER_TABLE.name: count}
+
+
+def get_start_id(engine: Engine) -> int:
+    """Get a ID that is not used yet by the generated tables.
+
+    Args:
+        engine: the engine for the database.
+
+    Returns:
+        The highest ID in the tables for users, API scopes and API tokens,
+        plus one.
+    """
+    with engine.connect() as connection:
+        highest = [
+            connection.execute(select(func.max(table.c.id))).scalar() or 0
+            for table in (USER_TABLE, SCOPE_TABLE, TOKEN_TABLE)
+        ]
+    return max(highest) + 1
+
+
+def insert_data(
+    engine: Engine, generator: DataGenerator, batch_size: int = 1000
+) -> dict[str, int]:
+    """Insert the data in a database.
+
+    The records are inserted in batches and every batch is inserted in its
+    own transaction. The tables are filled in the order of their foreign
+    keys.
+
+    Args:
+        engine: the engine for the database.
+        generator: the generator for the data.
+        batch_size: the number of records per batch.
+
+    Returns:
+        The number of inserted rows per table.
+    """
+    # The models store the times in UTC, without a time zone
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    timestamps = {'created': now, 'updated': now}
+    inserted = {
+        table.name: 0
+        for table in (SCOPE_TABLE, USER_TABLE, TOKEN_TABLE, TOKEN_SCOPE_TABLE)
+    }
+
+    for batch in batched(generator.iter_scopes(), batch_size):
+        with engine.begin() as connection:
+            connection.execute(
+                SCOPE_TABLE.insert(),
+                [{**scope, **timestamps} for scope in batch],
+            )
+        inserted[SCOPE_TABLE.name] += len(batch)
+
+    for batch in batched(generator.iter_users(), batch_size):
+        users = []
+        tokens = []
+        for user in batch:
+            for token in user.pop('_api_tokens'):
+                tokens.append(
+                    {
+                        **token,
+                        **timestamps,
+                        'user_id': user['id'],
+                        'expires': now + timedelta(days=365),
+                    }
+                )
+            users.append(
+                {
+                    **user,
+                    **timestamps,
+                    'role': UserRole(user['role']),
+                    'password_date': now,
+                }
+            )
+        with engine.begin() as connection:
+            connection.execute(USER_TABLE.insert(), users)
+            if tokens:
+                connection.execute(TOKEN_TABLE.insert(), tokens)
+        inserted[USER_TABLE.name] += len(users)
+        inserted[TOKEN_TABLE.name] += len(tokens)
+
+    for batch in batched(generator.iter_token_scopes(), batch_size):
+        with engine.begin() as connection:
+            connection.execute(TOKEN_SCOPE_TABLE.insert(), batch)
+        inserted[TOKEN_SCOPE_TABLE.name] += len(batch)
+
+    if engine.dialect.name == 'postgresql':
+        with engine.begin() as connection:
+            reset_sequences(connection, [SCOPE_TABLE, USER_TABLE, TOKEN_TABLE])
+    return inserted
@@ -30,3 +30,23 @@ class NoConfirmationError(MyMultitoolError):
 
 class SQLError(MyMultitoolError):
     """Exception for a SQL error."""
+
+
+class UnsupportedDialectError(MyMultitoolError):
+    """Exception for a database dialect that is not supported."""
+
+
+class InvalidImportDataError(MyMultitoolError):
+    """Exception for import data that cannot be written to the database."""
+
+
+class InvalidRecordsError(MyMultitoolError):
+    """Exception for a file with records that cannot be read."""
+
+
+class BenchmarkSuiteError(MyMultitoolError):
+    """Exception for a benchmark suite that cannot run or compare."""
+
+
+class UnsafeSchemaChangeError(MyMultitoolError):
+    """Exception for a schema change that cannot be applied safely."""
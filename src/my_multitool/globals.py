@@ -5,26 +5,85 @@ Contains the global objects for the package.
 
 from typing import Any, Optional
 
+from my_data.exceptions import UnknownUserAccountError
 from my_data.my_data import MyData
+from my_model import User
+from sqlalchemy.engine import make_url
 
-from .config import ConfigManager
+from .config import ConfigManager, ContextModel
+from .exceptions import GenericCLIError
+from .models import Intent
+from .replicas import CONNECT_TIMEOUT, get_connect_args, replica_selector
+from .sqlite_tuning import apply_sqlite_pragmas, get_sqlite_pragmas
+from .timings import timings
 
 config = ConfigManager()
 
 
+def _configure_my_data(
+    context: ContextModel,
+    db_string: str,
+    db_args: Optional[dict[str, Any]] = None,
+) -> MyData:
+    """Create a MyData object for a database of a context.
+
+    Args:
+        context: the context of the database.
+        db_string: the connection string for the database.
+        db_args: additional arguments for the database connection.
+
+    Returns:
+        A MyData object.
+    """
+    data = MyData()
+    url = make_url(db_string)
+    if db_string != context.db_string:
+        # Don't wait long for replicas; the next replica can be used instead
+        db_args = dict(db_args or {})
+        db_args['connect_args'] = {
+            **db_args.get('connect_args', {}),
+            **get_connect_args(url, CONNECT_TIMEOUT),
+        }
+    data.configure(
+        db_connection_str=db_string,
+        database_args=db_args,
+        service_username=context.service_user,
+        service_password=context.service_pass,
+    )
+
+    # Apply the SQLite tuning for the context. Creating the engine doesn't
+    # connect to the database yet, so the pragmas are set on every connection
+    # that is created later.
+    if url.get_backend_name() == 'sqlite':
+        pragmas = get_sqlite_pragmas(
+            context.sqlite_profile, context.sqlite_settings
+        )
+        if pragmas:
+            data.create_engine()
+            if data.database_engine:
+                apply_sqlite_pragmas(data.database_engine, pragmas)
+    return data
+
+
 def get_my_data_object_for_context(
     context_name: Optional[str] = None,
     db_args: Optional[dict[str, Any]] = None,
+    intent: Intent = Intent.WRITE,
 ) -> MyData:
     """Get a configured MyData object for a specific context.
 
     Returns a MyData object with the correct configuration for the given
-    context.
+    context. Commands that only read data can use a read replica of the
+    context, if the context has read replicas. The engine for a replica
+    connects to it first, unless it could be reached recently. When that
+    fails, the next replica or the primary database is used.
 
     Args:
         context_name: the name of the context to use. If not given, the active
             context will be used.
         db_args: additional arguments for the database connection.
+        intent: whether the command reads or writes data. For `read`, a read
+            replica is used when the context has one.
 
     Returns:
         A MyData object.
@@ -32,14 +91,78 @@ def get_my_data_object_for_context(
     if not context_name:
         context_name = config.active_context.name
 
-    data = MyData()
-    context = config.contexts[context_name]
+    with timings.phase('MyData configure'):
+        context = config.contexts[context_name]
+        db_string = replica_selector.select(context, intent)
+        for _ in context.read_replicas:
+            if db_string == context.db_string:
+                break
+            data = _configure_my_data(context, db_string, db_args)
+            data.create_engine()
+            if data.database_engine and replica_selector.connect(
+                data.database_engine, db_string
+            ):
+                return data
+            if data.database_engine:
+                data.database_engine.dispose()
+            db_string = replica_selector.select(context, intent)
+        else:
+            db_string = context.db_string
+        return _configure_my_data(context, db_string, db_args)
 
-    data.configure(
-        db_connection_str=context.db_string,
-        database_args=db_args,
-        service_username=context.service_user,
-        service_password=context.service_pass,
-    )
 
-    return data
+def check_context_credentials() -> None:
+    """Check that the active context has credentials and a root user.
+
+    Only the configuration is checked; the database is not used.
+
+    Raises:
+        GenericCLIError: when no Service user, password or root user is set
+            in the active context.
+    """
+    if any(
+        (
+            config.active_context.service_user is None,
+            config.active_context.service_pass is None,
+            config.active_context.root_user is None,
+        )
+    ):
+        raise GenericCLIError(
+            'Service user credentials or root user not set in active context'
+        )
+
+
+def get_root_user_for_context(data: MyData) -> User:
+    """Get the root user for the active context.
+
+    Uses the service user of the active context to retrieve the User object
+    for the configured root user. This User object can be used to create a
+    context for user management.
+
+    Args:
+        data: the MyData object for the active context.
+
+    Raises:
+        GenericCLIError: when no Service user, password or root user is set
+            in the active context, or when the root user does not exist.
+
+    Returns:
+        The User object for the root user.
+    """
+    check_context_credentials()
+
+    # Creating the context verifies the password of the service user, which
+    # is a deliberately slow hash.
+    with timings.phase('password hashing'):
+        service_context = data.get_context_for_service_user()
+
+    with service_context as context:
+        try:
+            user = context.get_user_account_by_username(
+                str(config.active_context.root_user)
+            )
+        except UnknownUserAccountError as exc:
+            raise GenericCLIError(
+                f'Unknown root user: "{config.active_context.root_user}"'
+            ) from exc
+    return user
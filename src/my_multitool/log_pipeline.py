@@ -0,0 +1,229 @@
+"""Module with the logging pipeline for the application.
+
+Log messages are not formatted and written in the thread that logs them.
+Instead, the `QueueHandler` on the root logger puts the records on a queue and
+a `QueueListener` formats and writes them in a separate thread. This keeps
+verbose logging from slowing down bulk operations, like imports. Messages can
+be written as text for humans or as JSON for log collectors, and optionally
+to a log file next to stderr.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from os.path import expanduser
+from queue import SimpleQueue
+from typing import Any
+
+from pydantic import BaseModel
+
+from .models import LogFormat
+from .style import is_terminal
+
+# The format for text messages in log files and when stderr is not a terminal
+TEXT_FORMAT = '[%(asctime)s] %(levelname)-8s %(name)s: %(message)s'
+
+# The attributes of every log record. Other attributes are added with the
+# `extra` argument and are included in JSON messages.
+RECORD_ATTRIBUTES = set(
+    vars(logging.LogRecord('', 0, '', 0, '', None, None))
+) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """Formatter for log records as JSON objects on a single line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format a log record as JSON.
+
+        Args:
+            record: the log record.
+
+        Returns:
+            The JSON object with the time, level, logger and message, the
+            exception if there is one and the extra fields of the record.
+        """
+        entry: dict[str, Any] = {
+            'time': datetime.fromtimestamp(
+                record.created, tz=timezone.utc
+            ).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+class MessageQueueHandler(QueueHandler):
+    """Handler that puts log records on a queue without formatting them.
+
+    The default `QueueHandler` formats the record before it is put on the
+    queue. Here, only the arguments are merged into the message, since they
+    may change after the call; the formatting is left to the listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Prepare a record for the queue.
+
+        Args:
+            record: the log record.
+
+        Returns:
+            A copy of the record with the arguments merged into the message.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _get_console_handler(log_format: LogFormat) -> logging.Handler:
+    """Get the handler for log messages on stderr.
+
+    Args:
+        log_format: the format for the messages.
+
+    Returns:
+        The handler. For text messages on a terminal, Rich is used.
+    """
+    if log_format == LogFormat.TEXT and is_terminal(sys.stderr):
+        from rich.logging import RichHandler
+
+        return RichHandler()
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(
+        JSONFormatter()
+        if log_format == LogFormat.JSON
+        else logging.Formatter(TEXT_FORMAT, datefmt='%X')
+    )
+    return handler
+
+
+def _get_file_handler(log_format: LogFormat, log_file: str) -> logging.Handler:
+    """Get the handler for log messages in a file.
+
+    Args:
+        log_format: the format for the messages.
+        log_file: the file to append the messages to.
+
+    Returns:
+        The handler.
+    """
+    handler = logging.FileHandler(expanduser(log_file), encoding='utf-8')
+    handler.setFormatter(
+        JSONFormatter()
+        if log_format == LogFormat.JSON
+        else logging.Formatter(TEXT_FORMAT)
+    )
+    return handler
+
+
+class LogSettings(BaseModel):
+    """The settings of a running log pipeline.
+
+    Attributes:
+        level: the logging level for the application.
+        log_format: the format for the messages.
+        log_file: a file to write the messages to, next to stderr.
+    """
+
+    level: int
+    log_format: LogFormat = LogFormat.TEXT
+    log_file: str | None = None
+
+
+class LogPipeline:
+    """The queue, handlers and listener for the log messages.
+
+    Attributes:
+        handler: the handler on the root logger.
+        listener: the listener that writes the messages.
+        settings: the settings of the running pipeline, or None when it is
+            not running.
+    """
+
+    def __init__(self) -> None:
+        """Set the defaults for the pipeline."""
+        self.handler: QueueHandler | None = None
+        self.listener: QueueListener | None = None
+        self.settings: LogSettings | None = None
+        self._previous_level = logging.WARNING
+
+    def start(
+        self,
+        level: int,
+        log_format: LogFormat = LogFormat.TEXT,
+        log_file: str | None = None,
+    ) -> None:
+        """Start writing log messages.
+
+        A running pipeline is stopped first, so this can be used to change
+        the settings.
+
+        Args:
+            level: the logging level for the application.
+            log_format: the format for the messages.
+            log_file: a file to write the messages to, next to stderr.
+        """
+        self.stop()
+        handlers = [_get_console_handler(log_format)]
+        if log_file:
+            handlers.append(_get_file_handler(log_format, log_file))
+
+        queue: SimpleQueue[logging.LogRecord] = SimpleQueue()
+        self.handler = MessageQueueHandler(queue)
+        self.listener = QueueListener(queue, *handlers)
+        root_logger = logging.getLogger()
+        self._previous_level = root_logger.level
+        root_logger.setLevel(level)
+        root_logger.addHandler(self.handler)
+        self.listener.start()
+        self.settings = LogSettings(
+            level=level, log_format=log_format, log_file=log_file
+        )
+
+    def restore(self, settings: LogSettings | None) -> None:
+        """Start the pipeline with earlier settings.
+
+        Is used to undo the settings for a single command, so messages that
+        are logged after the command are written again.
+
+        Args:
+            settings: the earlier settings of the pipeline. When None, the
+                pipeline is stopped.
+        """
+        if settings is None:
+            self.stop()
+            return
+        self.start(settings.level, settings.log_format, settings.log_file)
+
+    def stop(self) -> None:
+        """Write the remaining messages and stop the pipeline.
+
+        The logging level of the root logger is set back to the level from
+        before the pipeline was started.
+        """
+        if self.handler:
+            root_logger = logging.getLogger()
+            root_logger.removeHandler(self.handler)
+            root_logger.setLevel(self._previous_level)
+            self.handler = None
+        if self.listener:
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+            self.listener = None
+        self.settings = None
+
+
+log_pipeline = LogPipeline()
+atexit.register(log_pipeline.stop)
@@ -0,0 +1,258 @@
+"""Module with the memory profile for commands.
+
+This module contains the `MemoryProfiler`. It uses `tracemalloc` to trace the
+memory that is allocated by Python while a command runs. It reports the peak
+memory of the command, the memory that is allocated per phase (like loading
+the configuration, loading data and rendering) and the lines of code that
+hold the most memory. The phases are the phases of the `PhaseRecorder`.
+
+Tracing memory makes the command slower, so timings that are recorded at the
+same time are not representative.
+"""
+
+import threading
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from pydantic import BaseModel
+
+from .timings import PHASES, timings
+
+# The number of allocation sites in the report
+ALLOCATION_SITES = 10
+
+# The growth of the traced memory after which the allocation sites are
+# determined again. Determining the sites takes time, so it is only done when
+# the memory has grown noticeably since the last time.
+SNAPSHOT_GROWTH = 1.25
+
+# Files with allocations that are not caused by the application
+IGNORED_FILES = (
+    tracemalloc.__file__,
+    '<frozen importlib._bootstrap>',
+    '<frozen importlib._bootstrap_external>',
+    '<unknown>',
+)
+
+
+class PhaseMemory(BaseModel):
+    """The memory for a phase.
+
+    Attributes:
+        name: the name of the phase.
+        count: the number of times the phase was recorded.
+        allocated_bytes: the memory that was allocated and not freed in the
+            phase, for all times together. Negative when the phase freed more
+            memory than it allocated.
+        peak_bytes: the highest memory use during the phase, above the memory
+            use at the start of the phase.
+    """
+
+    name: str
+    count: int
+    allocated_bytes: int
+    peak_bytes: int
+
+
+class AllocationSite(BaseModel):
+    """A line of code that holds memory.
+
+    Attributes:
+        location: the file and line number.
+        size_bytes: the memory held by the allocations of the line.
+        count: the number of allocations of the line.
+    """
+
+    location: str
+    size_bytes: int
+    count: int
+
+
+class MemoryReport(BaseModel):
+    """The report with the memory use of a command.
+
+    Attributes:
+        current_bytes: the traced memory when the report was created.
+        peak_bytes: the highest traced memory during the command.
+        sites_bytes: the traced memory at the moment the allocation sites
+            were determined; the highest memory use at the end of a phase.
+        phases: the memory per phase.
+        allocation_sites: the lines of code that held the most memory at
+            that moment.
+    """
+
+    current_bytes: int
+    peak_bytes: int
+    sites_bytes: int
+    phases: list[PhaseMemory]
+    allocation_sites: list[AllocationSite]
+
+
+class _OpenPhase:
+    """A phase that is running, with the memory use at its start.
+
+    Attributes:
+        start: the traced memory at the start of the phase.
+        peak: the highest traced memory during the phase so far.
+    """
+
+    def __init__(self, start: int) -> None:
+        """Set the memory use at the start of the phase.
+
+        Args:
+            start: the traced memory at the start of the phase.
+        """
+        self.start = start
+        self.peak = start
+
+
+class MemoryProfiler:
+    """Profiler for the memory use of a command.
+
+    `tracemalloc` only keeps one peak. To find the peak per phase, the peak
+    is added to all running phases and reset at the start and end of every
+    phase.
+
+    Attributes:
+        enabled: if set to True, the memory is traced.
+        peak: the highest traced memory so far.
+        phases: the memory per phase.
+        sites: the lines of code that held the most memory at the moment of
+            the highest memory use at the end of a phase.
+        sites_bytes: the traced memory at that moment.
+    """
+
+    def __init__(self) -> None:
+        """Set the defaults for the profiler."""
+        self.enabled = False
+        self.peak = 0
+        self.phases: dict[str, PhaseMemory] = {}
+        self.sites: list[AllocationSite] = []
+        self.sites_bytes = 0
+        self._open: list[_OpenPhase] = []
+        self._lock = threading.Lock()
+        self._started_tracing = False
+
+    def start(self) -> None:
+        """Start tracing memory and measuring the phases."""
+        if self.enabled:
+            return
+        self.enabled = True
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        tracemalloc.reset_peak()
+        timings.phase_wrappers.append(self.phase)
+
+    def stop(self) -> None:
+        """Stop tracing memory and clear the measurements."""
+        if self.enabled:
+            timings.phase_wrappers.remove(self.phase)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self.enabled = False
+        self.peak = 0
+        self.phases = {}
+        self.sites = []
+        self.sites_bytes = 0
+        self._open = []
+
+    def _update_peak(self) -> int:
+        """Add the peak of `tracemalloc` to the running phases and reset it.
+
+        Returns:
+            The traced memory at this moment.
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        self.peak = max(self.peak, peak)
+        for open_phase in self._open:
+            open_phase.peak = max(open_phase.peak, peak)
+        tracemalloc.reset_peak()
+        return current
+
+    def _update_sites(self, current: int) -> None:
+        """Determine the lines of code that hold the most memory.
+
+        Args:
+            current: the traced memory at this moment.
+        """
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, filename) for filename in IGNORED_FILES]
+        )
+        self.sites = [
+            AllocationSite(
+                location=f'{statistic.traceback[0].filename}:'
+                + f'{statistic.traceback[0].lineno}',
+                size_bytes=statistic.size,
+                count=statistic.count,
+            )
+            for statistic in snapshot.statistics('lineno')[:ALLOCATION_SITES]
+        ]
+        self.sites_bytes = current
+        del snapshot
+        # The snapshot itself is traced as well; it should not count as a
+        # peak of the command.
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Measure the memory of a phase.
+
+        Args:
+            name: the name of the phase.
+
+        Yields:
+            Nothing; the memory of the code in the `with` block is measured.
+        """
+        if not self.enabled:
+            yield
+            return
+        with self._lock:
+            open_phase = _OpenPhase(self._update_peak())
+            self._open.append(open_phase)
+        try:
+            yield
+        finally:
+            with self._lock:
+                end = self._update_peak()
+                self._open.remove(open_phase)
+                total = self.phases.get(name)
+                if total is None:
+                    total = PhaseMemory(
+                        name=name, count=0, allocated_bytes=0, peak_bytes=0
+                    )
+                    self.phases[name] = total
+                total.count += 1
+                total.allocated_bytes += end - open_phase.start
+                total.peak_bytes = max(
+                    total.peak_bytes, open_phase.peak - open_phase.start
+                )
+                if end > self.sites_bytes * SNAPSHOT_GROWTH:
+                    self._update_sites(end)
+
+    def report(self) -> MemoryReport:
+        """Create a report with the memory use of the command.
+
+        Returns:
+            The report with the phases in the order of `PHASES`.
+        """
+        with self._lock:
+            current = self._update_peak()
+            if not self.sites:
+                self._update_sites(current)
+        order = {name: index for index, name in enumerate(PHASES)}
+        phases = sorted(
+            self.phases.values(), key=lambda x: order.get(x.name, len(PHASES))
+        )
+        return MemoryReport(
+            current_bytes=current,
+            peak_bytes=self.peak,
+            sites_bytes=self.sites_bytes,
+            phases=[phase.model_copy() for phase in phases],
+            allocation_sites=list(self.sites),
+        )
+
+
+memory_profiler = MemoryProfiler()
@@ -0,0 +1,472 @@
+"""Module with the metrics for commands.
+
+This module contains the `MetricsRecorder`. When a metrics file is given, it
+records the duration and exit code of the command, the number of SQL
+statements and connection pool checkouts, and the number of rows imported
+and exported per table. After the command, the totals are added to the
+totals of earlier commands and written to the metrics file in the Prometheus
+text format. The file can be read by the textfile collector of the Prometheus
+node exporter, or served with the `metrics serve` command.
+
+Scheduled commands can run at the same time, so the totals are updated while
+a lock on the metrics file is held.
+"""
+
+import json
+import logging
+import os
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from time import perf_counter, time
+from typing import Any
+
+import click
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.pool import Pool
+
+# The upper bounds in seconds for the buckets of the duration histogram
+DURATION_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+@contextmanager
+def lock_file(path: Path) -> Iterator[None]:
+    """Hold a exclusive lock on a file.
+
+    Waits until other processes release the lock. The file is created when
+    it doesn't exist.
+
+    Args:
+        path: the file to lock.
+
+    Yields:
+        Nothing; the lock is held in the `with` block.
+    """
+    with open(path, 'a+b') as locked_file:
+        if sys.platform == 'win32':  # pragma: no cover
+            import msvcrt
+
+            # Windows locks a byte range; `LK_LOCK` retries for 10 seconds
+            # before it gives up.
+            locked_file.seek(0)
+            msvcrt.locking(locked_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                locked_file.seek(0)
+                msvcrt.locking(locked_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(locked_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(locked_file.fileno(), fcntl.LOCK_UN)
+
+
+class CommandMetrics(BaseModel):
+    """The totals for a command over all runs.
+
+    Attributes:
+        runs: the number of runs per exit code.
+        buckets: the number of runs per bucket of `DURATION_BUCKETS`; every
+            run is counted in the first bucket it fits in.
+        duration_sum: the total duration of all runs in seconds.
+        queries: the total number of SQL statements.
+        pool_checkouts: the total number of connection pool checkouts.
+        last_exit_code: the exit code of the last run.
+        last_run: the Unix time of the end of the last run.
+    """
+
+    runs: dict[int, int] = {}
+    buckets: list[int] = [0] * (len(DURATION_BUCKETS) + 1)
+    duration_sum: float = 0.0
+    queries: int = 0
+    pool_checkouts: int = 0
+    last_exit_code: int = 0
+    last_run: float = 0.0
+
+
+class MetricsState(BaseModel):
+    """The totals for all commands.
+
+    Attributes:
+        commands: the totals per command, like `users list`.
+        rows: the number of rows per table and direction, like
+            `{'user': {'imported': 10}}`.
+    """
+
+    commands: dict[str, CommandMetrics] = {}
+    rows: dict[str, dict[str, int]] = {}
+
+
+def _label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def render_metrics(state: MetricsState) -> str:
+    """Render the metrics in the Prometheus text format.
+
+    Args:
+        state: the totals to render.
+
+    Returns:
+        The metrics as text.
+    """
+    families: list[tuple[str, str, str, list[str]]] = [
+        (
+            'my_multitool_command_duration_seconds',
+            'histogram',
+            'Duration of the commands.',
+            [],
+        ),
+        (
+            'my_multitool_command_runs_total',
+            'counter',
+            'Runs of the commands per exit code.',
+            [],
+        ),
+        (
+            'my_multitool_command_last_exit_code',
+            'gauge',
+            'Exit code of the last run of the commands.',
+            [],
+        ),
+        (
+            'my_multitool_command_last_run_timestamp_seconds',
+            'gauge',
+            'Time of the last run of the commands.',
+            [],
+        ),
+        (
+            'my_multitool_queries_total',
+            'counter',
+            'SQL statements executed by the commands.',
+            [],
+        ),
+        (
+            'my_multitool_pool_checkouts_total',
+            'counter',
+            'Connections taken from the connection pool by the commands.',
+            [],
+        ),
+        (
+            'my_multitool_rows_total',
+            'counter',
+            'Rows imported and exported per table.',
+            [],
+        ),
+    ]
+    samples = {name: lines for name, _, _, lines in families}
+
+    for command, totals in sorted(state.commands.items()):
+        label = f'command="{_label(command)}"'
+        histogram = samples['my_multitool_command_duration_seconds']
+        cumulative = 0
+        for bound, count in zip(
+            [*(f'{bound:g}' for bound in DURATION_BUCKETS), '+Inf'],
+            totals.buckets,
+        ):
+            cumulative += count
+            histogram.append(
+                'my_multitool_command_duration_seconds_bucket'
+                + f'{{{label},le="{bound}"}} {cumulative}'
+            )
+        histogram.append(
+            f'my_multitool_command_duration_seconds_sum{{{label}}} '
+            + f'{totals.duration_sum:.6f}'
+        )
+        histogram.append(
+            f'my_multitool_command_duration_seconds_count{{{label}}} '
+            + f'{cumulative}'
+        )
+        for exit_code, runs in sorted(totals.runs.items()):
+            samples['my_multitool_command_runs_total'].append(
+                'my_multitool_command_runs_total'
+                + f'{{{label},exit_code="{exit_code}"}} {runs}'
+            )
+        for name, value in (
+            ('my_multitool_command_last_exit_code', totals.last_exit_code),
+            (
+                'my_multitool_command_last_run_timestamp_seconds',
+                f'{totals.last_run:.3f}',
+            ),
+            ('my_multitool_queries_total', totals.queries),
+            ('my_multitool_pool_checkouts_total', totals.pool_checkouts),
+        ):
+            samples[name].append(f'{name}{{{label}}} {value}')
+
+    for table, directions in sorted(state.rows.items()):
+        for direction, rows in sorted(directions.items()):
+            samples['my_multitool_rows_total'].append(
+                f'my_multitool_rows_total{{table="{_label(table)}",'
+                + f'direction="{direction}"}} {rows}'
+            )
+
+    lines = []
+    for name, metric_type, help_text, family_samples in families:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        lines.extend(family_samples)
+    return '\n'.join(lines) + '\n'
+
+
+def get_command_name(command: click.Command, arguments: list[str]) -> str:
+    """Get the name of the command that is invoked.
+
+    The subcommands are looked up in the arguments for a group.
+
+    Args:
+        command: the group the arguments are for.
+        arguments: the arguments after the options of the group.
+
+    Returns:
+        The name of the command, like `users list`.
+    """
+    names = []
+    for argument in arguments:
+        if not isinstance(command, click.Group):
+            break
+        subcommand = command.commands.get(argument)
+        if subcommand:
+            names.append(argument)
+            command = subcommand
+    return ' '.join(names)
+
+
+class MetricsRecorder:
+    """Recorder for the metrics of a command.
+
+    Metrics are only recorded when the recorder is enabled. When enabled, the
+    recorder listens to the SQLAlchemy events of all engines and pools to
+    count the statements and pool checkouts.
+
+    Attributes:
+        enabled: if set to True, metrics are recorded.
+        path: the metrics file.
+        command: the name of the command.
+        origin: the moment the command started, from `perf_counter`.
+        queries: the number of SQL statements.
+        pool_checkouts: the number of connection pool checkouts.
+        rows: the number of rows per table and direction.
+    """
+
+    def __init__(self) -> None:
+        """Set the defaults for the recorder."""
+        self.enabled = False
+        self.path = Path()
+        self.command = ''
+        self.origin = perf_counter()
+        self.queries = 0
+        self.pool_checkouts = 0
+        self.rows: dict[str, dict[str, int]] = {}
+
+    def start(
+        self, path: str, command: str, origin: float | None = None
+    ) -> None:
+        """Enable the recorder.
+
+        Args:
+            path: the metrics file.
+            command: the name of the command.
+            origin: the moment the command started. When not given, the
+                current moment is used.
+        """
+        self.stop()
+        self.enabled = True
+        self.path = Path(path).expanduser()
+        self.command = command
+        self.origin = perf_counter() if origin is None else origin
+        event.listen(Engine, 'before_cursor_execute', self._count_query)
+        event.listen(Pool, 'checkout', self._count_checkout)
+
+    def stop(self) -> None:
+        """Disable the recorder and clear the recorded metrics."""
+        if self.enabled:
+            event.remove(Engine, 'before_cursor_execute', self._count_query)
+            event.remove(Pool, 'checkout', self._count_checkout)
+        self.enabled = False
+        self.queries = 0
+        self.pool_checkouts = 0
+        self.rows = {}
+
+    def _count_query(
+        self,
+        conn: Connection,
+        cursor: Any,  # noqa: ANN401
+        statement: str,
+        parameters: Any,  # noqa: ANN401
+        context: Any,  # noqa: ANN401
+        executemany: bool,
+    ) -> None:
+        self.queries += 1
+
+    def _count_checkout(
+        self,
+        dbapi_connection: Any,  # noqa: ANN401
+        connection_record: Any,  # noqa: ANN401
+        connection_proxy: Any,  # noqa: ANN401
+    ) -> None:
+        self.pool_checkouts += 1
+
+    def add_rows(self, table: str, direction: str, rows: int) -> None:
+        """Count rows that were imported or exported.
+
+        Args:
+            table: the name of the table.
+            direction: `imported` or `exported`.
+            rows: the number of rows.
+        """
+        if self.enabled:
+            directions = self.rows.setdefault(table, {})
+            directions[direction] = directions.get(direction, 0) + rows
+
+    @property
+    def state_path(self) -> Path:
+        """The file with the totals of earlier commands.
+
+        Returns:
+            The path; the name of the metrics file with `.json` added.
+        """
+        return self.path.with_name(f'{self.path.name}.json')
+
+    @property
+    def lock_path(self) -> Path:
+        """The file that is locked while the totals are updated.
+
+        Returns:
+            The path; the name of the metrics file with `.lock` added.
+        """
+        return self.path.with_name(f'{self.path.name}.lock')
+
+    def _load_state(self) -> MetricsState:
+        try:
+            return MetricsState.model_validate_json(
+                self.state_path.read_text(encoding='utf-8')
+            )
+        except (FileNotFoundError, ValidationError):
+            return MetricsState()
+
+    def _write(self, path: Path, content: str) -> None:
+        # Write to a temporary file first, so the collector never reads a
+        # partly written file.
+        temporary_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        temporary_path.write_text(content, encoding='utf-8')
+        os.replace(temporary_path, path)
+
+    def finish(self, exit_code: int) -> None:
+        """Add the metrics of the command to the metrics file.
+
+        Does nothing when the recorder is not enabled. The recorder is
+        stopped afterwards.
+
+        The totals are read, updated and written while the lock file is
+        locked, so commands that finish at the same time don't overwrite each
+        other's totals.
+
+        Args:
+            exit_code: the exit code of the command.
+        """
+        if not self.enabled:
+            return
+        duration = perf_counter() - self.origin
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with lock_file(self.lock_path):
+            state = self._add_totals(exit_code, duration)
+            self._write(self.state_path, json.dumps(state.model_dump()))
+            self._write(self.path, render_metrics(state))
+        self.stop()
+
+    def _add_totals(self, exit_code: int, duration: float) -> MetricsState:
+        """Add the metrics of the command to the totals of earlier commands.
+
+        Args:
+            exit_code: the exit code of the command.
+            duration: the duration of the command in seconds.
+
+        Returns:
+            The new totals.
+        """
+        state = self._load_state()
+        totals = state.commands.setdefault(self.command, CommandMetrics())
+        totals.runs[exit_code] = totals.runs.get(exit_code, 0) + 1
+        bucket = next(
+            (
+                index
+                for index, bound in enumerate(DURATION_BUCKETS)
+                if duration <= bound
+            ),
+            len(DURATION_BUCKETS),
+        )
+        totals.buckets[bucket] += 1
+        totals.duration_sum += duration
+        totals.queries += self.queries
+        totals.pool_checkouts += self.pool_checkouts
+        totals.last_exit_code = exit_code
+        totals.last_run = time()
+        for table, directions in self.rows.items():
+            table_rows = state.rows.setdefault(table, {})
+            for direction, rows in directions.items():
+                table_rows[direction] = table_rows.get(direction, 0) + rows
+        return state
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """HTTP server for a metrics file.
+
+    Attributes:
+        metrics_file: the metrics file to serve.
+    """
+
+    def __init__(self, metrics_file: str, host: str, port: int) -> None:
+        """Create the server.
+
+        Args:
+            metrics_file: the metrics file to serve.
+            host: the address to listen on.
+            port: the port to listen on; 0 picks a free port.
+        """
+        self.metrics_file = Path(metrics_file).expanduser()
+        super().__init__((host, port), MetricsRequestHandler)
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Handler for requests for the metrics.
+
+    Serves the metrics file on `/metrics`. When no command has written the
+    file yet, the response is empty.
+    """
+
+    server: MetricsServer
+
+    def do_GET(self) -> None:  # noqa: N802
+        """Send the metrics file."""
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        try:
+            content = self.server.metrics_file.read_bytes()
+        except FileNotFoundError:
+            content = b''
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: ANN401
+        """Log a request.
+
+        Args:
+            format: the format for the message.
+            args: the arguments for the message.
+        """
+        logging.getLogger('metrics-server').debug(format, *args)
+
+
+metrics = MetricsRecorder()
@@ -6,6 +6,18 @@ Contains moduls for the My Multitool application.
 from enum import Enum
 
 
+class DataFileFormat(str, Enum):
+    """Enum with the formats for files with generated data.
+
+    Will be used by the Typer app for the `database generate` command. JSON
+    files can be imported with `database import-json`, NDJSON files with
+    `users import`.
+    """
+
+    JSON = 'json'
+    NDJSON = 'ndjson'
+
+
 class LoggingLevel(str, Enum):
     """Enum with the specific debugging levels.
 
@@ -40,3 +52,108 @@ class LoggingLevel(str, Enum):
             'fatal': 50,
         }
         return levels.get(self.value, 10)
+
+
+class LogFormat(str, Enum):
+    """Enum with the formats for log messages.
+
+    Will be used by the Typer app to give the user a choice between log
+    messages for humans and structured log messages for log collectors.
+    """
+
+    TEXT = 'text'
+    JSON = 'json'
+
+
+class OnConflict(str, Enum):
+    """Enum with the strategies for conflicting records during an import.
+
+    Will be used by the Typer app to let the user choose what should happen
+    when a imported record already exists in the database.
+    """
+
+    FAIL = 'fail'
+    SKIP = 'skip'
+    UPDATE = 'update'
+
+
+class OutputFormat(str, Enum):
+    """Enum with the output formats for commands that display data.
+
+    Will be used by the Typer app to give the user a choice in how the data
+    should be displayed.
+    """
+
+    TABLE = 'table'
+    JSON = 'json'
+    NDJSON = 'ndjson'
+    CSV = 'csv'
+    TSV = 'tsv'
+
+
+class SQLiteProfile(str, Enum):
+    """Enum with the named performance profiles for SQLite contexts.
+
+    Will be used by the Typer app to give the user a choice in how a SQLite
+    database should be tuned. The `default` profile doesn't change any
+    settings.
+    """
+
+    DEFAULT = 'default'
+    SAFE = 'safe'
+    BULK_LOAD = 'bulk-load'
+
+
+class TraceFormat(str, Enum):
+    """Enum with the formats for trace files.
+
+    Will be used by the Typer app to give the user a choice between a trace
+    for Chrome and Perfetto, and a trace for OpenTelemetry tools.
+    """
+
+    CHROME = 'chrome'
+    OTLP = 'otlp'
+
+
+class UserRoleFilter(str, Enum):
+    """Enum with the user roles to filter on.
+
+    Will be used by the Typer app to let the user filter users on their role.
+    The names match the names of the `UserRole` enum in `my_model`.
+    """
+
+    ROOT = 'root'
+    SERVICE = 'service'
+    USER = 'user'
+
+
+class YesNo(str, Enum):
+    """Enum for options that are answered with yes or no.
+
+    Will be used by the Typer app for filters on properties that are either
+    set or not set.
+    """
+
+    YES = 'yes'
+    NO = 'no'
+
+
+class RecordFormat(str, Enum):
+    """Enum with the formats for files with records.
+
+    Will be used by the Typer app for commands that read records from a file
+    or from stdin.
+    """
+
+    CSV = 'csv'
+    NDJSON = 'ndjson'
+
+
+class Intent(str, Enum):
+    """Enum with the intent of a command.
+
+    Determines if a command can use a read replica of the database.
+    """
+
+    READ = 'read'
+    WRITE = 'write'
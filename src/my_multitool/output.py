@@ -0,0 +1,439 @@
+"""Module with the output writers for listing commands.
+
+This module contains the writers that commands use to display rows of data.
+The `table` format renders a Rich table when the output goes to a terminal and
+a plain-text table when it is piped or redirected. The other formats are meant
+for other tools: they bypass Rich and write every row to stdout as soon as it
+is given to the writer.
+"""
+
+import csv
+import json
+import sys
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Mapping
+from enum import Enum
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, Literal, TextIO
+
+from pydantic import BaseModel
+
+from .models import OutputFormat
+from .style import TimedConsole, get_table, is_terminal
+from .timings import timings
+
+if TYPE_CHECKING:  # pragma: no cover
+    from rich.table import Table
+
+
+class Column(BaseModel):
+    """A column for a writer.
+
+    Attributes:
+        key: the key of the column in the rows and in machine-readable
+            output.
+        title: the title of the column in tables.
+        width: a fixed width for the column in streamed tables.
+        table_format: a function to format the value for tables. When not
+            set, booleans are displayed as `Yes` or `No`.
+        justify: the alignment of the values in tables.
+    """
+
+    key: str
+    title: str
+    width: int | None = None
+    table_format: Callable[[Any], str] | None = None
+    justify: Literal['left', 'right'] = 'left'
+
+
+def _plain_value(value: Any) -> Any:  # noqa: ANN401
+    """Convert a value to a value for machine-readable output.
+
+    Args:
+        value: the value to convert.
+
+    Returns:
+        The name for enums; the value itself for other values.
+    """
+    if isinstance(value, Enum):
+        return value.name
+    return value
+
+
+def _table_value(column: Column, value: Any) -> str:  # noqa: ANN401
+    """Convert a value to the text for a table.
+
+    Args:
+        column: the column of the value.
+        value: the value to convert.
+
+    Returns:
+        The text to display in the table.
+    """
+    if column.table_format:
+        return column.table_format(value)
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'Yes' if value else 'No'
+    return str(value)
+
+
+class OutputWriter(ABC):
+    """Baseclass for the writers.
+
+    Writers can be used as context manager; the writer is closed when the
+    context is exited.
+
+    Attributes:
+        columns: the columns to write.
+    """
+
+    def __init__(self, columns: list[Column]) -> None:
+        """Set the columns for the writer.
+
+        Args:
+            columns: the columns to write.
+        """
+        self.columns = columns
+
+    def __enter__(self) -> 'OutputWriter':
+        """Enter the context.
+
+        Returns:
+            The writer itself.
+        """
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the writer when the context is exited.
+
+        Args:
+            exc_type: the type of the exception, if one was raised.
+            exc_value: the exception, if one was raised.
+            traceback: the traceback, if a exception was raised.
+        """
+        self.close()
+
+    @abstractmethod
+    def write_row(self, row: Mapping[Any, Any]) -> None:
+        """Write a row.
+
+        Args:
+            row: the values for the row, keyed by the key of the columns.
+        """
+
+    def flush(self) -> None:  # noqa: B027
+        """Flush the rows that are written so far.
+
+        Writers that don't buffer rows don't have to implement this.
+        """
+
+    def close(self) -> None:  # noqa: B027
+        """Finish the output.
+
+        Writers that don't have to finish the output don't have to implement
+        this.
+        """
+
+
+class TableWriter(OutputWriter):
+    """Writer for Rich tables.
+
+    When `stream` is set, every `flush` prints the rows so far and starts a
+    new table without a header. The columns then get their fixed width, so
+    the tables line up.
+    """
+
+    def __init__(
+        self,
+        columns: list[Column],
+        stream: bool = False,
+        title: str | None = None,
+        stderr: bool = False,
+    ) -> None:
+        """Set the columns for the writer.
+
+        Args:
+            columns: the columns to write.
+            stream: if set to True, the rows are printed on every flush.
+            title: the title above the table.
+            stderr: if set to True, the table is printed to stderr.
+        """
+        super().__init__(columns)
+        self.stream = stream
+        self.title = title
+        self._console = TimedConsole(stderr=stderr)
+        self._printed = False
+        self._table = self._create_table()
+
+    def _create_table(self) -> 'Table':
+        table = get_table()
+        table.title = None if self._printed else self.title
+        table.show_header = not self._printed
+        table.show_edge = not self.stream
+        for column in self.columns:
+            table.add_column(
+                column.title,
+                width=column.width if self.stream else None,
+                justify=column.justify,
+            )
+        return table
+
+    def write_row(self, row: Mapping[Any, Any]) -> None:
+        """Add a row to the table.
+
+        Args:
+            row: the values for the row, keyed by the key of the columns.
+        """
+        self._table.add_row(
+            *(
+                _table_value(column, row.get(column.key))
+                for column in self.columns
+            )
+        )
+
+    def _print(self) -> None:
+        self._console.print(self._table)
+        self._printed = True
+        self._table = self._create_table()
+
+    def flush(self) -> None:
+        """Print the rows so far when streaming."""
+        if self.stream and self._table.row_count:
+            self._print()
+
+    def close(self) -> None:
+        """Print the remaining rows.
+
+        A table without rows is only printed when nothing was printed yet, so
+        the user still sees the header.
+        """
+        if self._table.row_count or not self._printed:
+            self._print()
+
+
+class StreamWriter(OutputWriter):
+    """Baseclass for writers that write to stdout directly."""
+
+    def __init__(
+        self, columns: list[Column], stream: TextIO | None = None
+    ) -> None:
+        """Set the columns and the stream for the writer.
+
+        Args:
+            columns: the columns to write.
+            stream: the stream to write to. Defaults to stdout.
+        """
+        super().__init__(columns)
+        self.output = stream or sys.stdout
+
+    def _plain_row(self, row: Mapping[Any, Any]) -> dict[str, Any]:
+        return {
+            column.key: _plain_value(row.get(column.key))
+            for column in self.columns
+        }
+
+    def flush(self) -> None:
+        """Flush the stream."""
+        self.output.flush()
+
+    def close(self) -> None:
+        """Flush the stream."""
+        self.flush()
+
+
+class JSONWriter(StreamWriter):
+    """Writer for a JSON array with a object per row."""
+
+    def __init__(
+        self, columns: list[Column], stream: TextIO | None = None
+    ) -> None:
+        """Set the columns and the stream for the writer.
+
+        Args:
+            columns: the columns to write.
+            stream: the stream to write to. Defaults to stdout.
+        """
+        super().__init__(columns, stream)
+        self._rows = 0
+        self.output.write('[')
+
+    def write_row(self, row: Mapping[Any, Any]) -> None:
+        """Write a row as JSON object.
+
+        Args:
+            row: the values for the row, keyed by the key of the columns.
+        """
+        self.output.write('\n' if self._rows == 0 else ',\n')
+        self.output.write(json.dumps(self._plain_row(row), default=str))
+        self._rows += 1
+
+    def close(self) -> None:
+        """End the JSON array."""
+        self.output.write('\n]\n')
+        super().close()
+
+
+class NDJSONWriter(StreamWriter):
+    """Writer for newline delimited JSON; one object per line."""
+
+    def write_row(self, row: Mapping[Any, Any]) -> None:
+        """Write a row as JSON object on its own line.
+
+        Args:
+            row: the values for the row, keyed by the key of the columns.
+        """
+        self.output.write(json.dumps(self._plain_row(row), default=str))
+        self.output.write('\n')
+
+
+class DelimitedWriter(StreamWriter):
+    """Writer for CSV and TSV, with the column keys as header."""
+
+    def __init__(
+        self,
+        columns: list[Column],
+        stream: TextIO | None = None,
+        delimiter: str = ',',
+    ) -> None:
+        """Set the columns, stream and delimiter for the writer.
+
+        Args:
+            columns: the columns to write.
+            stream: the stream to write to. Defaults to stdout.
+            delimiter: the character between the fields.
+        """
+        super().__init__(columns, stream)
+        self._writer = csv.writer(
+            self.output, delimiter=delimiter, lineterminator='\n'
+        )
+        self._writer.writerow([column.key for column in columns])
+
+    def _field(self, value: Any) -> Any:  # noqa: ANN401
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+        if isinstance(value, list):
+            return ', '.join(str(item) for item in value)
+        return value
+
+    def write_row(self, row: Mapping[Any, Any]) -> None:
+        """Write a row as delimited line.
+
+        Args:
+            row: the values for the row, keyed by the key of the columns.
+        """
+        self._writer.writerow(
+            [self._field(value) for value in self._plain_row(row).values()]
+        )
+
+
+class PlainTableWriter(StreamWriter):
+    """Writer for plain-text tables.
+
+    Is used for the `table` format when the output doesn't go to a terminal.
+    Every row is written as soon as it is given, so the widths of the values
+    are not measured first: a column is as wide as its fixed width or its
+    title. Longer values move the next columns to the right.
+    """
+
+    def __init__(
+        self,
+        columns: list[Column],
+        stream: TextIO | None = None,
+        title: str | None = None,
+    ) -> None:
+        """Set the columns and the stream and write the header.
+
+        Args:
+            columns: the columns to write.
+            stream: the stream to write to. Defaults to stdout.
+            title: the title above the table.
+        """
+        super().__init__(columns, stream)
+        self._widths = [
+            max(column.width or 0, len(column.title)) for column in columns
+        ]
+        if title:
+            self.output.write(f'{title}\n')
+        self._write_line([column.title for column in columns])
+        self._write_line(['-' * width for width in self._widths])
+
+    def _write_line(self, values: list[str]) -> None:
+        with timings.phase('rendering'):
+            cells = [
+                value.rjust(width)
+                if column.justify == 'right'
+                else value.ljust(width)
+                for column, width, value in zip(
+                    self.columns, self._widths, values
+                )
+            ]
+            self.output.write('  '.join(cells).rstrip() + '\n')
+
+    def write_row(self, row: Mapping[Any, Any]) -> None:
+        """Write a row as line with aligned columns.
+
+        Args:
+            row: the values for the row, keyed by the key of the columns.
+        """
+        self._write_line(
+            [
+                _table_value(column, row.get(column.key))
+                for column in self.columns
+            ]
+        )
+
+
+def get_writer(
+    output: OutputFormat,
+    columns: list[Column],
+    stream: bool = False,
+    title: str | None = None,
+    stderr: bool = False,
+) -> OutputWriter:
+    """Get the writer for a output format.
+
+    For the `table` format, a Rich table is used when the output goes to a
+    terminal. Otherwise, a plain-text table is written.
+
+    Args:
+        output: the output format.
+        columns: the columns to write.
+        stream: if set to True, Rich tables are printed on every flush. The
+            other writers always write the rows directly.
+        title: the title for tables.
+        stderr: if set to True, the output is written to stderr.
+
+    Returns:
+        The writer for the format.
+    """
+    file = sys.stderr if stderr else sys.stdout
+    if output == OutputFormat.JSON:
+        return JSONWriter(columns, file)
+    if output == OutputFormat.NDJSON:
+        return NDJSONWriter(columns, file)
+    if output == OutputFormat.CSV:
+        return DelimitedWriter(columns, file)
+    if output == OutputFormat.TSV:
+        return DelimitedWriter(columns, file, delimiter='\t')
+    if is_terminal(file):
+        return TableWriter(columns, stream=stream, title=title, stderr=stderr)
+    return PlainTableWriter(columns, file, title=title)
+
+
+def get_model_columns(model: type[BaseModel]) -> list[Column]:
+    """Get the columns for the fields of a model.
+
+    Args:
+        model: the Pydantic model.
+
+    Returns:
+        A column for every field, with the field name as key and title.
+    """
+    return [Column(key=name, title=name) for name in model.model_fields]
@@ -0,0 +1,63 @@
+"""Module with the hashing of passwords in bulk.
+
+Password hashes are deliberately expensive to calculate. To set the passwords
+for a lot of users, this module calculates the hashes in a pool of processes,
+so all CPU cores can be used.
+"""
+
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from my_model import User
+
+
+def hash_password(password: str) -> tuple[str, datetime]:
+    """Calculate the hash for a password.
+
+    Uses `User.set_password`, so the hash is the same as when setting the
+    password on a user directly.
+
+    Args:
+        password: the password to hash.
+
+    Returns:
+        A tuple with the hash and the moment the password was set.
+    """
+    user = User()
+    user.set_password(password)
+    # The models store the times in UTC, without a time zone
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return str(user.password_hash), user.password_date or now
+
+
+def hash_passwords(
+    passwords: list[str], workers: int | None = None
+) -> list[tuple[str, datetime]]:
+    """Calculate the hashes for a list of passwords.
+
+    Args:
+        passwords: the passwords to hash.
+        workers: the number of processes to use. Defaults to the number of
+            CPUs. With one worker, or one password, no processes are started.
+
+    Returns:
+        A list with a tuple of the hash and the moment the password was set,
+        in the same order as the passwords.
+    """
+    if workers == 1 or len(passwords) <= 1:
+        return [hash_password(password) for password in passwords]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(hash_password, passwords, chunksize=16))
+
+
+def generate_password(length: int = 24) -> str:
+    """Generate a random password.
+
+    Args:
+        length: the number of characters in the password.
+
+    Returns:
+        The generated password.
+    """
+    return secrets.token_urlsafe(length)[:length]
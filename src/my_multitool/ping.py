@@ -0,0 +1,227 @@
+"""Module with the latency probe for databases.
+
+This module contains the functions to check if the databases of contexts can
+be reached and how fast they respond. The databases are probed at the same
+time in a pool of threads, so a slow or unreachable database doesn't delay
+the results for the other databases.
+"""
+
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import partial
+from time import monotonic, perf_counter
+
+from pydantic import BaseModel
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from .benchmark import percentile
+from .replicas import get_connect_args, is_missing_sqlite_file
+
+
+class PingTarget(BaseModel):
+    """A database to probe.
+
+    Attributes:
+        name: the name to display for the database, like the name of the
+            context.
+        db_string: the connection string for the database.
+    """
+
+    name: str
+    db_string: str
+
+
+class PingResult(BaseModel):
+    """The result of probing a database.
+
+    Attributes:
+        name: the name of the database.
+        reachable: whether the database could be reached.
+        connect_ms: the time to open the first connection.
+        checkout_ms: the median time to get a connection from the pool.
+        p50_ms: the median latency for `SELECT 1`.
+        p90_ms: the 90th percentile latency for `SELECT 1`.
+        p99_ms: the 99th percentile latency for `SELECT 1`.
+        max_ms: the highest latency for `SELECT 1`.
+        error: the reason the database could not be reached.
+    """
+
+    name: str
+    reachable: bool
+    connect_ms: float | None = None
+    checkout_ms: float | None = None
+    p50_ms: float | None = None
+    p90_ms: float | None = None
+    p99_ms: float | None = None
+    max_ms: float | None = None
+    error: str | None = None
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def ping_database(
+    target: PingTarget, samples: int = 10, timeout: float = 5.0
+) -> PingResult:
+    """Probe a database.
+
+    Opens a connection and runs `SELECT 1` a number of times on it. After
+    that, a connection is taken from the pool a number of times to measure
+    the overhead of the connection pool. SQLite files that don't exist are
+    not reachable; they are not created.
+
+    Args:
+        target: the database to probe.
+        samples: the number of times `SELECT 1` is run and a connection is
+            taken from the pool.
+        timeout: the timeout in seconds for opening the connection, for the
+            drivers that support it.
+
+    Returns:
+        The result for the database.
+    """
+    url = make_url(target.db_string)
+    if is_missing_sqlite_file(url):
+        return PingResult(
+            name=target.name,
+            reachable=False,
+            error=f'Database file does not exist: {url.database}',
+        )
+    try:
+        # Loading the driver fails when it is not installed
+        engine = create_engine(
+            url, connect_args=get_connect_args(url, timeout)
+        )
+    except (SQLAlchemyError, ImportError) as exc:
+        return PingResult(name=target.name, reachable=False, error=str(exc))
+
+    try:
+        start = perf_counter()
+        with engine.connect() as connection:
+            connect_time = perf_counter() - start
+            latencies = []
+            for _ in range(samples):
+                start = perf_counter()
+                connection.execute(text('SELECT 1'))
+                latencies.append(perf_counter() - start)
+
+        checkouts = []
+        for _ in range(samples):
+            start = perf_counter()
+            with engine.connect():
+                checkouts.append(perf_counter() - start)
+    except SQLAlchemyError as exc:
+        return PingResult(
+            name=target.name,
+            reachable=False,
+            error=str(getattr(exc, 'orig', None) or exc).splitlines()[0],
+        )
+    finally:
+        engine.dispose()
+
+    return PingResult(
+        name=target.name,
+        reachable=True,
+        connect_ms=_ms(connect_time),
+        checkout_ms=_ms(percentile(checkouts, 50)),
+        p50_ms=_ms(percentile(latencies, 50)),
+        p90_ms=_ms(percentile(latencies, 90)),
+        p99_ms=_ms(percentile(latencies, 99)),
+        max_ms=_ms(max(latencies, default=0.0)),
+    )
+
+
+def _wait_for_probe(
+    future: Future[PingResult],
+    started: Callable[[], float | None],
+    timeout: float,
+    queue_deadline: float,
+) -> PingResult | None:
+    """Wait for the result of a probe.
+
+    The timeout starts when the probe starts, so the time a probe waits for
+    a free worker doesn't count.
+
+    Args:
+        future: the future for the probe.
+        started: a function that returns the moment the probe started, or
+            None when it is still waiting for a worker.
+        timeout: the time in seconds to wait for the probe.
+        queue_deadline: the moment to give up on probes that are still
+            waiting for a worker.
+
+    Returns:
+        The result, or None when the probe didn't finish in time.
+    """
+    while True:
+        start = started()
+        deadline = queue_deadline if start is None else start + timeout
+        try:
+            return future.result(timeout=max(deadline - monotonic(), 0))
+        except FutureTimeoutError:
+            # A probe that started while waiting for a worker gets its own
+            # timeout
+            if start is not None or started() is None:
+                return None
+
+
+def ping_databases(
+    targets: list[PingTarget],
+    samples: int = 10,
+    timeout: float = 5.0,
+    workers: int = 8,
+) -> list[PingResult]:
+    """Probe databases at the same time.
+
+    The databases are probed in a pool of `workers` threads. Every database
+    gets `timeout` seconds from the moment its probe starts: the driver
+    stops connecting after that time, and databases that don't respond in
+    time are reported as not reachable. Probes that are still waiting for a
+    worker when every probe could have had its turn are reported as not
+    reachable as well.
+
+    Args:
+        targets: the databases to probe.
+        samples: the number of samples per database.
+        timeout: the time in seconds to wait for a database.
+        workers: the maximum number of databases to probe at the same time.
+
+    Returns:
+        The results, in the order of the targets.
+    """
+    started: dict[int, float] = {}
+
+    def probe(index: int, target: PingTarget) -> PingResult:
+        started[index] = monotonic()
+        return ping_database(target, samples, timeout)
+
+    executor = ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix='ping'
+    )
+    futures = [
+        executor.submit(probe, index, target)
+        for index, target in enumerate(targets)
+    ]
+    rounds = -(-len(targets) // workers)
+    queue_deadline = monotonic() + timeout * rounds
+    try:
+        return [
+            _wait_for_probe(
+                future,
+                partial(started.get, index),
+                timeout,
+                queue_deadline,
+            )
+            or PingResult(
+                name=target.name,
+                reachable=False,
+                error=f'No response within {timeout:g} seconds',
+            )
+            for index, (target, future) in enumerate(zip(targets, futures))
+        ]
+    finally:
+        # Don't wait for databases that don't respond
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,113 @@
+"""Module with the reading of records from files.
+
+This module contains the functions to read records from CSV and NDJSON files,
+or from stdin. Records are read one at a time, so large files don't have to
+fit in memory. Commands that work with a lot of records use `batched` to
+process them in batches.
+"""
+
+import csv
+import json
+import sys
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from pathlib import Path
+from typing import Any, TextIO, TypeVar
+
+from .exceptions import InvalidRecordsError
+from .models import RecordFormat
+
+T = TypeVar('T')
+
+STDIN = '-'
+
+
+def get_record_format(
+    filename: str, record_format: RecordFormat | None = None
+) -> RecordFormat:
+    """Determine the format of a file with records.
+
+    Args:
+        filename: the name of the file, or `-` for stdin.
+        record_format: the format given by the user, if any.
+
+    Raises:
+        InvalidRecordsError: when the format cannot be determined from the
+            extension of the file.
+
+    Returns:
+        The given format, or the format for the extension of the file. For
+        stdin, NDJSON is the default.
+    """
+    if record_format:
+        return record_format
+    if filename == STDIN:
+        return RecordFormat.NDJSON
+    suffix = Path(filename).suffix.lower()
+    if suffix == '.csv':
+        return RecordFormat.CSV
+    if suffix in ('.ndjson', '.jsonl'):
+        return RecordFormat.NDJSON
+    raise InvalidRecordsError(
+        f'Cannot determine the format of "{filename}"; specify a format'
+    )
+
+
+def _read_csv(file: TextIO) -> Iterator[dict[str, Any]]:
+    for row in csv.DictReader(file):
+        yield dict(row)
+
+
+def _read_ndjson(file: TextIO) -> Iterator[dict[str, Any]]:
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise InvalidRecordsError(
+                f'Line {line_number} is not valid JSON: {exc}'
+            ) from exc
+        if not isinstance(record, dict):
+            raise InvalidRecordsError(
+                f'Line {line_number} is not a JSON object'
+            )
+        yield record
+
+
+def read_records(
+    filename: str, record_format: RecordFormat | None = None
+) -> Iterator[dict[str, Any]]:
+    """Read records from a file or from stdin.
+
+    Args:
+        filename: the name of the file, or `-` for stdin.
+        record_format: the format of the file. If not given, the format is
+            determined from the extension of the file.
+
+    Yields:
+        The records as dictionaries. For CSV files, the keys are the names in
+        the header and all values are strings.
+    """
+    record_format = get_record_format(filename, record_format)
+    reader = _read_csv if record_format == RecordFormat.CSV else _read_ndjson
+    if filename == STDIN:
+        yield from reader(sys.stdin)
+        return
+    with open(filename, encoding='utf-8', newline='') as file:
+        yield from reader(file)
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Split items in batches.
+
+    Args:
+        items: the items to split.
+        size: the maximum number of items in a batch.
+
+    Yields:
+        Lists with at most `size` items.
+    """
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
@@ -0,0 +1,293 @@
+"""Module with the routing of read-only commands to read replicas.
+
+A context can have read replicas next to its primary database. Commands that
+only read data can use a replica, so heavy listings don't compete with the
+traffic on the primary database. This module contains the `ReplicaSelector`
+that picks a replica in a round-robin fashion and skips replicas that cannot
+be reached.
+"""
+
+import hashlib
+import json
+import os
+import random
+import time
+from logging import getLogger
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import URL, Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from .config import ContextModel, mask_password
+from .models import Intent
+
+# The argument for the connect timeout, per database driver
+CONNECT_TIMEOUT_ARGUMENTS = {
+    'psycopg2': 'connect_timeout',
+    'psycopg': 'connect_timeout',
+    'pymysql': 'connect_timeout',
+    'mysqldb': 'connect_timeout',
+    'pysqlite': 'timeout',
+}
+
+# The number of seconds to wait for a connection to a replica
+CONNECT_TIMEOUT = 5
+
+
+def get_connect_args(url: URL, timeout: float) -> dict[str, Any]:
+    """Get the arguments for the database driver to set a connect timeout.
+
+    Args:
+        url: the URL of the database.
+        timeout: the number of seconds to wait for a connection.
+
+    Returns:
+        The arguments for `create_engine`; empty when the timeout of the
+        driver is not known.
+    """
+    timeout_argument = CONNECT_TIMEOUT_ARGUMENTS.get(url.get_driver_name())
+    if not timeout_argument:
+        return {}
+    return {timeout_argument: max(int(timeout), 1)}
+
+
+def is_missing_sqlite_file(url: URL) -> bool:
+    """Check if the URL is for a SQLite file that doesn't exist.
+
+    SQLite creates a new, empty database when the file doesn't exist. Checks
+    if a database can be reached use this to not create files for mistyped
+    paths.
+
+    Args:
+        url: the URL of the database.
+
+    Returns:
+        True if the URL is for a SQLite file that doesn't exist; False for
+        other databases and in-memory SQLite databases.
+    """
+    return bool(
+        url.get_backend_name() == 'sqlite'
+        and url.database
+        and url.database != ':memory:'
+        and not Path(url.database).exists()
+    )
+
+
+class ReplicaSelector:
+    """Selector for the database to use for a command.
+
+    Commands that write always use the primary database. Commands that read
+    use the read replicas of the context in turn. Before a replica is used,
+    the engine of the command connects to it with `connect`; the connection
+    goes back to the pool of the engine, so the command reuses it. When a
+    replica cannot be reached, the next replica is used. When no replica can
+    be reached, the primary database is used.
+
+    The first replica is picked at random, so separate runs of the
+    application spread over the replicas.
+
+    Every run of the application is a new process, so the health of the
+    replicas is stored in `state_file`. A replica that could be reached is
+    used without connecting to it first for `healthy_ttl` seconds. A replica
+    that could not be reached is skipped for `retry_after` seconds. Without a
+    state file, the health is only kept within one process.
+
+    Attributes:
+        retry_after: the number of seconds a unreachable replica is skipped.
+        healthy_ttl: the number of seconds a reachable replica is used
+            without connecting to it first.
+        state_file: the file for the health of the replicas, or None to keep
+            it in memory only.
+    """
+
+    def __init__(
+        self,
+        retry_after: float = 30.0,
+        healthy_ttl: float = 30.0,
+        state_file: str | None = None,
+    ) -> None:
+        """Set the defaults for the selector.
+
+        Args:
+            retry_after: the number of seconds a unreachable replica is
+                skipped.
+            healthy_ttl: the number of seconds a reachable replica is used
+                without connecting to it first.
+            state_file: the file for the health of the replicas, or None to
+                keep it in memory only.
+        """
+        self.retry_after = retry_after
+        self.healthy_ttl = healthy_ttl
+        self.state_file = state_file
+        self._next: dict[str, int] = {}
+        self._health: dict[str, tuple[bool, float]] | None = None
+        self._logger = getLogger('replicas')
+
+    def reset(self) -> None:
+        """Forget the round-robin positions and the health of the replicas.
+
+        The state file is read again when a replica is selected.
+        """
+        self._next = {}
+        self._health = None
+
+    @staticmethod
+    def _get_key(db_string: str) -> str:
+        # The connection string can contain a password, so only a hash is
+        # stored.
+        return hashlib.sha256(db_string.encode('utf-8')).hexdigest()[:16]
+
+    def _load_health(self) -> dict[str, tuple[bool, float]]:
+        """Get the health of the replicas, from the state file the first time.
+
+        Returns:
+            Whether a replica could be reached and the moment until which
+            that is used, as Unix time, keyed by a hash of its connection
+            string. Expired entries are left out.
+        """
+        if self._health is not None:
+            return self._health
+        self._health = {}
+        if self.state_file:
+            try:
+                with open(
+                    Path(self.state_file).expanduser(), encoding='utf-8'
+                ) as state_file:
+                    state = json.load(state_file)
+                now = time.time()
+                self._health = {
+                    str(key): (bool(entry['healthy']), float(entry['until']))
+                    for key, entry in state.items()
+                    if float(entry['until']) > now
+                }
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, TypeError, KeyError, AttributeError):
+                self._logger.warning(
+                    'Ignoring invalid replica state file "%s"',
+                    self.state_file,
+                )
+        return self._health
+
+    def _save_health(self, health: dict[str, tuple[bool, float]]) -> None:
+        """Write the health of the replicas to the state file.
+
+        Args:
+            health: whether a replica could be reached and the moment until
+                which that is used, keyed by a hash of its connection string.
+        """
+        if not self.state_file:
+            return
+        path = Path(self.state_file).expanduser()
+        state = {
+            key: {'healthy': healthy, 'until': until}
+            for key, (healthy, until) in health.items()
+        }
+        # Write to a temporary file first, so other processes never read a
+        # partly written file.
+        temporary_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        try:
+            temporary_path.write_text(json.dumps(state), encoding='utf-8')
+            os.replace(temporary_path, path)
+        except OSError:
+            self._logger.warning(
+                'Cannot write replica state file "%s"', self.state_file
+            )
+
+    def _get_health(self, db_string: str) -> bool | None:
+        """Get the stored health of a replica.
+
+        Args:
+            db_string: the connection string for the replica.
+
+        Returns:
+            Whether the replica could be reached, or None when that is not
+            known or expired.
+        """
+        entry = self._load_health().get(self._get_key(db_string))
+        if entry is None or entry[1] <= time.time():
+            return None
+        return entry[0]
+
+    def _set_health(self, db_string: str, healthy: bool) -> None:
+        """Store the health of a replica.
+
+        Args:
+            db_string: the connection string for the replica.
+            healthy: whether the replica could be reached.
+        """
+        health = self._load_health()
+        ttl = self.healthy_ttl if healthy else self.retry_after
+        health[self._get_key(db_string)] = (healthy, time.time() + ttl)
+        self._save_health(health)
+
+    def connect(self, engine: Engine, db_string: str) -> bool:
+        """Connect to a replica with the engine of the command.
+
+        The connection goes back to the pool of the engine, so the command
+        reuses it. Replicas that could be reached within the last
+        `healthy_ttl` seconds are not connected to. For SQLite, the file has
+        to exist.
+
+        Args:
+            engine: the engine for the replica.
+            db_string: the connection string for the replica.
+
+        Returns:
+            True if the replica can be used; False if it cannot be reached.
+        """
+        if self._get_health(db_string):
+            return True
+        healthy = not is_missing_sqlite_file(engine.url)
+        if healthy:
+            try:
+                with engine.connect():
+                    pass
+            except SQLAlchemyError:
+                healthy = False
+        if not healthy:
+            self._logger.warning(
+                'Read replica "%s" cannot be reached',
+                mask_password(db_string),
+            )
+        self._set_health(db_string, healthy)
+        return healthy
+
+    def select(self, context: ContextModel, intent: Intent) -> str:
+        """Select the database for a command.
+
+        Replicas that could not be reached within the last `retry_after`
+        seconds are skipped. The selected replica is not connected to; use
+        `connect` for that.
+
+        Args:
+            context: the context to select the database for.
+            intent: whether the command reads or writes data.
+
+        Returns:
+            The connection string for the database to use.
+        """
+        replicas = context.read_replicas
+        if intent == Intent.WRITE or not replicas:
+            return context.db_string
+
+        start = self._next.get(context.name)
+        if start is None:
+            start = random.randrange(len(replicas))
+        for offset in range(len(replicas)):
+            index = (start + offset) % len(replicas)
+            if self._get_health(replicas[index]) is not False:
+                self._next[context.name] = index + 1
+                self._logger.debug(
+                    'Using read replica "%s"', mask_password(replicas[index])
+                )
+                return replicas[index]
+
+        self._logger.warning(
+            'No read replica can be reached; using the primary database'
+        )
+        return context.db_string
+
+
+replica_selector = ReplicaSelector()
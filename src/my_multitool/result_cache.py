@@ -0,0 +1,265 @@
+"""Module with the result cache for read commands.
+
+This module contains the `ResultCache`. Read commands like `users list` and
+`database stats` can store their results on disk, so running the same command
+again within the TTL doesn't query the database. Results are stored per
+database; commands that change a database remove the cached results for that
+database. The cache is opt-in and configured in the configuration file.
+
+The cached results can contain user data, so the cache directories and files
+can only be read by the user that runs the tool.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from collections.abc import Callable
+from logging import getLogger
+from pathlib import Path
+from typing import Any, TypeVar
+
+from pydantic import TypeAdapter, ValidationError
+
+from .config import ContextModel
+from .globals import config
+
+T = TypeVar('T')
+
+# The permissions for the cache directories and files
+DIRECTORY_MODE = 0o700
+FILE_MODE = 0o600
+
+
+def _digest(value: Any) -> str:  # noqa: ANN401
+    return hashlib.sha256(
+        json.dumps(value, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()
+
+
+class ResultCache:
+    """Cache for the results of read commands.
+
+    Every result is stored in a JSON file in a directory per database. The
+    name of the file is a hash of the context, the command and the arguments
+    of the command. When the cache grows beyond its maximum size, the oldest
+    results are removed.
+
+    Attributes:
+        directory: the directory for the cache files.
+        ttl: the number of seconds a result is valid.
+        max_size: the maximum size of all cache files together, in bytes.
+    """
+
+    def __init__(self, directory: str, ttl: float, max_size: int) -> None:
+        """Set the settings for the cache.
+
+        Args:
+            directory: the directory for the cache files.
+            ttl: the number of seconds a result is valid.
+            max_size: the maximum size of all cache files together, in bytes.
+        """
+        self.directory = Path(directory).expanduser()
+        self.ttl = ttl
+        self.max_size = max_size
+        self._logger = getLogger('result-cache')
+
+    def _context_directory(self, context: ContextModel) -> Path:
+        # The directory is based on the database, so contexts for the same
+        # database are invalidated together.
+        return self.directory / _digest(context.db_string)[:16]
+
+    def _path(
+        self, context: ContextModel, command: str, arguments: dict[str, Any]
+    ) -> Path:
+        key = _digest(
+            {
+                'context': context.name,
+                'root_user': context.root_user,
+                'command': command,
+                'arguments': arguments,
+            }
+        )
+        return self._context_directory(context) / f'{key}.json'
+
+    def get(
+        self,
+        context: ContextModel,
+        command: str,
+        arguments: dict[str, Any],
+        adapter: TypeAdapter[T],
+    ) -> T | None:
+        """Get a cached result.
+
+        Args:
+            context: the context the command was run for.
+            command: the name of the command.
+            arguments: the arguments that determine the result.
+            adapter: the adapter to convert the cached value to the type of
+                the result.
+
+        Returns:
+            The cached result, or None when there is no valid result.
+        """
+        path = self._path(context, command, arguments)
+        try:
+            with open(path, encoding='utf-8') as cache_file:
+                entry = json.load(cache_file)
+            if time.time() - entry['created'] > self.ttl:
+                path.unlink(missing_ok=True)
+                return None
+            value = adapter.validate_python(entry['value'])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, ValidationError):
+            self._logger.warning('Removing invalid cache file "%s"', path)
+            path.unlink(missing_ok=True)
+            return None
+        self._logger.debug('Using cached result for "%s"', command)
+        return value
+
+    def set(
+        self,
+        context: ContextModel,
+        command: str,
+        arguments: dict[str, Any],
+        adapter: TypeAdapter[T],
+        value: T,
+    ) -> bool:
+        """Store a result.
+
+        Results that are larger than the maximum size of the cache are not
+        stored.
+
+        Args:
+            context: the context the command was run for.
+            command: the name of the command.
+            arguments: the arguments that determine the result.
+            adapter: the adapter to convert the result to JSON.
+            value: the result.
+
+        Returns:
+            True if the result is stored.
+        """
+        content = json.dumps(
+            {
+                'created': time.time(),
+                'value': adapter.dump_python(value, mode='json'),
+            }
+        ).encode('utf-8')
+        if len(content) > self.max_size:
+            self._logger.debug('Result for "%s" is too large', command)
+            return False
+
+        path = self._path(context, command, arguments)
+        # `mkdir` only applies the mode to the last directory, so the
+        # directories are created one at a time.
+        self.directory.mkdir(mode=DIRECTORY_MODE, parents=True, exist_ok=True)
+        path.parent.mkdir(mode=DIRECTORY_MODE, exist_ok=True)
+        # Write to a temporary file first, so other processes never read a
+        # partly written file.
+        temporary_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        descriptor = os.open(
+            temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, FILE_MODE
+        )
+        with os.fdopen(descriptor, 'wb') as cache_file:
+            cache_file.write(content)
+        os.replace(temporary_path, path)
+        self._evict()
+        return True
+
+    def _evict(self) -> None:
+        """Remove expired results and the oldest results above the size."""
+        entries = []
+        now = time.time()
+        for path in self.directory.glob('*/*.json'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def invalidate(self, context: ContextModel) -> None:
+        """Remove the cached results for the database of a context.
+
+        Args:
+            context: the context to remove the results for.
+        """
+        shutil.rmtree(self._context_directory(context), ignore_errors=True)
+
+    def clear(self) -> None:
+        """Remove all cached results."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def get_result_cache() -> ResultCache:
+    """Get the result cache with the settings from the configuration.
+
+    Returns:
+        The result cache.
+    """
+    settings = config.config.cache
+    return ResultCache(
+        directory=settings.directory,
+        ttl=settings.ttl,
+        max_size=settings.max_size,
+    )
+
+
+def cached(
+    command: str,
+    arguments: dict[str, Any],
+    adapter: TypeAdapter[T],
+    compute: Callable[[], T],
+) -> T:
+    """Get the result of a read command from the cache, or compute it.
+
+    When the cache is disabled, the result is always computed.
+
+    Args:
+        command: the name of the command.
+        arguments: the arguments that determine the result.
+        adapter: the adapter to convert the result from and to JSON.
+        compute: the function to compute the result.
+
+    Returns:
+        The result.
+    """
+    if not config.config.cache.enabled:
+        return compute()
+    cache = get_result_cache()
+    value = cache.get(config.active_context, command, arguments, adapter)
+    if value is None:
+        value = compute()
+        cache.set(config.active_context, command, arguments, adapter, value)
+    return value
+
+
+def invalidate_cache(context_name: str | None = None) -> None:
+    """Remove the cached results for a context.
+
+    Is used by commands that change a database. The results are removed even
+    when the cache is disabled, so no outdated results are used when the
+    cache is enabled again.
+
+    Args:
+        context_name: the name of the context. If not given, the active
+            context is used.
+    """
+    context = (
+        config.contexts[context_name]
+        if context_name
+        else config.active_context
+    )
+    get_result_cache().invalidate(context)
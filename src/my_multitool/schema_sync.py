@@ -0,0 +1,109 @@
+"""Module with the logic to synchronize a database schema.
+
+This module contains the functions to compare the schema of a live database
+with the schema defined in the models. Instead of dropping and recreating all
+tables, only the missing tables, columns and indexes are created. Existing
+tables, columns and indexes are never changed or dropped.
+
+Columns that are `NOT NULL` and have no server default cannot be added to
+tables with rows, so those columns are refused instead of added.
+"""
+
+from sqlalchemy import MetaData, inspect
+from sqlalchemy.future import Engine
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable
+from sqlmodel import SQLModel
+
+from .exceptions import UnsafeSchemaChangeError
+
+
+def get_schema_changes(
+    engine: Engine, metadata: MetaData | None = None
+) -> list[str]:
+    """Get the DDL statements to bring the database up to date.
+
+    Introspects the database and compares it with the given metadata. Returns
+    the DDL statements that are needed to create the missing tables, columns
+    and indexes. Tables are returned in the order of their foreign keys.
+
+    Args:
+        engine: the engine for the database to compare.
+        metadata: the metadata to compare the database with. If not given,
+            the metadata of the models is used.
+
+    Returns:
+        A list with DDL statements, compiled for the dialect of the engine.
+
+    Raises:
+        UnsafeSchemaChangeError: when a missing column is `NOT NULL` and has
+            no server default. The existing rows would get no value for
+            that column, so the database would refuse the change.
+    """
+    if metadata is None:
+        metadata = SQLModel.metadata
+
+    dialect = engine.dialect
+    preparer = dialect.identifier_preparer
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    statements: list[str] = []
+    unsafe_columns: list[str] = []
+
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            statements.append(
+                str(CreateTable(table).compile(dialect=dialect)).strip()
+            )
+            statements.extend(
+                str(CreateIndex(index).compile(dialect=dialect))
+                for index in table.indexes
+            )
+            continue
+
+        # Missing columns
+        existing_columns = {
+            column['name'] for column in inspector.get_columns(table.name)
+        }
+        for column in table.columns:
+            if column.name not in existing_columns:
+                if not column.nullable and column.server_default is None:
+                    unsafe_columns.append(f'{table.name}.{column.name}')
+                    continue
+                column_spec = CreateColumn(column).compile(dialect=dialect)
+                statements.append(
+                    f'ALTER TABLE {preparer.format_table(table)} '
+                    + f'ADD COLUMN {column_spec}'
+                )
+
+        # Missing indexes
+        existing_indexes = {
+            index['name'] for index in inspector.get_indexes(table.name)
+        }
+        statements.extend(
+            str(CreateIndex(index).compile(dialect=dialect))
+            for index in table.indexes
+            if index.name not in existing_indexes
+        )
+
+    if unsafe_columns:
+        raise UnsafeSchemaChangeError(
+            'Cannot add NOT NULL columns without a server default: '
+            + ', '.join(unsafe_columns)
+        )
+    return statements
+
+
+def apply_schema_changes(engine: Engine, statements: list[str]) -> None:
+    """Apply DDL statements to the database.
+
+    All statements are executed in one transaction. For databases that
+    support transactional DDL, this means that either all or none of the
+    changes are applied.
+
+    Args:
+        engine: the engine for the database to change.
+        statements: the DDL statements to execute.
+    """
+    with engine.begin() as connection:
+        for statement in statements:
+            connection.exec_driver_sql(statement)
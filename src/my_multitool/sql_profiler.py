@@ -0,0 +1,379 @@
+"""Module with the instrumentation for SQL statements.
+
+This module contains the `QueryProfiler`. The profiler hooks into the
+SQLAlchemy engine events and records the latency and row count of every
+statement that is sent to the database. Statements are grouped by their shape,
+which is the statement with all literal values replaced by placeholders. This
+makes it possible to find the slowest and most frequent statements for a
+command.
+
+The echoed statements and the summary are printed to stderr, so they don't
+mix with the output of the command itself.
+"""
+
+import logging
+import re
+from time import perf_counter
+from typing import Any, Optional
+
+import typer
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+from .models import OutputFormat
+from .output import Column, get_writer
+from .style import AnyConsole, get_console
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_NAMED_PARAMETER = re.compile(r'%\(\w+\)s|(?<!:):\w+|\$\d+|%s')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_REPEATED_LIST = re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+')
+_WHITESPACE = re.compile(r'\s+')
+
+# The maximum length of the parameters that are echoed with a statement
+PARAMETERS_LENGTH = 200
+
+SUMMARY_COLUMNS = [
+    Column(key='count', title='Count', justify='right'),
+    Column(key='total_ms', title='Total ms', justify='right'),
+    Column(key='mean_ms', title='Mean ms', justify='right'),
+    Column(key='max_ms', title='Max ms', justify='right'),
+    Column(key='rows', title='Rows', justify='right'),
+    Column(key='shape', title='Statement'),
+]
+
+
+def normalize_statement(statement: str) -> str:
+    """Get the shape of a SQL statement.
+
+    Replaces literal values and parameters with a `?` placeholder and
+    collapses lists of placeholders. Statements that only differ in their
+    values or in the length of their `IN` lists get the same shape.
+
+    Args:
+        statement: the SQL statement.
+
+    Returns:
+        The shape of the statement.
+    """
+    shape = _STRING_LITERAL.sub('?', statement)
+    shape = _NAMED_PARAMETER.sub('?', shape)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _PLACEHOLDER_LIST.sub('(...)', shape)
+    shape = _REPEATED_LIST.sub('(...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+class StatementStats(BaseModel):
+    """Aggregated statistics for a statement shape.
+
+    Attributes:
+        shape: the normalized statement.
+        count: the number of times the statement was executed.
+        total_ms: the total time spent in the statement.
+        max_ms: the time of the slowest execution.
+        rows: the number of rows affected, as reported by the database
+            driver. Drivers don't report this for `SELECT` statements.
+    """
+
+    shape: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+
+    @property
+    def mean_ms(self) -> float:
+        """The mean time for one execution.
+
+        Returns:
+            The mean time in milliseconds.
+        """
+        return self.total_ms / self.count if self.count else 0.0
+
+
+class QueryProfiler:
+    """Profiler for SQL statements.
+
+    Listens to the cursor events of all SQLAlchemy engines while it is
+    started. Every statement is timed and aggregated by its shape. When a
+    threshold is set, statements that take longer are logged as a warning.
+
+    Attributes:
+        echo: if set to True, every statement is printed with its latency.
+        slow_query_ms: the threshold in milliseconds for slow statements.
+        statements: the aggregated statistics, keyed by statement shape.
+    """
+
+    def __init__(
+        self, echo: bool = False, slow_query_ms: float | None = None
+    ) -> None:
+        """Set the settings for the profiler.
+
+        Args:
+            echo: if set to True, every statement is printed with its latency.
+            slow_query_ms: the threshold in milliseconds for slow statements.
+        """
+        self.echo = echo
+        self.slow_query_ms = slow_query_ms
+        self.statements: dict[str, StatementStats] = {}
+        self._started = False
+        self._logger = logging.getLogger('sql-profiler')
+        self._console: AnyConsole | None = None
+
+    @property
+    def console(self) -> AnyConsole:
+        """The console for the echoed statements and the summary.
+
+        Returns:
+            A console that writes to stderr.
+        """
+        if self._console is None:
+            self._console = get_console(stderr=True)
+        return self._console
+
+    @property
+    def active(self) -> bool:
+        """Whether the profiler is listening to engine events.
+
+        Returns:
+            True if the profiler is started.
+        """
+        return self._started
+
+    def start(self) -> None:
+        """Start listening to the cursor events of all engines."""
+        if not self._started:
+            event.listen(Engine, 'before_cursor_execute', self._before)
+            event.listen(Engine, 'after_cursor_execute', self._after)
+            self._started = True
+
+    def stop(self) -> None:
+        """Stop listening to the cursor events."""
+        if self._started:
+            event.remove(Engine, 'before_cursor_execute', self._before)
+            event.remove(Engine, 'after_cursor_execute', self._after)
+            self._started = False
+
+    def reset(self) -> None:
+        """Stop the profiler and clear the settings and statistics."""
+        self.stop()
+        self.echo = False
+        self.slow_query_ms = None
+        self.statements = {}
+        self._console = None
+
+    def _before(
+        self,
+        conn: Connection,
+        cursor: Any,  # noqa: ANN401
+        statement: str,
+        parameters: Any,  # noqa: ANN401
+        context: Any,  # noqa: ANN401
+        executemany: bool,
+    ) -> None:
+        conn.info.setdefault('query_start_time', []).append(perf_counter())
+
+    def _after(
+        self,
+        conn: Connection,
+        cursor: Any,  # noqa: ANN401
+        statement: str,
+        parameters: Any,  # noqa: ANN401
+        context: Any,  # noqa: ANN401
+        executemany: bool,
+    ) -> None:
+        start_times = conn.info.get('query_start_time')
+        if not start_times:
+            return
+        duration_ms = (perf_counter() - start_times.pop()) * 1000
+        rows = max(getattr(cursor, 'rowcount', -1), 0)
+        self.record(statement, duration_ms, rows, parameters)
+
+    def record(
+        self,
+        statement: str,
+        duration_ms: float,
+        rows: int,
+        parameters: Any = None,  # noqa: ANN401
+    ) -> None:
+        """Record a executed statement.
+
+        Args:
+            statement: the SQL statement.
+            duration_ms: the time the statement took in milliseconds.
+            rows: the number of rows affected by the statement.
+            parameters: the parameters for the statement; these are only
+                used when the statement is echoed.
+        """
+        shape = normalize_statement(statement)
+        stats = self.statements.get(shape)
+        if stats is None:
+            stats = StatementStats(shape=shape)
+            self.statements[shape] = stats
+        stats.count += 1
+        stats.total_ms += duration_ms
+        stats.max_ms = max(stats.max_ms, duration_ms)
+        stats.rows += rows
+
+        if self.echo:
+            self.print_statement(statement, duration_ms, rows, parameters)
+        if (
+            self.slow_query_ms is not None
+            and duration_ms >= self.slow_query_ms
+        ):
+            self._logger.warning(
+                'Slow query (%.2f ms): %s', duration_ms, statement
+            )
+
+    def print_statement(
+        self,
+        statement: str,
+        duration_ms: float,
+        rows: int,
+        parameters: Any = None,  # noqa: ANN401
+    ) -> None:
+        """Print a executed statement with its latency.
+
+        The statement is printed as it was sent to the database, on one line.
+        Long parameters, like the rows of a bulk insert, are shortened.
+
+        Args:
+            statement: the SQL statement.
+            duration_ms: the time the statement took in milliseconds.
+            rows: the number of rows affected by the statement.
+            parameters: the parameters for the statement.
+        """
+        text = _WHITESPACE.sub(' ', statement).strip()
+        if parameters:
+            values = repr(parameters)
+            if len(values) > PARAMETERS_LENGTH:
+                values = values[: PARAMETERS_LENGTH - 3] + '...'
+            text += f' -- parameters: {values}'
+        self.console.print(
+            f'[{duration_ms:.2f} ms, {rows} rows] {text}',
+            markup=False,
+            highlight=False,
+        )
+
+    @property
+    def total_count(self) -> int:
+        """The total number of executed statements.
+
+        Returns:
+            The number of statements.
+        """
+        return sum(stats.count for stats in self.statements.values())
+
+    @property
+    def total_ms(self) -> float:
+        """The total time spent in statements.
+
+        Returns:
+            The time in milliseconds.
+        """
+        return sum(stats.total_ms for stats in self.statements.values())
+
+    def slowest(self, top: int = 10) -> list[StatementStats]:
+        """Get the statement shapes with the highest total time.
+
+        Args:
+            top: the number of shapes to return.
+
+        Returns:
+            The statement shapes, slowest first.
+        """
+        return sorted(
+            self.statements.values(), key=lambda x: x.total_ms, reverse=True
+        )[:top]
+
+    def most_frequent(self, top: int = 10) -> list[StatementStats]:
+        """Get the statement shapes that were executed most often.
+
+        Args:
+            top: the number of shapes to return.
+
+        Returns:
+            The statement shapes, most frequent first.
+        """
+        return sorted(
+            self.statements.values(), key=lambda x: x.count, reverse=True
+        )[:top]
+
+    def print_summary(self, top: int = 10) -> None:
+        """Print the slowest and most frequent statements.
+
+        Args:
+            top: the number of statement shapes in each list.
+        """
+        self.console.print(
+            f'{self.total_count} SQL statements in {self.total_ms:.2f} ms'
+        )
+        for title, statements in (
+            ('Slowest statements', self.slowest(top)),
+            ('Most frequent statements', self.most_frequent(top)),
+        ):
+            with get_writer(
+                OutputFormat.TABLE, SUMMARY_COLUMNS, title=title, stderr=True
+            ) as writer:
+                for stats in statements:
+                    writer.write_row(
+                        {
+                            'count': stats.count,
+                            'total_ms': f'{stats.total_ms:.2f}',
+                            'mean_ms': f'{stats.mean_ms:.2f}',
+                            'max_ms': f'{stats.max_ms:.2f}',
+                            'rows': stats.rows,
+                            'shape': stats.shape,
+                        }
+                    )
+
+
+profiler = QueryProfiler()
+
+
+def echo_sql_statements() -> None:
+    """Print every SQL statement with its latency for the current command.
+
+    The statements are printed to stderr.
+    """
+    profiler.echo = True
+    profiler.start()
+
+
+def sql_profiling_options(
+    ctx: typer.Context,
+    sql_summary: bool = typer.Option(
+        False, help='Print the slowest and most frequent SQL statements.'
+    ),
+    slow_query_ms: Optional[float] = typer.Option(
+        None, help='Log SQL statements that take longer than this.'
+    ),
+    sql_top: int = typer.Option(
+        10, help='The number of statements in the SQL summary.'
+    ),
+) -> None:
+    """Configure the SQL profiler for a group of commands.
+
+    Is used as callback for command groups. The profiler is started when one
+    of the options is given and stopped when the command is done.
+
+    Args:
+        ctx: the Typer context.
+        sql_summary: if set to True, a summary is printed after the command.
+        slow_query_ms: the threshold for logging slow statements.
+        sql_top: the number of statements in the summary.
+    """
+    profiler.reset()
+    profiler.slow_query_ms = slow_query_ms
+    if sql_summary or slow_query_ms is not None:
+        profiler.start()
+
+    def finish() -> None:
+        if sql_summary:
+            profiler.print_summary(sql_top)
+        profiler.stop()
+
+    ctx.call_on_close(finish)
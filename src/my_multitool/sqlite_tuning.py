@@ -0,0 +1,86 @@
+"""Module with the performance tuning for SQLite databases.
+
+This module contains the named performance profiles for SQLite and the
+function to apply the PRAGMA statements for a profile to every new connection
+of a SQLAlchemy engine.
+"""
+
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.future import Engine
+
+from .config import SQLiteSettingsModel
+from .models import SQLiteProfile
+
+SQLITE_PROFILES: dict[SQLiteProfile, SQLiteSettingsModel] = {
+    SQLiteProfile.DEFAULT: SQLiteSettingsModel(),
+    # Durable: every commit is synced to disk, readers don't block writers.
+    SQLiteProfile.SAFE: SQLiteSettingsModel(
+        journal_mode='WAL',
+        synchronous='FULL',
+        busy_timeout=5000,
+    ),
+    # Fast: commits are not synced to disk and a large page cache and memory
+    # map are used. A power loss can lose the last transactions.
+    SQLiteProfile.BULK_LOAD: SQLiteSettingsModel(
+        journal_mode='WAL',
+        synchronous='OFF',
+        cache_size=-262144,
+        mmap_size=268435456,
+        temp_store='MEMORY',
+        busy_timeout=5000,
+    ),
+}
+
+
+def get_sqlite_pragmas(
+    profile: SQLiteProfile, settings: SQLiteSettingsModel | None = None
+) -> dict[str, str | int]:
+    """Get the PRAGMA values for a profile.
+
+    The settings of the profile are combined with the given settings. The
+    given settings take precedence over the settings of the profile.
+
+    Args:
+        profile: the named profile to start with.
+        settings: settings that override the settings of the profile.
+
+    Returns:
+        A dictionary with the PRAGMA name as key and its value as value.
+    """
+    pragmas = SQLITE_PROFILES[profile].model_dump(exclude_none=True)
+    if settings:
+        pragmas.update(settings.model_dump(exclude_none=True))
+    return pragmas
+
+
+def apply_sqlite_pragmas(
+    engine: Engine, pragmas: dict[str, str | int]
+) -> None:
+    """Apply PRAGMA statements to every new connection of a engine.
+
+    Registers a `connect` event on the engine. The PRAGMA statements are
+    executed once for every new DBAPI connection, before the connection is
+    used by the pool.
+
+    Args:
+        engine: the engine to tune.
+        pragmas: the PRAGMA values to set.
+    """
+    if not pragmas:
+        return
+
+    statements = [
+        f'PRAGMA {name} = {value}' for name, value in pragmas.items()
+    ]
+
+    def set_pragmas(dbapi_connection: Any, connection_record: Any) -> None:  # noqa: ANN401
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    event.listen(engine, 'connect', set_pragmas)
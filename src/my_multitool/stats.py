@@ -0,0 +1,248 @@
+"""Module with the logic to retrieve statistics for a database.
+
+This module contains the functions to retrieve row counts, on-disk sizes and
+indexes for the tables in a database. Where the dialect allows it, the row
+counts and sizes are retrieved from the catalog and statistics tables of the
+database instead of scanning the tables with `COUNT(*)`.
+"""
+
+from logging import getLogger
+
+from pydantic import BaseModel
+from sqlalchemy import func, inspect, select, table, text
+from sqlalchemy.engine import Connection, Inspector
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.future import Engine
+
+
+class TableStats(BaseModel):
+    """Statistics for one table.
+
+    Attributes:
+        name: the name of the table.
+        rows: the number of rows in the table.
+        exact: True if `rows` is a exact count, False if it is an estimate.
+        size_bytes: the on-disk size of the table and its indexes, or None
+            if the dialect doesn't expose this.
+        indexes: the indexes and unique constraints for the table.
+    """
+
+    name: str
+    rows: int
+    exact: bool
+    size_bytes: int | None = None
+    indexes: list[str] = []
+
+
+def _count_rows(connection: Connection, table_name: str) -> int:
+    """Count the rows in a table with `COUNT(*)`.
+
+    Args:
+        connection: the connection to the database.
+        table_name: the name of the table.
+
+    Returns:
+        The number of rows in the table.
+    """
+    return connection.execute(
+        select(func.count()).select_from(table(table_name))
+    ).scalar_one()
+
+
+def _sqlite_estimates(
+    connection: Connection, table_names: list[str]
+) -> dict[str, tuple[int, bool]]:
+    """Estimate the row counts for SQLite tables.
+
+    Uses `sqlite_stat1` when the database is analyzed. For tables without
+    statistics, the highest `rowid` is used as estimate; SQLite retrieves
+    this from the b-tree without scanning the table.
+
+    Args:
+        connection: the connection to the database.
+        table_names: the tables to estimate the row counts for.
+
+    Returns:
+        A dictionary with the table name as key and a tuple with the estimate
+        and a flag that indicates if the estimate is exact.
+    """
+    estimates: dict[str, tuple[int, bool]] = {}
+    try:
+        for table_name, stat in connection.exec_driver_sql(
+            'SELECT tbl, stat FROM sqlite_stat1'
+        ):
+            rows = int(str(stat).split(' ')[0])
+            current = estimates.get(table_name, (0, False))[0]
+            estimates[table_name] = (max(rows, current), False)
+    except OperationalError:
+        # The database is not analyzed yet
+        pass
+
+    preparer = connection.dialect.identifier_preparer
+    for table_name in table_names:
+        if table_name in estimates:
+            continue
+        try:
+            max_rowid = connection.exec_driver_sql(
+                f'SELECT MAX(rowid) FROM {preparer.quote(table_name)}'
+            ).scalar()
+        except OperationalError:
+            # Tables created `WITHOUT ROWID` have to be counted
+            continue
+        estimates[table_name] = (int(max_rowid or 0), max_rowid is None)
+    return estimates
+
+
+def _sqlite_sizes(connection: Connection) -> dict[str, int]:
+    """Retrieve the on-disk sizes for SQLite tables.
+
+    Uses the `dbstat` virtual table. The size of the indexes for a table is
+    added to the size of the table.
+
+    Args:
+        connection: the connection to the database.
+
+    Returns:
+        A dictionary with the table name as key and the size in bytes as
+        value. Empty when SQLite is compiled without `dbstat`.
+    """
+    try:
+        btree_sizes: dict[str, int] = {
+            name: int(size)
+            for name, size in connection.exec_driver_sql(
+                'SELECT name, SUM(pgsize) FROM dbstat GROUP BY name'
+            )
+        }
+    except OperationalError:
+        return {}
+
+    owners: dict[str, str] = {
+        name: tbl_name
+        for name, tbl_name in connection.exec_driver_sql(
+            'SELECT name, tbl_name FROM sqlite_master '
+            + "WHERE type IN ('table', 'index')"
+        )
+    }
+    sizes: dict[str, int] = {}
+    for name, size in btree_sizes.items():
+        owner = owners.get(name, name)
+        sizes[owner] = sizes.get(owner, 0) + size
+    return sizes
+
+
+def _postgresql_stats(
+    connection: Connection,
+) -> dict[str, tuple[int, int]]:
+    """Retrieve row estimates and sizes for PostgreSQL tables.
+
+    Uses `pg_class.reltuples` for the row estimates and
+    `pg_total_relation_size` for the sizes. Tables that were never analyzed
+    have a negative `reltuples` and are left out.
+
+    Args:
+        connection: the connection to the database.
+
+    Returns:
+        A dictionary with the table name as key and a tuple with the row
+        estimate and the size in bytes as value.
+    """
+    result = connection.execute(
+        text(
+            'SELECT c.relname, c.reltuples::bigint, '
+            + 'pg_total_relation_size(c.oid) '
+            + 'FROM pg_class c '
+            + 'JOIN pg_namespace n ON n.oid = c.relnamespace '
+            + "WHERE c.relkind = 'r' AND n.nspname = current_schema()"
+        )
+    )
+    return {
+        name: (int(rows), int(size))
+        for name, rows, size in result
+        if rows is not None and rows >= 0
+    }
+
+
+def _get_indexes(inspector: Inspector, table_name: str) -> list[str]:
+    """Get the indexes and unique constraints for a table.
+
+    Args:
+        inspector: the SQLAlchemy inspector for the database.
+        table_name: the name of the table.
+
+    Returns:
+        A list with the names of the indexes. Unnamed unique constraints are
+        displayed with their columns.
+    """
+    indexes = [
+        str(index['name']) for index in inspector.get_indexes(table_name)
+    ]
+    for constraint in inspector.get_unique_constraints(table_name):
+        columns = ', '.join(constraint['column_names'])
+        indexes.append(constraint['name'] or f'UNIQUE ({columns})')
+    return indexes
+
+
+def get_table_stats(engine: Engine, exact: bool = False) -> list[TableStats]:
+    """Retrieve statistics for all tables in a database.
+
+    Args:
+        engine: the engine for the database.
+        exact: if set to True, the row counts are retrieved with `COUNT(*)`
+            instead of the catalog and statistics tables.
+
+    Returns:
+        A list with a TableStats object per table, ordered by table name.
+    """
+    logger = getLogger('stats')
+    inspector = inspect(engine)
+    table_names = sorted(inspector.get_table_names())
+    estimates: dict[str, tuple[int, bool]] = {}
+    sizes: dict[str, int] = {}
+
+    with engine.connect() as connection:
+        if engine.dialect.name == 'sqlite':
+            sizes = _sqlite_sizes(connection)
+            if not exact:
+                estimates = _sqlite_estimates(connection, table_names)
+        elif engine.dialect.name == 'postgresql':
+            for name, (rows, size) in _postgresql_stats(connection).items():
+                estimates[name] = (rows, False)
+                sizes[name] = size
+
+        stats: list[TableStats] = []
+        for table_name in table_names:
+            rows, is_exact = estimates.get(table_name, (0, True))
+            if exact or table_name not in estimates:
+                logger.debug('Counting rows in "%s"', table_name)
+                rows = _count_rows(connection, table_name)
+                is_exact = True
+            stats.append(
+                TableStats(
+                    name=table_name,
+                    rows=rows,
+                    exact=is_exact,
+                    size_bytes=sizes.get(table_name),
+                    indexes=_get_indexes(inspector, table_name),
+                )
+            )
+    return stats
+
+
+def format_size(size_bytes: int | None) -> str:
+    """Format a size in bytes for humans.
+
+    Args:
+        size_bytes: the size in bytes.
+
+    Returns:
+        The formatted size, like `1.5 MiB`, or an empty string if the size
+        is not known.
+    """
+    if size_bytes is None:
+        return ''
+    size = float(size_bytes)
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024:
+            return f'{size:.1f} {unit}' if unit != 'B' else f'{size_bytes} B'
+        size /= 1024
+    return f'{size:.1f} TiB'
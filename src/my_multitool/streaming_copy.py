@@ -0,0 +1,184 @@
+"""Module with the logic to copy data between databases.
+
+This module contains the functions to copy all tables from one database to
+another database. Reading and writing overlap: a producer thread reads batches
+of rows from the source database and puts them in a bounded queue, while the
+calling thread inserts the batches in the target database. The bounded queue
+makes sure the memory usage stays flat, even for large databases.
+"""
+
+import queue
+import threading
+from logging import getLogger
+from typing import Any
+
+from sqlalchemy import MetaData, Table, func, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.future import Engine
+from sqlmodel import SQLModel
+
+# Marker that is put in the queue when the producer is done
+_DONE = object()
+
+
+class _Producer(threading.Thread):
+    """Thread that reads the tables from the source database.
+
+    The rows are put in the queue in batches, in the order of the foreign keys
+    of the tables. When all tables are read, the `_DONE` marker is put in the
+    queue. When a error occurs, the exception is put in the queue so the
+    consumer can raise it.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        tables: list[Table],
+        batches: 'queue.Queue[Any]',
+        batch_size: int,
+    ) -> None:
+        """Set the attributes for the producer.
+
+        Args:
+            engine: the engine for the source database.
+            tables: the tables to read.
+            batches: the queue to put the batches in.
+            batch_size: the number of rows per batch.
+        """
+        super().__init__(name='copy-producer', daemon=True)
+        self.engine = engine
+        self.tables = tables
+        self.batches = batches
+        self.batch_size = batch_size
+        self.stopped = threading.Event()
+
+    def _put(self, item: Any) -> bool:  # noqa: ANN401
+        """Put a item in the queue, unless the producer is stopped.
+
+        Args:
+            item: the item to put in the queue.
+
+        Returns:
+            False if the producer was stopped before the item could be put in
+            the queue.
+        """
+        while not self.stopped.is_set():
+            try:
+                self.batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(self) -> None:
+        """Read the tables and put the rows in the queue."""
+        try:
+            with self.engine.connect() as connection:
+                streaming = connection.execution_options(
+                    stream_results=True, yield_per=self.batch_size
+                )
+                for table in self.tables:
+                    result = streaming.execute(select(table))
+                    for partition in result.mappings().partitions():
+                        rows = [dict(row) for row in partition]
+                        if not self._put((table, rows)):
+                            return
+            self._put(_DONE)
+        except Exception as exception:
+            self._put(exception)
+
+
+def reset_sequences(connection: Connection, tables: list[Table]) -> None:
+    """Reset the PostgreSQL sequences for tables.
+
+    Rows that are copied or generated are inserted with their primary keys,
+    so the sequences for the primary keys are not used. This function sets
+    the sequences to the highest value in the tables so new rows get a unique
+    primary key.
+
+    Args:
+        connection: the connection to the database.
+        tables: the tables with inserted primary keys.
+    """
+    for table in tables:
+        for column in table.primary_key.columns:
+            if not column.autoincrement or column.foreign_keys:
+                continue
+            connection.execute(
+                text(
+                    'SELECT setval(pg_get_serial_sequence(:table, :column), '
+                    + 'GREATEST(:value, 1))'
+                ),
+                {
+                    'table': table.name,
+                    'column': column.name,
+                    'value': connection.execute(
+                        select(func.max(column))
+                    ).scalar()
+                    or 0,
+                },
+            )
+
+
+def copy_tables(
+    source: Engine,
+    target: Engine,
+    batch_size: int = 1000,
+    queue_size: int = 4,
+    metadata: MetaData | None = None,
+) -> dict[str, int]:
+    """Copy all tables from one database to another database.
+
+    The tables are copied in the order of their foreign keys, so referenced
+    rows are always inserted first. All rows are inserted in one transaction
+    on the target database.
+
+    Args:
+        source: the engine for the database to copy from.
+        target: the engine for the database to copy to.
+        batch_size: the number of rows to read and insert at once.
+        queue_size: the maximum number of batches that are read ahead.
+        metadata: the metadata with the tables to copy. If not given, the
+            metadata of the models is used.
+
+    Raises:
+        Exception: when reading from the source database fails, the exception
+            from the producer thread is raised.
+
+    Returns:
+        A dictionary with the table name as key and the number of copied
+        rows as value.
+    """
+    logger = getLogger('streaming-copy')
+    if metadata is None:
+        metadata = SQLModel.metadata
+    tables = list(metadata.sorted_tables)
+    copied: dict[str, int] = {table.name: 0 for table in tables}
+
+    batches: queue.Queue[Any] = queue.Queue(maxsize=queue_size)
+    producer = _Producer(source, tables, batches, batch_size)
+    producer.start()
+
+    try:
+        with target.begin() as connection:
+            while True:
+                item = batches.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+
+                table, rows = item
+                connection.execute(table.insert(), rows)
+                copied[table.name] += len(rows)
+                logger.debug(
+                    'Copied %d rows to "%s"', copied[table.name], table.name
+                )
+
+            if target.dialect.name == 'postgresql':
+                reset_sequences(connection, tables)
+    finally:
+        producer.stopped.set()
+        producer.join()
+
+    return copied
@@ -2,35 +2,204 @@
 
 This module contains all the global styles for the application to give it a
 consistent look.
+
+Output is rendered by one of two backends. When the output goes to a terminal,
+Rich is used for colors and tables. When the output is piped or redirected,
+like in scripts and cron jobs, a plain-text backend is used that writes the
+text directly, without terminal layout. Rich is only imported when it is used,
+since importing it takes a noticeable part of the startup time.
 """
 
-from rich import box
-from rich.console import Console
-from rich.table import Table
+import re
+import sys
+from typing import TYPE_CHECKING, Any, TextIO, Union
+
+from .timings import timings
+
+if TYPE_CHECKING:  # pragma: no cover
+    from rich.table import Table
+
+# The markup tags of Rich, like `[b]` and `[/red]`. Tags that are preceded by
+# a backslash are escaped.
+MARKUP_TAG = re.compile(r'(\\*)\[([a-z#/@][^[]*?)]')
+
+
+def is_terminal(stream: TextIO | None = None) -> bool:
+    """Check if a stream is connected to a terminal.
+
+    Args:
+        stream: the stream to check. Defaults to stdout.
+
+    Returns:
+        True if the stream is a terminal.
+    """
+    stream = stream or sys.stdout
+    isatty = getattr(stream, 'isatty', None)
+    return bool(isatty and isatty())
+
+
+def strip_markup(text: str) -> str:
+    """Remove the Rich markup from a text.
+
+    Args:
+        text: the text with markup, like `[b]Error:[/b] message`.
+
+    Returns:
+        The text without the markup tags.
+    """
+
+    def replace(match: re.Match) -> str:
+        backslashes, escaped = divmod(len(match.group(1)), 2)
+        tag = f'[{match.group(2)}]' if escaped else ''
+        return '\\' * backslashes + tag
+
+    return MARKUP_TAG.sub(replace, text)
+
+
+class TimedConsole:
+    """Rich Console that records the time spent on rendering."""
+
+    def __init__(self, stderr: bool = False) -> None:
+        """Create the Rich Console.
+
+        Args:
+            stderr: if set to True, the console writes to stderr.
+        """
+        from rich.console import Console
+
+        self.console: Console = Console(stderr=stderr)
+
+    def print(self, *objects: Any, **kwargs: Any) -> None:  # noqa: ANN401
+        """Print to the console.
+
+        Args:
+            objects: the objects to print.
+            kwargs: the arguments for `Console.print`.
+        """
+        with timings.phase('rendering'):
+            self.console.print(*objects, **kwargs)
+
+    def input(self, prompt: str = '') -> str:
+        """Ask the user for input.
+
+        Args:
+            prompt: the text to display before the input.
+
+        Returns:
+            The text the user entered.
+        """
+        return self.console.input(prompt)
+
+
+class PlainConsole:
+    """Console that writes plain text, without terminal layout.
+
+    Has the same interface as the `TimedConsole`, so commands don't have to
+    know which backend is used. Markup in texts is removed.
+    """
+
+    def __init__(self, stderr: bool = False) -> None:
+        """Set the stream for the console.
+
+        Args:
+            stderr: if set to True, the console writes to stderr.
+        """
+        self.stderr = stderr
+
+    @property
+    def file(self) -> TextIO:
+        """The stream to write to.
+
+        The stream is looked up on every write, so a replaced `sys.stdout` is
+        used as well.
+
+        Returns:
+            The stream.
+        """
+        return sys.stderr if self.stderr else sys.stdout
+
+    def print(
+        self,
+        *objects: Any,  # noqa: ANN401
+        sep: str = ' ',
+        end: str = '\n',
+        markup: bool = True,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> None:
+        """Print to the console.
+
+        Args:
+            objects: the objects to print.
+            sep: the text between the objects.
+            end: the text after the objects.
+            markup: if set to False, the texts are printed as they are.
+            kwargs: other arguments for `Console.print`; these only apply to
+                Rich and are ignored.
+        """
+        with timings.phase('rendering'):
+            texts = [str(item) for item in objects]
+            if markup:
+                texts = [strip_markup(text) for text in texts]
+            self.file.write(sep.join(texts) + end)
+            if self.stderr:
+                # Messages on stderr should show up right away, like they do
+                # when Python writes to stderr itself
+                self.file.flush()
+
+    def input(self, prompt: str = '') -> str:
+        """Ask the user for input.
+
+        Args:
+            prompt: the text to display before the input.
+
+        Returns:
+            The text the user entered.
+        """
+        self.print(prompt, end='')
+        self.file.flush()
+        return input()
+
+
+AnyConsole = Union[TimedConsole, PlainConsole]
+
+
+def get_console(stderr: bool = False) -> AnyConsole:
+    """Create a console for the backend that fits the output.
+
+    Args:
+        stderr: if set to True, the console writes to stderr.
+
+    Returns:
+        A Rich console when the output goes to a terminal; a plain-text
+        console otherwise.
+    """
+    if is_terminal(sys.stderr if stderr else sys.stdout):
+        return TimedConsole(stderr=stderr)
+    return PlainConsole(stderr=stderr)
 
 
 class ConsoleFactory:
-    """Factory for a Rich Console."""
+    """Factory for the global console."""
 
-    global_console: Console | None = None
+    global_console: AnyConsole | None = None
 
     @classmethod
-    def get_console(cls) -> Console:
-        """Create a Rich Console.
+    def get_console(cls) -> AnyConsole:
+        """Create a console.
 
-        Creates a Rich Console to use to display data. If a console is already
+        Creates a console to use to display data. If a console is already
         created, it will return that console. Otherwise, it will create it and
         returns is.
 
         Returns:
-            A Rich Conosle instance.
+            A console instance; see `get_console` for the backend.
         """
         if not cls.global_console:
-            cls.global_console = Console()
+            cls.global_console = get_console()
         return cls.global_console
 
 
-def get_table() -> Table:
+def get_table() -> 'Table':
     """Create a Rich Table.
 
     Creates a Rich Table to use by functions that list data. By using a
@@ -40,13 +209,16 @@ def get_table() -> Table:
     Returns:
         A Rich Table instance.
     """
+    from rich import box
+    from rich.table import Table
+
     return Table(box=box.SIMPLE)
 
 
 def print_error(message: str, prefix: str = 'Error') -> None:
     """Print a error message.
 
-    Prints a error message in a Rich console. This can be used as a alternative
+    Prints a error message in the console. This can be used as a alternative
     to the Console.print method.
 
     Args:
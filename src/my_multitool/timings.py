@@ -0,0 +1,272 @@
+"""Module with the phase timings for commands.
+
+This module contains the `PhaseRecorder`. It records how long the different
+phases of a command take, like loading the configuration, connecting to the
+database, running queries and rendering output. When a command is slow, this
+shows which phase is responsible.
+"""
+
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, ExitStack, contextmanager
+from time import perf_counter
+from typing import Any
+
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Dialect, Engine
+
+# The phases in the order they usually happen in a command. Phases that are
+# recorded but not in this list are reported after these phases.
+PHASES = (
+    'import',
+    'config.load',
+    'logging setup',
+    'MyData configure',
+    'connection acquisition',
+    'transaction',
+    'queries',
+    'data load',
+    'password hashing',
+    'rendering',
+)
+
+# The maximum length of the SQL statements kept for queries
+STATEMENT_LENGTH = 1000
+
+
+class PhaseEvent(BaseModel):
+    """A recorded phase.
+
+    Attributes:
+        name: the name of the phase.
+        start: the start of the phase, in seconds from `perf_counter`.
+        end: the end of the phase, in seconds from `perf_counter`.
+        thread_id: the identifier of the thread that ran the phase.
+        details: extra information about the phase, like the SQL statement
+            for queries.
+    """
+
+    name: str
+    start: float
+    end: float
+    thread_id: int
+    details: dict[str, Any] = {}
+
+    @property
+    def duration(self) -> float:
+        """The duration of the phase.
+
+        Returns:
+            The duration in seconds.
+        """
+        return self.end - self.start
+
+
+class PhaseTotal(BaseModel):
+    """The total time for a phase.
+
+    Attributes:
+        name: the name of the phase.
+        count: the number of times the phase was recorded.
+        total_ms: the total wall time of the phase in milliseconds.
+    """
+
+    name: str
+    count: int
+    total_ms: float
+
+
+class TimingsReport(BaseModel):
+    """The report with the timings for a command.
+
+    Attributes:
+        total_ms: the wall time from the import of the application until the
+            report was created.
+        phases: the totals for the recorded phases.
+    """
+
+    total_ms: float
+    phases: list[PhaseTotal]
+
+
+class PhaseRecorder:
+    """Recorder for the phases of a command.
+
+    Phases are only recorded when the recorder is enabled, so the phases can
+    be marked in the code without a cost when no report is requested. When
+    enabled, the recorder also listens to the SQLAlchemy events of all engines
+    to record the time spent on creating connections and running queries.
+
+    Other recorders, like the memory profiler, can measure the phases as well
+    by adding a function to `phase_wrappers`. Every phase is wrapped in the
+    context managers these functions return, also when the recorder itself is
+    not enabled.
+
+    Attributes:
+        enabled: if set to True, phases are recorded.
+        origin: the moment the recording started.
+        events: the recorded phases.
+        phase_wrappers: functions that return a context manager for a phase,
+            given the name of the phase.
+    """
+
+    def __init__(self) -> None:
+        """Set the defaults for the recorder."""
+        self.enabled = False
+        self.origin = perf_counter()
+        self.events: list[PhaseEvent] = []
+        self.phase_wrappers: list[
+            Callable[[str], AbstractContextManager[None]]
+        ] = []
+
+    def start(self, origin: float | None = None) -> None:
+        """Enable the recorder.
+
+        Args:
+            origin: the moment the recording should start from. When not
+                given, the current moment is used.
+        """
+        if self.enabled:
+            return
+        self.enabled = True
+        self.origin = perf_counter() if origin is None else origin
+        event.listen(Engine, 'do_connect', self._connect)
+        event.listen(Engine, 'begin', self._begin)
+        event.listen(Engine, 'commit', self._end_transaction)
+        event.listen(Engine, 'rollback', self._end_transaction)
+        event.listen(Engine, 'before_cursor_execute', self._before_query)
+        event.listen(Engine, 'after_cursor_execute', self._after_query)
+
+    def stop(self) -> None:
+        """Disable the recorder and clear the recorded phases."""
+        if self.enabled:
+            event.remove(Engine, 'do_connect', self._connect)
+            event.remove(Engine, 'begin', self._begin)
+            event.remove(Engine, 'commit', self._end_transaction)
+            event.remove(Engine, 'rollback', self._end_transaction)
+            event.remove(Engine, 'before_cursor_execute', self._before_query)
+            event.remove(Engine, 'after_cursor_execute', self._after_query)
+        self.enabled = False
+        self.events = []
+
+    def add(
+        self,
+        name: str,
+        start: float,
+        end: float,
+        details: dict[str, Any] | None = None,
+    ) -> None:
+        """Add a phase that was timed elsewhere.
+
+        Args:
+            name: the name of the phase.
+            start: the start of the phase, from `perf_counter`.
+            end: the end of the phase, from `perf_counter`.
+            details: extra information about the phase.
+        """
+        if self.enabled:
+            self.events.append(
+                PhaseEvent(
+                    name=name,
+                    start=start,
+                    end=end,
+                    thread_id=threading.get_ident(),
+                    details=details or {},
+                )
+            )
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a phase.
+
+        Args:
+            name: the name of the phase.
+
+        Yields:
+            Nothing; the code in the `with` block is timed.
+        """
+        if not self.enabled and not self.phase_wrappers:
+            yield
+            return
+        with ExitStack() as wrappers:
+            for wrapper in self.phase_wrappers:
+                wrappers.enter_context(wrapper(name))
+            start = perf_counter()
+            try:
+                yield
+            finally:
+                self.add(name, start, perf_counter())
+
+    def _connect(
+        self,
+        dialect: Dialect,
+        conn_rec: Any,  # noqa: ANN401
+        cargs: Any,  # noqa: ANN401
+        cparams: Any,  # noqa: ANN401
+    ) -> Any:  # noqa: ANN401
+        with self.phase('connection acquisition'):
+            return dialect.connect(*cargs, **cparams)
+
+    def _begin(self, conn: Connection) -> None:
+        conn.info['phase_transaction_start'] = perf_counter()
+
+    def _end_transaction(self, conn: Connection) -> None:
+        start = conn.info.pop('phase_transaction_start', None)
+        if start is not None:
+            self.add('transaction', start, perf_counter())
+
+    def _before_query(
+        self,
+        conn: Connection,
+        cursor: Any,  # noqa: ANN401
+        statement: str,
+        parameters: Any,  # noqa: ANN401
+        context: Any,  # noqa: ANN401
+        executemany: bool,
+    ) -> None:
+        conn.info.setdefault('phase_query_start', []).append(perf_counter())
+
+    def _after_query(
+        self,
+        conn: Connection,
+        cursor: Any,  # noqa: ANN401
+        statement: str,
+        parameters: Any,  # noqa: ANN401
+        context: Any,  # noqa: ANN401
+        executemany: bool,
+    ) -> None:
+        start_times = conn.info.get('phase_query_start')
+        if start_times:
+            self.add(
+                'queries',
+                start_times.pop(),
+                perf_counter(),
+                {'statement': statement[:STATEMENT_LENGTH]},
+            )
+
+    def report(self) -> TimingsReport:
+        """Create a report with the totals per phase.
+
+        Returns:
+            The report with the phases in the order of `PHASES`.
+        """
+        totals: dict[str, PhaseTotal] = {}
+        for phase_event in self.events:
+            total = totals.setdefault(
+                phase_event.name,
+                PhaseTotal(name=phase_event.name, count=0, total_ms=0.0),
+            )
+            total.count += 1
+            total.total_ms += phase_event.duration * 1000
+
+        order = {name: index for index, name in enumerate(PHASES)}
+        phases = sorted(
+            totals.values(), key=lambda x: order.get(x.name, len(PHASES))
+        )
+        return TimingsReport(
+            total_ms=(perf_counter() - self.origin) * 1000, phases=phases
+        )
+
+
+timings = PhaseRecorder()
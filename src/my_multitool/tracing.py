@@ -0,0 +1,205 @@
+"""Module with the trace files for commands.
+
+This module converts the phases that are recorded by the `PhaseRecorder` to a
+trace file. The command is the root span; the phases, like loading the
+configuration, transactions, queries and rendering, are nested in it by their
+time. The trace can be written in the Chrome trace event format, for
+`chrome://tracing` and Perfetto, or as OTLP JSON, for OpenTelemetry tools.
+"""
+
+import json
+import os
+import secrets
+import threading
+from pathlib import Path
+from time import perf_counter, time
+from typing import Any
+
+from .models import TraceFormat
+from .timings import PhaseEvent, PhaseRecorder
+
+# The name of the service in OTLP traces
+SERVICE_NAME = 'my-multitool'
+
+
+def _microseconds(seconds: float) -> float:
+    return round(seconds * 1_000_000, 3)
+
+
+def get_chrome_trace(
+    command: str, events: list[PhaseEvent], origin: float, end: float
+) -> dict[str, Any]:
+    """Create a trace in the Chrome trace event format.
+
+    The phases are written as complete events. Chrome nests events on the
+    same thread by their time.
+
+    Args:
+        command: the name of the command, for the root span.
+        events: the recorded phases.
+        origin: the start of the command, from `perf_counter`.
+        end: the end of the command, from `perf_counter`.
+
+    Returns:
+        The trace, ready to be written as JSON.
+    """
+    pid = os.getpid()
+    main_thread = threading.main_thread().ident
+    trace_events: list[dict[str, Any]] = [
+        {
+            'name': 'thread_name',
+            'ph': 'M',
+            'pid': pid,
+            'tid': main_thread,
+            'args': {'name': 'main'},
+        },
+        {
+            'name': command or 'command',
+            'cat': 'command',
+            'ph': 'X',
+            'ts': 0,
+            'dur': _microseconds(end - origin),
+            'pid': pid,
+            'tid': main_thread,
+        },
+    ]
+    for phase_event in events:
+        trace_event = {
+            'name': phase_event.name,
+            'cat': 'phase',
+            'ph': 'X',
+            'ts': _microseconds(phase_event.start - origin),
+            'dur': _microseconds(phase_event.duration),
+            'pid': pid,
+            'tid': phase_event.thread_id,
+        }
+        if phase_event.details:
+            trace_event['args'] = phase_event.details
+        trace_events.append(trace_event)
+    return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+
+def _get_parents(events: list[PhaseEvent]) -> list[int | None]:
+    """Find the phase that every phase is nested in.
+
+    A phase is nested in the shortest phase on the same thread that contains
+    it.
+
+    Args:
+        events: the recorded phases.
+
+    Returns:
+        The index of the parent phase for every phase, or None for phases that
+        are only nested in the command.
+    """
+    parents: list[int | None] = [None] * len(events)
+    order = sorted(
+        range(len(events)),
+        key=lambda index: (events[index].start, -events[index].end),
+    )
+    stacks: dict[int, list[int]] = {}
+    for index in order:
+        stack = stacks.setdefault(events[index].thread_id, [])
+        while stack and events[stack[-1]].end < events[index].end:
+            stack.pop()
+        if stack:
+            parents[index] = stack[-1]
+        stack.append(index)
+    return parents
+
+
+def get_otlp_trace(
+    command: str, events: list[PhaseEvent], origin: float, end: float
+) -> dict[str, Any]:
+    """Create a trace in the OTLP JSON format.
+
+    Args:
+        command: the name of the command, for the root span.
+        events: the recorded phases.
+        origin: the start of the command, from `perf_counter`.
+        end: the end of the command, from `perf_counter`.
+
+    Returns:
+        The trace, ready to be written as JSON.
+    """
+    # The phases are timed with `perf_counter`; OTLP needs the Unix time
+    offset = time() - perf_counter()
+    trace_id = secrets.token_hex(16)
+    root_id = secrets.token_hex(8)
+    span_ids = [secrets.token_hex(8) for _ in events]
+
+    def nanoseconds(moment: float) -> str:
+        return str(int((moment + offset) * 1_000_000_000))
+
+    def attributes(values: dict[str, Any]) -> list[dict[str, Any]]:
+        return [
+            {'key': key, 'value': {'stringValue': str(value)}}
+            for key, value in values.items()
+        ]
+
+    spans = [
+        {
+            'traceId': trace_id,
+            'spanId': root_id,
+            'name': command or 'command',
+            'kind': 1,
+            'startTimeUnixNano': nanoseconds(origin),
+            'endTimeUnixNano': nanoseconds(end),
+            'attributes': [],
+        }
+    ]
+    for phase_event, span_id, parent in zip(
+        events, span_ids, _get_parents(events)
+    ):
+        spans.append(
+            {
+                'traceId': trace_id,
+                'spanId': span_id,
+                'parentSpanId': root_id
+                if parent is None
+                else span_ids[parent],
+                'name': phase_event.name,
+                'kind': 1,
+                'startTimeUnixNano': nanoseconds(phase_event.start),
+                'endTimeUnixNano': nanoseconds(phase_event.end),
+                'attributes': attributes(
+                    {'thread.id': phase_event.thread_id, **phase_event.details}
+                ),
+            }
+        )
+    return {
+        'resourceSpans': [
+            {
+                'resource': {
+                    'attributes': attributes({'service.name': SERVICE_NAME})
+                },
+                'scopeSpans': [
+                    {'scope': {'name': 'my_multitool'}, 'spans': spans}
+                ],
+            }
+        ]
+    }
+
+
+def write_trace(
+    path: str,
+    recorder: PhaseRecorder,
+    command: str,
+    trace_format: TraceFormat = TraceFormat.CHROME,
+) -> None:
+    """Write the recorded phases of a command to a trace file.
+
+    Args:
+        path: the trace file.
+        recorder: the recorder with the phases.
+        command: the name of the command, for the root span.
+        trace_format: the format for the trace file.
+    """
+    end = perf_counter()
+    events = list(recorder.events)
+    if trace_format == TraceFormat.OTLP:
+        trace = get_otlp_trace(command, events, recorder.origin, end)
+    else:
+        trace = get_chrome_trace(command, events, recorder.origin, end)
+    with open(Path(path).expanduser(), 'w', encoding='utf-8') as trace_file:
+        json.dump(trace, trace_file, default=str)
@@ -0,0 +1,203 @@
+"""Module with the upsert logic for imports.
+
+This module contains the functions to write SQLModel objects to the database
+with the dialect-native `INSERT ... ON CONFLICT` statements. Records that
+already exist in the database can either be skipped or updated. Only rows that
+are actually new or changed are written, which makes it cheap to re-sync a
+dump into a database that already contains most of the records.
+"""
+
+from collections import defaultdict, deque
+from typing import Any
+
+from sqlalchemy import Table, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.future import Engine
+from sqlalchemy.orm import RelationshipDirection, class_mapper
+from sqlmodel import SQLModel
+
+from .exceptions import InvalidImportDataError, UnsupportedDialectError
+from .models import OnConflict
+
+# Columns that are set by the application when a record is created or changed.
+# These are not compared when determining if a existing row has changed.
+TIMESTAMP_COLUMNS = ('created', 'updated')
+
+
+def flatten_models(
+    models: list[SQLModel],
+) -> dict[Table, list[dict[str, Any]]]:
+    """Convert a list of SQLModel objects to rows per table.
+
+    The objects created by a `DataSource` can contain related objects (for
+    instance, the tags for a user). These related objects are added to the
+    result with the foreign key set to the primary key of the parent object.
+
+    Args:
+        models: the SQLModel objects to convert.
+
+    Raises:
+        InvalidImportDataError: when a object with related objects has no
+            primary key set.
+
+    Returns:
+        A dictionary with the table as key and a list with rows as value.
+    """
+    rows: dict[Table, list[dict[str, Any]]] = defaultdict(list)
+    pending = deque(models)
+    while pending:
+        model = pending.popleft()
+        table: Table = model.__table__  # type: ignore
+        rows[table].append(
+            {
+                column.name: getattr(model, column.name)
+                for column in table.columns
+            }
+        )
+
+        for relationship in class_mapper(type(model)).relationships:
+            if relationship.direction != RelationshipDirection.ONETOMANY:
+                continue
+            children = model.__dict__.get(relationship.key) or []
+            for local, remote in relationship.local_remote_pairs or []:
+                value = getattr(model, local.name)
+                if value is None and children:
+                    raise InvalidImportDataError(
+                        f'Records in "{table.name}" need a "{local.name}" '
+                        + 'to import related records'
+                    )
+                for child in children:
+                    setattr(child, remote.name, value)
+            pending.extend(children)
+    return rows
+
+
+def _get_insert_statement(
+    engine: Engine, table: Table
+) -> sqlite.Insert | postgresql.Insert:
+    """Get a dialect-specific `INSERT` statement for a table.
+
+    Args:
+        engine: the engine to create the statement for.
+        table: the table to insert into.
+
+    Raises:
+        UnsupportedDialectError: when the dialect has no native upsert.
+
+    Returns:
+        The `INSERT` statement for the dialect of the engine.
+    """
+    if engine.dialect.name == 'sqlite':
+        return sqlite.insert(table)
+    if engine.dialect.name == 'postgresql':
+        return postgresql.insert(table)
+    raise UnsupportedDialectError(
+        f'Dialect "{engine.dialect.name}" does not support upserts'
+    )
+
+
+def _upsert_rows(
+    connection: Connection,
+    table: Table,
+    rows: list[dict[str, Any]],
+    on_conflict: OnConflict,
+) -> int:
+    """Upsert rows with the same set of columns into one table.
+
+    Args:
+        connection: the connection to execute the statement on.
+        table: the table to upsert the rows into.
+        rows: the rows to upsert. All rows should have the same keys.
+        on_conflict: what to do with rows that already exist.
+
+    Returns:
+        The number of rows that were written.
+    """
+    statement = _get_insert_statement(connection.engine, table)
+    primary_key = [column.name for column in table.primary_key.columns]
+    updatable = [
+        name
+        for name in rows[0]
+        if name not in primary_key and name != 'created'
+    ]
+    compared = [name for name in updatable if name not in TIMESTAMP_COLUMNS]
+
+    # Rows without a primary key can only conflict on other unique
+    # constraints. These rows are skipped, since we cannot target them.
+    has_primary_key = bool(primary_key) and all(
+        name in rows[0] for name in primary_key
+    )
+
+    if on_conflict == OnConflict.UPDATE and compared and has_primary_key:
+        # Only update rows that actually differ from the imported values
+        statement = statement.on_conflict_do_update(
+            index_elements=primary_key,
+            set_={name: statement.excluded[name] for name in updatable},
+            where=or_(
+                *(
+                    table.c[name].is_distinct_from(statement.excluded[name])
+                    for name in compared
+                )
+            ),
+        )
+    else:
+        statement = statement.on_conflict_do_nothing()
+
+    result = connection.execute(statement, rows)
+    return max(result.rowcount, 0)
+
+
+def upsert_models(
+    engine: Engine, models: list[SQLModel], on_conflict: OnConflict
+) -> dict[str, int]:
+    """Write SQLModel objects to the database with upserts.
+
+    All rows are written in one transaction. Tables are processed in the
+    order of their foreign keys, so referenced rows are written first. Rows
+    without a primary key get one from the database.
+
+    Args:
+        engine: the engine to write the rows to.
+        models: the SQLModel objects to write.
+        on_conflict: what to do with rows that already exist; `skip` or
+            `update`.
+
+    Raises:
+        UnsupportedDialectError: when the dialect has no native upsert.
+
+    Returns:
+        A dictionary with the table name as key and the number of written
+        rows as value.
+    """
+    if engine.dialect.name not in ('sqlite', 'postgresql'):
+        raise UnsupportedDialectError(
+            f'Dialect "{engine.dialect.name}" does not support upserts'
+        )
+
+    rows_per_table = flatten_models(models)
+    written: dict[str, int] = {}
+
+    with engine.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            if table not in rows_per_table:
+                continue
+
+            # Rows are grouped on their keys, since a executemany needs the
+            # same set of columns for every row.
+            groups: dict[tuple[str, ...], list[dict[str, Any]]] = defaultdict(
+                list
+            )
+            for row in rows_per_table[table]:
+                values = {
+                    name: value
+                    for name, value in row.items()
+                    if value is not None or not table.c[name].primary_key
+                }
+                groups[tuple(values)].append(values)
+
+            written[table.name] = sum(
+                _upsert_rows(connection, table, rows, on_conflict)
+                for rows in groups.values()
+            )
+    return written
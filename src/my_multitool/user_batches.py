@@ -0,0 +1,257 @@
+"""Module with the bulk changes for users.
+
+This module contains the functions to create, update and delete users from
+records, like the records read by `read_records`. The records are processed in
+batches and every batch is applied in its own transaction. When a batch fails,
+only that batch is rolled back and the error is reported for the batch, so one
+invalid record doesn't block the rest of a large file.
+"""
+
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+
+from my_data.context import UserContext
+from my_data.exceptions import MyDataError
+from my_data.my_data import MyData
+from my_model import User, UserRole
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+
+from .exceptions import InvalidRecordsError
+from .passwords import hash_passwords
+from .records import batched
+from .timings import timings
+
+# The fields that can be given in the records for users. The password is
+# hashed before it is stored.
+USER_FIELDS = ('fullname', 'username', 'email', 'role', 'password')
+
+# A record with the number of the record in the file
+NumberedRecord = tuple[int, dict[str, Any]]
+
+
+class BatchResult(BaseModel):
+    """The result of a batch.
+
+    Attributes:
+        batch: the number of the batch, starting at 1.
+        first_record: the number of the first record in the batch.
+        last_record: the number of the last record in the batch.
+        error: the reason the batch failed, or None if it succeeded.
+    """
+
+    batch: int
+    first_record: int
+    last_record: int
+    error: str | None = None
+
+    @property
+    def records(self) -> int:
+        """The number of records in the batch.
+
+        Returns:
+            The number of records.
+        """
+        return self.last_record - self.first_record + 1
+
+
+def get_user_fields(record: dict[str, Any], number: int) -> dict[str, Any]:
+    """Get the fields for a user from a record.
+
+    Empty values are left out, so a CSV file can leave fields empty that
+    should not be changed. Roles are given by their name, like `user`.
+
+    Args:
+        record: the record.
+        number: the number of the record, for error messages.
+
+    Raises:
+        InvalidRecordsError: when the record has unknown fields or a invalid
+            role.
+
+    Returns:
+        The fields that are set in the record.
+    """
+    unknown = sorted(set(record) - set(USER_FIELDS))
+    if unknown:
+        raise InvalidRecordsError(
+            f'Record {number} has unknown fields: {", ".join(unknown)}'
+        )
+    fields = {
+        key: value for key, value in record.items() if value not in (None, '')
+    }
+    if 'role' in fields:
+        try:
+            fields['role'] = UserRole[str(fields['role']).upper()]
+        except KeyError as exc:
+            raise InvalidRecordsError(
+                f'Record {number} has a invalid role "{fields["role"]}"'
+            ) from exc
+    return fields
+
+
+def _validate_user(user_fields: dict[str, Any], number: int) -> User:
+    try:
+        return User.model_validate(user_fields)
+    except ValidationError as exc:
+        fields = ', '.join(str(error['loc'][0]) for error in exc.errors())
+        raise InvalidRecordsError(
+            f'Record {number} has invalid fields: {fields}'
+        ) from exc
+
+
+def _set_passwords(
+    users: list[tuple[User, str | None]], workers: int | None
+) -> None:
+    with_password = [(user, password) for user, password in users if password]
+    with timings.phase('password hashing'):
+        hashes = hash_passwords(
+            [password for _, password in with_password], workers=workers
+        )
+    for (user, _), (password_hash, password_date) in zip(
+        with_password, hashes
+    ):
+        user.password_hash = password_hash
+        user.password_date = password_date
+
+
+def _retrieve_users(
+    context: UserContext, records: list[NumberedRecord]
+) -> dict[str, User]:
+    usernames: dict[str, int] = {}
+    for number, record in records:
+        username = record.get('username')
+        if not username:
+            raise InvalidRecordsError(f'Record {number} has no username')
+        if username in usernames:
+            raise InvalidRecordsError(
+                f'Record {number} has the same username as record '
+                + str(usernames[username])
+            )
+        usernames[username] = number
+
+    users = {
+        user.username: user
+        for user in context.users.retrieve(
+            User.username.in_(list(usernames))  # type: ignore
+        )
+    }
+    missing = [username for username in usernames if username not in users]
+    if missing:
+        raise InvalidRecordsError(
+            f'Record {usernames[missing[0]]}: user "{missing[0]}" not found'
+        )
+    return users
+
+
+def create_users(
+    context: UserContext,
+    records: list[NumberedRecord],
+    workers: int | None = None,
+) -> None:
+    """Create users from records.
+
+    Args:
+        context: the context to create the users in.
+        records: the numbered records with the fields for the users.
+        workers: the number of processes to hash passwords with.
+    """
+    users: list[tuple[User, str | None]] = []
+    for number, record in records:
+        user_fields = get_user_fields(record, number)
+        password = user_fields.pop('password', None)
+        users.append((_validate_user(user_fields, number), password))
+    _set_passwords(users, workers)
+    context.users.create([user for user, _ in users])
+
+
+def update_users(
+    context: UserContext,
+    records: list[NumberedRecord],
+    workers: int | None = None,
+) -> None:
+    """Update users from records.
+
+    The users are found by their username. Only the fields that are set in
+    a record are changed.
+
+    Args:
+        context: the context to update the users in.
+        records: the numbered records with the username and the fields to
+            change.
+        workers: the number of processes to hash passwords with.
+    """
+    fields = [
+        (number, get_user_fields(record, number)) for number, record in records
+    ]
+    users = _retrieve_users(context, fields)
+    passwords: list[tuple[User, str | None]] = []
+    for number, user_fields in fields:
+        user = users[user_fields.pop('username')]
+        passwords.append((user, user_fields.pop('password', None)))
+        for key, value in user_fields.items():
+            setattr(user, key, value)
+        _validate_user(user.model_dump(), number)
+    _set_passwords(passwords, workers)
+    context.users.update(list(users.values()))
+
+
+def delete_users(context: UserContext, records: list[NumberedRecord]) -> None:
+    """Delete users from records.
+
+    The users are found by their username. Other fields in the records are
+    ignored, so the output of `users list` can be used as input.
+
+    Args:
+        context: the context to delete the users in.
+        records: the numbered records with the usernames.
+    """
+    context.users.delete(list(_retrieve_users(context, records).values()))
+
+
+def apply_in_batches(
+    data: MyData,
+    user: User,
+    records: Iterable[dict[str, Any]],
+    action: Callable[[UserContext, list[NumberedRecord]], None],
+    batch_size: int = 500,
+    stop_on_error: bool = False,
+) -> Iterator[BatchResult]:
+    """Apply a action to records in batches.
+
+    Every batch is applied in its own transaction. When a batch fails, the
+    transaction is rolled back and the error is set in the result for the
+    batch.
+
+    Args:
+        data: the data object for the database.
+        user: the user to create the contexts for.
+        records: the records to apply the action to.
+        action: the function to apply to a batch, like `create_users`.
+        batch_size: the maximum number of records per batch.
+        stop_on_error: if set to True, no batches are applied after a failed
+            batch.
+
+    Yields:
+        The result for every batch, after the batch is applied.
+    """
+    numbered_records = enumerate(records, start=1)
+    for number, batch in enumerate(
+        batched(numbered_records, batch_size), start=1
+    ):
+        result = BatchResult(
+            batch=number, first_record=batch[0][0], last_record=batch[-1][0]
+        )
+        try:
+            with (
+                timings.phase('data load'),
+                data.get_context(user=user) as context,
+            ):
+                action(context, batch)
+        except (InvalidRecordsError, MyDataError, SQLAlchemyError) as exc:
+            # Database errors span multiple lines with the statement and
+            # parameters; the first line has the reason.
+            result.error = str(exc).splitlines()[0]
+        yield result
+        if result.error and stop_on_error:
+            return
@@ -0,0 +1,201 @@
+"""Module with the retrieval of users for listings.
+
+This module contains the functions to filter users in the database and to
+retrieve them in chunks. Users are retrieved in the order of their ID and
+every chunk starts after the last ID of the previous chunk (keyset
+pagination). Unlike `OFFSET`, this stays fast for the last pages of a large
+table and only one chunk is kept in memory.
+
+The queries run in the session of the context, like the queries of the
+resource managers of My Data, so no extra connection is used.
+"""
+
+from collections.abc import Iterator, Sequence
+
+from my_data.context import UserContext
+from my_model import User, UserRole
+from pydantic import BaseModel
+from sqlalchemy import RowMapping, func, select
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import Session
+
+from .timings import timings
+
+# The columns that are displayed in listings. The second factor is a secret,
+# so only whether it is set is selected.
+USER_ROW_COLUMNS = (
+    User.id,
+    User.fullname,
+    User.username,
+    User.role,
+    User.second_factor.is_not(None).label('second_factor'),  # type: ignore
+)
+
+
+class UserRow(BaseModel):
+    """A user in a listing.
+
+    Attributes:
+        id: the ID of the user.
+        fullname: the full name of the user.
+        username: the username of the user.
+        role: the role of the user.
+        second_factor: whether the user has a second factor.
+    """
+
+    id: int
+    fullname: str
+    username: str
+    role: UserRole
+    second_factor: bool
+
+
+class UserGroup(BaseModel):
+    """The number of users with a role and second factor status.
+
+    Attributes:
+        role: the role of the users.
+        second_factor: whether the users have a second factor.
+        users: the number of users.
+    """
+
+    role: UserRole
+    second_factor: bool
+    users: int
+
+
+def _get_session(context: UserContext) -> Session:
+    """Get the database session of a context.
+
+    My Data doesn't expose the session of a context; its retrievers use the
+    context data as well.
+
+    Args:
+        context: the context to get the session for.
+
+    Returns:
+        The session of the context.
+    """
+    return context._context_data.db_session  # noqa: SLF001
+
+
+def get_user_filters(
+    roles: list[UserRole] | None = None,
+    username_prefix: str | None = None,
+    email_domain: str | None = None,
+    second_factor: bool | None = None,
+) -> list[ColumnElement[bool]]:
+    """Create the SQL filters for users.
+
+    The filters are added to the `WHERE` clause of the query, so only the
+    matching users are retrieved from the database.
+
+    Args:
+        roles: only users with one of these roles.
+        username_prefix: only users with a username that starts with this.
+        email_domain: only users with a email address in this domain.
+        second_factor: only users with (True) or without (False) a second
+            factor.
+
+    Returns:
+        A list with the filters.
+    """
+    filters: list[ColumnElement[bool]] = []
+    if roles:
+        filters.append(User.role.in_(roles))  # type: ignore
+    if username_prefix:
+        filters.append(
+            User.username.startswith(  # type: ignore
+                username_prefix, autoescape=True
+            )
+        )
+    if email_domain:
+        # `LIKE` is case-sensitive in some databases, like PostgreSQL, so
+        # both sides are lowercased.
+        filters.append(
+            func.lower(User.email).endswith(
+                f'@{email_domain.lower()}', autoescape=True
+            )
+        )
+    if second_factor is True:
+        filters.append(User.second_factor.is_not(None))  # type: ignore
+    elif second_factor is False:
+        filters.append(User.second_factor.is_(None))  # type: ignore
+    return filters
+
+
+def iter_user_rows(
+    context: UserContext,
+    flt: list[ColumnElement[bool]] | None = None,
+    after_id: int | None = None,
+    limit: int | None = None,
+    chunk_size: int = 1000,
+) -> Iterator[Sequence[RowMapping]]:
+    """Retrieve the listed columns of users in chunks, ordered by ID.
+
+    Selects only the columns that are displayed in listings and returns them
+    as rows instead of `User` objects. This skips loading the password hashes
+    and creating ORM objects, which is most of the work when listing a lot of
+    users. The filters of the context are applied, so the same users are
+    returned as with `context.users.retrieve`.
+
+    Args:
+        context: the context to retrieve the users with.
+        flt: additional filters for the users.
+        after_id: only retrieve users with a ID higher than this.
+        limit: the maximum number of users to retrieve.
+        chunk_size: the maximum number of users per chunk.
+
+    Yields:
+        Lists with at most `chunk_size` rows with the keys `id`, `fullname`,
+        `username`, `role` and `second_factor`.
+    """
+    filters = context.users.retriever.get_context_filters() + list(flt or [])
+    session = _get_session(context)
+    remaining = limit
+    last_id = after_id
+    while remaining is None or remaining > 0:
+        size = chunk_size if remaining is None else min(chunk_size, remaining)
+        query = select(*USER_ROW_COLUMNS).where(*filters)  # type: ignore
+        if last_id is not None:
+            query = query.where(User.id > last_id)  # type: ignore
+        query = query.order_by(User.id).limit(size)  # type: ignore
+        with timings.phase('data load'):
+            rows = session.execute(query).mappings().all()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < size:
+            return
+        last_id = rows[-1]['id']
+        if remaining is not None:
+            remaining -= len(rows)
+
+
+def summarize_users(
+    context: UserContext, flt: list[ColumnElement[bool]] | None = None
+) -> list[UserGroup]:
+    """Count users per role and second factor status.
+
+    Runs one `GROUP BY` query in the database, so no users are loaded.
+
+    Args:
+        context: the context to count the users with.
+        flt: additional filters for the users.
+
+    Returns:
+        The number of users for every combination of role and second factor
+        status that has users, ordered by role.
+    """
+    filters = context.users.retriever.get_context_filters() + list(flt or [])
+    second_factor = User.second_factor.is_not(None)  # type: ignore
+    query = (
+        select(User.role, second_factor, func.count())  # type: ignore
+        .where(*filters)
+        .group_by(User.role, second_factor)
+    )
+    groups = [
+        UserGroup(role=role, second_factor=bool(has_factor), users=users)
+        for role, has_factor, users in _get_session(context).execute(query)
+    ]
+    return sorted(groups, key=lambda x: (x.role.value, x.second_factor))
@@ -0,0 +1,34 @@
+"""Tests for the benchmark helpers."""
+
+import pytest
+from my_multitool.benchmark import percentile, summarize
+
+
+@pytest.mark.parametrize(
+    'values, pct, expected',
+    [
+        ([], 50, 0.0),
+        ([1.0], 99, 1.0),
+        ([1.0, 2.0, 3.0, 4.0], 50, 2.5),
+        ([4.0, 3.0, 2.0, 1.0], 0, 1.0),
+        ([4.0, 3.0, 2.0, 1.0], 100, 4.0),
+    ],
+)
+def test_percentile(values: list[float], pct: float, expected: float) -> None:
+    """Test the calculation of percentiles.
+
+    Args:
+        values: the values to calculate the percentile for.
+        pct: the percentile to calculate.
+        expected: the expected percentile.
+    """
+    assert percentile(values, pct) == pytest.approx(expected)
+
+
+def test_summarize() -> None:
+    """Test the summary for a list of latencies."""
+    result = summarize('test', [0.5, 0.5], operations=10)
+    assert result.operations == 10
+    assert result.total_seconds == 1.0
+    assert result.throughput == 10.0
+    assert result.max_ms == 500.0
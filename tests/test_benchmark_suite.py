@@ -0,0 +1,105 @@
+"""Tests for the benchmark suite."""
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+from my_multitool.benchmark_suite import (
+    BenchmarkSuite,
+    SuiteHistory,
+    SuiteRun,
+    compare_runs,
+    get_users_data,
+    load_history,
+    save_history,
+)
+from my_multitool.exceptions import BenchmarkSuiteError
+
+
+def get_run(metrics: dict[str, float]) -> SuiteRun:
+    """Create a run with metrics.
+
+    Args:
+        metrics: the metrics for the run.
+
+    Returns:
+        The run.
+    """
+    return SuiteRun(
+        timestamp=datetime.now(tz=timezone.utc),
+        version='1.0.0',
+        python='3.11.0',
+        metrics=metrics,
+    )
+
+
+def test_compare_runs() -> None:
+    """Test that the last run is compared with the median of earlier runs."""
+    history = SuiteHistory(
+        runs=[
+            get_run({'cli cold start': 1.0, 'set_password': 0.2}),
+            get_run({'cli cold start': 5.0, 'set_password': 0.2}),
+            get_run({'cli cold start': 1.0, 'set_password': 0.2}),
+            get_run({'cli cold start': 1.1, 'set_password': 0.3, 'new': 1.0}),
+        ]
+    )
+    comparisons = {
+        comparison.name: comparison
+        for comparison in compare_runs(history, threshold=0.2)
+    }
+    assert set(comparisons) == {'cli cold start', 'set_password'}
+    assert comparisons['cli cold start'].baseline == 1.0
+    assert not comparisons['cli cold start'].regression
+    assert comparisons['set_password'].change == pytest.approx(0.5)
+    assert comparisons['set_password'].regression
+
+
+def test_compare_without_runs() -> None:
+    """Test that comparing needs at least two runs."""
+    with pytest.raises(BenchmarkSuiteError):
+        compare_runs(SuiteHistory(runs=[get_run({})]))
+
+
+def test_history(tmp_path: Path) -> None:
+    """Test saving and loading the history file.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    path = str(tmp_path / 'history.json')
+    assert load_history(path).runs == []
+    history = SuiteHistory(runs=[get_run({'cli cold start': 1.0})])
+    save_history(path, history)
+    assert load_history(path) == history
+
+
+def test_users_data() -> None:
+    """Test the users for the import and listing benchmarks."""
+    users = get_users_data(10)['users']
+    assert len(users) == 12
+    assert len({user['username'] for user in users}) == 12
+
+
+def test_suite_run(tmp_path: Path) -> None:
+    """Test a run of the suite with small sizes.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    suite_run = BenchmarkSuite(
+        str(tmp_path),
+        repeat=1,
+        config_contexts=(10,),
+        import_rows=(10,),
+        list_users=10,
+        password_updates=1,
+    ).run()
+    assert list(suite_run.metrics) == [
+        'cli cold start',
+        'config save (10 contexts)',
+        'config load (10 contexts)',
+        'database import-json (10 rows)',
+        'users list (10 users)',
+        'set_password',
+    ]
+    assert all(value > 0 for value in suite_run.metrics.values())
@@ -3,13 +3,17 @@
 Test the `config contexts` command of the script.
 """
 
+import json
 import logging
 import re
+from pathlib import Path
 
 import pytest
 from my_multitool.__main__ import app
 from my_multitool.config import ConfigManager
 from my_multitool.exceptions import GenericCLIError
+from my_multitool.log_pipeline import log_pipeline
+from my_multitool.models import LogFormat
 from typer.testing import CliRunner
 
 runner = CliRunner(echo_stdin=True)
@@ -33,6 +37,26 @@ def test_context_list(config_object: ConfigManager) -> None:
         )
 
 
+def test_context_list_json(config_object: ConfigManager) -> None:
+    """Run the `config contexts list` subcommand with JSON output.
+
+    Args:
+        config_object: fixture for the config object.
+    """
+    result = runner.invoke(
+        app, ['config', 'contexts', 'list', '--output', 'json']
+    )
+    assert result.exit_code == 0
+    contexts = json.loads(result.stdout)
+    assert [context['name'] for context in contexts] == list(
+        config_object.contexts
+    )
+    assert [context['name'] for context in contexts if context['active']] == [
+        config_object.full_config.active_context
+    ]
+    assert contexts[2]['warning'] is True
+
+
 @pytest.mark.parametrize(
     'name, db_string, warning, service_user, service_pass, root_user',
     [
@@ -268,6 +292,39 @@ def test_context_set(  # noqa: PLR0912
         assert config_object.contexts[name].root_user == root_user
 
 
+@pytest.mark.parametrize('profile', ['safe', 'bulk-load'])
+def test_context_sqlite_profile(
+    config_object: ConfigManager, profile: str
+) -> None:
+    """Set the SQLite profile when creating and updating contexts.
+
+    Args:
+        config_object: fixture for the config object.
+        profile: the profile to set.
+    """
+    result = runner.invoke(
+        app,
+        [
+            'config',
+            'contexts',
+            'create',
+            'tuned',
+            'sqlite:///test.db',
+            '--sqlite-profile',
+            profile,
+        ],
+    )
+    assert result.exit_code == 0
+    assert config_object.contexts['tuned'].sqlite_profile == profile
+
+    result = runner.invoke(
+        app,
+        ['config', 'contexts', 'set', 'tuned', '--sqlite-profile', 'default'],
+    )
+    assert result.exit_code == 0
+    assert config_object.contexts['tuned'].sqlite_profile == 'default'
+
+
 def test_context_rename_active_context(config_object: ConfigManager) -> None:
     """Rename a active context.
 
@@ -346,3 +403,212 @@ def test_set_logging_level(
     result = runner.invoke(app, ['config', 'set-logging-level', level_string])
     assert result.exit_code == 0
     assert config_object.full_config.logging_level == level_value
+
+
+def test_set_logging_format(
+    config_object: ConfigManager, tmp_path: Path
+) -> None:
+    """Test if we can set the format and file for log messages.
+
+    Args:
+        config_object: fixture for the config object.
+        tmp_path: a temporary directory.
+    """
+    log_file = str(tmp_path / 'my_multitool.log')
+    result = runner.invoke(
+        app,
+        ['config', 'set-logging-format', 'json', '--log-file', log_file],
+    )
+    assert result.exit_code == 0
+    assert config_object.full_config.log_format == LogFormat.JSON
+    assert config_object.full_config.log_file == log_file
+
+    result = runner.invoke(
+        app,
+        ['config', 'set-logging-format', 'json', '--log-file', log_file]
+        + ['--no-log-file'],
+    )
+    assert isinstance(result.exception, GenericCLIError)
+
+    result = runner.invoke(
+        app, ['config', 'set-logging-format', 'text', '--no-log-file']
+    )
+    assert result.exit_code == 0
+    assert config_object.full_config.log_format == LogFormat.TEXT
+    assert config_object.full_config.log_file is None
+
+
+def test_log_format_option(
+    config_object: ConfigManager, tmp_path: Path
+) -> None:
+    """Test if the log format can be given for one command.
+
+    Args:
+        config_object: fixture for the config object.
+        tmp_path: a temporary directory.
+    """
+    log_file = tmp_path / 'my_multitool.log'
+    config_object.full_config.logging_level = logging.DEBUG
+    result = runner.invoke(
+        app,
+        ['--log-format', 'json', '--log-file', str(log_file)]
+        + ['config', 'set-cache', '--ttl', '30'],
+    )
+    assert result.exit_code == 0
+    entries = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert [entry['logger'] for entry in entries] == ['set_cache']
+    assert entries[0]['level'] == 'DEBUG'
+    assert logging.getLogger().level != logging.DEBUG
+
+
+def test_log_format_option_restores_pipeline(
+    config_object: ConfigManager, tmp_path: Path
+) -> None:
+    """Test if messages after the command are written with the config.
+
+    Args:
+        config_object: fixture for the config object.
+        tmp_path: a temporary directory.
+    """
+    configured_file = tmp_path / 'configured.log'
+    log_pipeline.start(logging.INFO, LogFormat.TEXT, str(configured_file))
+    try:
+        result = runner.invoke(
+            app,
+            ['--log-format', 'json', '--log-file', str(tmp_path / 'cli.log')]
+            + ['config', 'set-cache', '--ttl', '30'],
+        )
+        assert result.exit_code == 0
+        assert log_pipeline.settings is not None
+        assert log_pipeline.settings.log_file == str(configured_file)
+        logging.getLogger('after-command').warning('Written')
+    finally:
+        log_pipeline.stop()
+    assert 'after-command: Written' in configured_file.read_text()
+
+
+def test_set_cache(config_object: ConfigManager, tmp_path: Path) -> None:
+    """Test if we can configure the result cache.
+
+    Args:
+        config_object: fixture for the config object.
+        tmp_path: a temporary directory.
+    """
+    result = runner.invoke(
+        app,
+        [
+            'config',
+            'set-cache',
+            '--enable',
+            '--ttl',
+            '30',
+            '--directory',
+            str(tmp_path),
+        ],
+    )
+    assert result.exit_code == 0
+    settings = config_object.full_config.cache
+    assert settings.enabled
+    assert settings.ttl == 30
+    assert settings.max_size == 16 * 1024 * 1024
+    assert settings.directory == str(tmp_path)
+
+    result = runner.invoke(app, ['config', 'set-cache', '--disable'])
+    assert result.exit_code == 0
+    assert not config_object.full_config.cache.enabled
+    assert config_object.full_config.cache.ttl == 30
+
+    result = runner.invoke(app, ['config', 'set-cache', '--ttl', '0'])
+    assert result.exit_code != 0
+    assert isinstance(result.exception, GenericCLIError)
+
+
+def test_clear_cache(config_object: ConfigManager, tmp_path: Path) -> None:
+    """Test if we can remove all cached results.
+
+    Args:
+        config_object: fixture for the config object.
+        tmp_path: a temporary directory.
+    """
+    directory = tmp_path / 'cache'
+    (directory / 'context').mkdir(parents=True)
+    config_object.full_config.cache.directory = str(directory)
+    result = runner.invoke(app, ['config', 'clear-cache'])
+    assert result.exit_code == 0
+    assert not directory.exists()
+
+
+def test_context_read_replicas(config_object: ConfigManager) -> None:
+    """Test if we can set and remove the read replicas of a context.
+
+    Args:
+        config_object: fixture for the config object.
+    """
+    replicas = ['sqlite:///replica_1.sqlite', 'sqlite:///replica_2.sqlite']
+    result = runner.invoke(
+        app,
+        [
+            'config',
+            'contexts',
+            'create',
+            'with_replicas',
+            'sqlite:///primary.sqlite',
+            '--read-replica',
+            replicas[0],
+            '--read-replica',
+            replicas[1],
+        ],
+    )
+    assert result.exit_code == 0
+    context = config_object.contexts['with_replicas']
+    assert context.read_replicas == replicas
+
+    result = runner.invoke(
+        app,
+        [
+            'config',
+            'contexts',
+            'set',
+            'with_replicas',
+            '--read-replica',
+            replicas[1],
+        ],
+    )
+    assert result.exit_code == 0
+    assert context.read_replicas == replicas[1:]
+
+    result = runner.invoke(
+        app,
+        ['config', 'contexts', 'set', 'with_replicas', '--no-read-replicas'],
+    )
+    assert result.exit_code == 0
+    assert context.read_replicas == []
+
+
+def test_context_ping(config_object: ConfigManager, tmp_path: Path) -> None:
+    """Test if we can probe the databases of the contexts.
+
+    Args:
+        config_object: fixture for the config object.
+        tmp_path: a temporary directory.
+    """
+    for number, context in enumerate(config_object.contexts.values()):
+        database = tmp_path / f'database_{number}.sqlite'
+        database.touch()
+        context.db_string = f'sqlite:///{database}'
+    result = runner.invoke(
+        app,
+        ['config', 'contexts', 'ping', '--all', '--output', 'ndjson'],
+    )
+    assert result.exit_code == 0
+    results = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [item['name'] for item in results] == list(config_object.contexts)
+    assert all(item['reachable'] for item in results)
+
+    config_object.active_context.read_replicas = [
+        f'sqlite:///{tmp_path}/missing/replica.sqlite'
+    ]
+    result = runner.invoke(app, ['config', 'contexts', 'ping'])
+    assert result.exit_code != 0
+    assert isinstance(result.exception, GenericCLIError)
+    assert str(result.exception) == 'Cannot reach: "default (replica 1)"'
@@ -1,13 +1,24 @@
 """Tests to test the `database` subcommand for the tool."""
 
+import json
+import re
+from pathlib import Path
 from typing import Any
 
 import pytest
 from _pytest.monkeypatch import MonkeyPatch
+from my_data.data_loader import DataLoader, JSONDataSource
 from my_data.my_data import MyData
+from my_data.my_data_table_creator import MyDataTableCreator
 from my_multitool.__main__ import app
-from my_multitool.globals import config
-from rich.console import Console
+from my_multitool.config import ConfigManager
+from my_multitool.exceptions import (
+    GenericCLIError,
+    SQLError,
+    UnsafeSchemaChangeError,
+)
+from my_multitool.globals import config, get_my_data_object_for_context
+from my_multitool.style import PlainConsole
 from typer.testing import CliRunner
 
 runner = CliRunner(echo_stdin=True)
@@ -29,19 +40,21 @@ def test_database_creation(
 @pytest.mark.parametrize('answer', ['Y', 'y', '', ' Y ', ' y ', '     '])
 def test_database_creation_with_warning_confirm(
     data_object: MyData,  # pylint: disable=unused-argument
+    monkeypatch: MonkeyPatch,
     answer: str,
 ) -> None:
     """Test the creation of the database with a warning and a confirmation.
 
     Args:
         data_object: fixture for the data object.
+        monkeypatch: a monkeypatch fixture.
         answer: the answer to give to the continue question.
     """
 
     def replacement_input(*args: list[Any], **kwargs: dict[Any, Any]) -> str:
         return answer
 
-    Console.input = replacement_input  # type:ignore
+    monkeypatch.setattr(PlainConsole, 'input', replacement_input)
 
     config.active_context.warning = True
     result = runner.invoke(app, ['database', 'create'])
@@ -52,19 +65,21 @@ def test_database_creation_with_warning_confirm(
 @pytest.mark.parametrize('answer', ['N', 'n', 'x'])
 def test_database_creation_with_warning_not_confirm(
     data_object: MyData,  # pylint: disable=unused-argument
+    monkeypatch: MonkeyPatch,
     answer: str,
 ) -> None:
     """Test the creation of the database with a warning and not a confirmation.
 
     Args:
         data_object: fixture for the data object.
+        monkeypatch: a monkeypatch fixture.
         answer: the answer to give to the continue question.
     """
 
     def replacement_input(*args: list[Any], **kwargs: dict[Any, Any]) -> str:
         return answer
 
-    Console.input = replacement_input  # type:ignore
+    monkeypatch.setattr(PlainConsole, 'input', replacement_input)
 
     config.active_context.warning = True
     result = runner.invoke(app, ['database', 'create'])
@@ -154,3 +169,718 @@ def test_database_import_json_integrity_error(
         app, ['database', 'import-json', 'tests/test_data.json']
     )
     assert result.exit_code == 1
+
+
+def test_database_import_json_echo_sql(
+    data_object_with_tables: MyData, monkeypatch: MonkeyPatch
+) -> None:
+    """Test that `--echo-sql` prints the statements with their latency.
+
+    Args:
+        data_object_with_tables: fixture for the data object.
+        monkeypatch: a monkeypatch fixture.
+    """
+
+    def replacement_data(*args: list[Any], **kwargs: dict[Any, Any]) -> MyData:
+        return data_object_with_tables
+
+    monkeypatch.setattr(
+        'my_multitool.cli_database.get_my_data_object_for_context',
+        replacement_data,
+    )
+
+    result = CliRunner(echo_stdin=True, mix_stderr=False).invoke(
+        app,
+        ['database', 'import-json', 'tests/test_data.json', '--echo-sql'],
+    )
+    assert result.exit_code == 0
+    assert re.search(
+        r'^\[[0-9.]+ ms, [0-9]+ rows\] INSERT INTO .* -- parameters: ',
+        result.stderr,
+        re.M,
+    )
+    assert 'INSERT INTO' not in result.stdout
+
+
+@pytest.mark.parametrize('on_conflict', ['skip', 'update'])
+def test_database_import_json_on_conflict(
+    data_object_with_database: MyData,
+    monkeypatch: MonkeyPatch,
+    on_conflict: str,
+) -> None:
+    """Test the import of a JSON file into a database that contains the data.
+
+    Args:
+        data_object_with_database: fixture for the data object.
+        monkeypatch: a monkeypatch fixture.
+        on_conflict: the strategy for conflicting records.
+    """
+
+    def replacement_data(*args: list[Any], **kwargs: dict[Any, Any]) -> MyData:
+        return data_object_with_database
+
+    monkeypatch.setattr(
+        'my_multitool.cli_database.get_my_data_object_for_context',
+        replacement_data,
+    )
+
+    result = runner.invoke(
+        app,
+        [
+            'database',
+            'import-json',
+            'tests/test_data.json',
+            '--on-conflict',
+            on_conflict,
+        ],
+    )
+    assert result.exit_code == 0
+    assert result.stdout.strip() == 'Imported data'
+
+    with data_object_with_database.get_context_for_service_user() as context:
+        user_account = context.get_user_account_by_username('service.user')
+    assert user_account.verify_credentials('service.user', 'service_password')
+
+
+@pytest.mark.parametrize(
+    'on_conflict, expected_fullname',
+    [('skip', 'Normal user 1'), ('update', 'Changed user')],
+)
+def test_database_import_json_on_conflict_changed_record(
+    data_object_with_database: MyData,
+    monkeypatch: MonkeyPatch,
+    tmp_path: Path,
+    on_conflict: str,
+    expected_fullname: str,
+) -> None:
+    """Test if changed records are only written when updating.
+
+    Args:
+        data_object_with_database: fixture for the data object.
+        monkeypatch: a monkeypatch fixture.
+        tmp_path: a temporary directory.
+        on_conflict: the strategy for conflicting records.
+        expected_fullname: the fullname that is expected after the import.
+    """
+
+    def replacement_data(*args: list[Any], **kwargs: dict[Any, Any]) -> MyData:
+        return data_object_with_database
+
+    monkeypatch.setattr(
+        'my_multitool.cli_database.get_my_data_object_for_context',
+        replacement_data,
+    )
+
+    with open('tests/test_data.json', encoding='utf-8') as input_file:
+        test_data = json.load(input_file)
+    test_data['users'][1]['fullname'] = 'Changed user'
+    test_data['users'][1]['_tags'] = [{'title': 'imported_tag'}]
+    filename = tmp_path / 'changed_data.json'
+    filename.write_text(json.dumps(test_data), encoding='utf-8')
+
+    result = runner.invoke(
+        app,
+        [
+            'database',
+            'import-json',
+            str(filename),
+            '--on-conflict',
+            on_conflict,
+        ],
+    )
+    assert result.exit_code == 0
+
+    with data_object_with_database.get_context_for_service_user() as context:
+        user_account = context.get_user_account_by_username('normal.user.1')
+        assert user_account.fullname == expected_fullname
+        assert [tag.title for tag in user_account.tags] == ['imported_tag']
+
+
+def test_database_import_json_on_conflict_without_ids(
+    data_object_with_database: MyData,
+    monkeypatch: MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """Test upserting related records for a parent without a ID.
+
+    Args:
+        data_object_with_database: fixture for the data object.
+        monkeypatch: a monkeypatch fixture.
+        tmp_path: a temporary directory.
+    """
+
+    def replacement_data(*args: list[Any], **kwargs: dict[Any, Any]) -> MyData:
+        return data_object_with_database
+
+    monkeypatch.setattr(
+        'my_multitool.cli_database.get_my_data_object_for_context',
+        replacement_data,
+    )
+
+    test_data = {
+        'api_scopes': [],
+        'api_token_scopes': [],
+        'users': [
+            {
+                'fullname': 'New user',
+                'username': 'new.user',
+                'email': 'new.user@example.com',
+                '_tags': [{'title': 'new_tag'}],
+            }
+        ],
+    }
+    filename = tmp_path / 'data_without_ids.json'
+    filename.write_text(json.dumps(test_data), encoding='utf-8')
+
+    result = runner.invoke(
+        app,
+        ['database', 'import-json', str(filename), '--on-conflict', 'skip'],
+    )
+    assert result.exit_code == 1
+    assert isinstance(result.exception, GenericCLIError)
+
+
+def test_database_sync_schema_dry_run(
+    data_object: MyData, monkeypatch: MonkeyPatch
+) -> None:
+    """Test the dry run of the schema synchronisation on a empty database.
+
+    Args:
+        data_object: fixture for the data object.
+        monkeypatch: a monkeypatch fixture.
+    """
+
+    def replacement_data(*args: list[Any], **kwargs: dict[Any, Any]) -> MyData:
+        return data_object
+
+    monkeypatch.setattr(
+        'my_multitool.cli_database.get_my_data_object_for_context',
+        replacement_data,
+    )
+
+    result = runner.invoke(app, ['database', 'sync-schema', '--dry-run'])
+    assert result.exit_code == 0
+    assert 'CREATE TABLE user' in result.stdout
+    assert 'CREATE TABLE apitokenscope' in result.stdout
+
+
+def test_database_sync_schema_up_to_date(
+    data_object_with_tables: MyData, monkeypatch: MonkeyPatch
+) -> None:
+    """Test the schema synchronisation on a database that is up to date.
+
+    Args:
+        data_object_with_tables: fixture for the data object.
+        monkeypatch: a monkeypatch fixture.
+    """
+
+    def replacement_data(*args: list[Any], **kwargs: dict[Any, Any]) -> MyData:
+        return data_object_with_tables
+
+    monkeypatch.setattr(
+        'my_multitool.cli_database.get_my_data_object_for_context',
+        replacement_data,
+    )
+
+    result = runner.invoke(app, ['database', 'sync-schema'])
+    assert result.exit_code == 0
+    assert result.stdout.strip() == 'Schema is up to date'
+
+
+def test_database_sync_schema_missing_column(
+    data_object_with_database: MyData, monkeypatch: MonkeyPatch
+) -> None:
+    """Test the schema synchronisation on a database with a missing column.
+
+    Args:
+        data_object_with_database: fixture for the data object.
+        monkeypatch: a monkeypatch fixture.
+    """
+
+    def replacement_data(*args: list[Any], **kwargs: dict[Any, Any]) -> MyData:
+        return data_object_with_database
+
+    monkeypatch.setattr(
+        'my_multitool.cli_database.get_my_data_object_for_context',
+        replacement_data,
+    )
+
+    engine = data_object_with_database.database_engine
+    assert engine is not None
+    with engine.begin() as connection:
+        connection.exec_driver_sql('ALTER TABLE tag DROP COLUMN color')
+        connection.exec_driver_sql('DROP TABLE usersetting')
+
+    result = runner.invoke(app, ['database', 'sync-schema', '--dry-run'])
+    assert result.exit_code == 0
+    assert 'ALTER TABLE tag ADD COLUMN color VARCHAR;' in result.stdout
+    assert 'CREATE TABLE usersetting' in result.stdout
+
+    result = runner.invoke(app, ['database', 'sync-schema'])
+    assert result.exit_code == 0
+    assert result.stdout.strip() == 'Applied 2 schema changes'
+
+    # The existing data should still be there
+    with data_object_with_database.get_context_for_service_user() as context:
+        user_account = context.get_user_account_by_username('normal.user.1')
+    assert user_account.username == 'normal.user.1'
+
+
+def test_database_sync_schema_unsafe_column(
+    data_object: MyData,  # pylint: disable=unused-argument
+    monkeypatch: MonkeyPatch,
+) -> None:
+    """Test that columns that cannot be added stop the synchronisation.
+
+    Args:
+        data_object: fixture for the data object.
+        monkeypatch: a monkeypatch fixture.
+    """
+
+    def unsafe_changes(*args: Any, **kwargs: Any) -> list[str]:  # noqa: ANN401
+        raise UnsafeSchemaChangeError('tag.color')
+
+    monkeypatch.setattr(
+        'my_multitool.cli_database.get_schema_changes', unsafe_changes
+    )
+    result = runner.invoke(app, ['database', 'sync-schema', '--dry-run'])
+    assert result.exit_code == 1
+    assert isinstance(result.exception, GenericCLIError)
+    assert str(result.exception) == 'tag.color'
+
+
+def test_database_sync_schema_database_error(
+    data_object_with_database: MyData, monkeypatch: MonkeyPatch
+) -> None:
+    """Test that errors from the database are raised as SQL errors.
+
+    Args:
+        data_object_with_database: fixture for the data object.
+        monkeypatch: a monkeypatch fixture.
+    """
+
+    def replacement_data(*args: list[Any], **kwargs: dict[Any, Any]) -> MyData:
+        return data_object_with_database
+
+    monkeypatch.setattr(
+        'my_multitool.cli_database.get_my_data_object_for_context',
+        replacement_data,
+    )
+    # The users share roles, so the database refuses the unique index with
+    # a `IntegrityError`
+    monkeypatch.setattr(
+        'my_multitool.cli_database.get_schema_changes',
+        lambda engine: ['CREATE UNIQUE INDEX ix_user_role ON user (role)'],
+    )
+
+    result = runner.invoke(app, ['database', 'sync-schema'])
+    assert result.exit_code == 1
+    assert isinstance(result.exception, SQLError)
+    assert 'UNIQUE constraint failed' in str(result.exception)
+
+
+@pytest.mark.parametrize('answer', ['N', 'n', 'x'])
+def test_database_sync_schema_with_warning_not_confirm(
+    data_object: MyData, monkeypatch: MonkeyPatch, answer: str
+) -> None:
+    """Test the schema synchronisation with a warning and no confirmation.
+
+    Args:
+        data_object: fixture for the data object.
+        monkeypatch: a monkeypatch fixture.
+        answer: the answer to give to the continue question.
+    """
+
+    def replacement_data(*args: list[Any], **kwargs: dict[Any, Any]) -> MyData:
+        return data_object
+
+    def replacement_input(*args: list[Any], **kwargs: dict[Any, Any]) -> str:
+        return answer
+
+    monkeypatch.setattr(
+        'my_multitool.cli_database.get_my_data_object_for_context',
+        replacement_data,
+    )
+    monkeypatch.setattr(PlainConsole, 'input', replacement_input)
+
+    config.active_context.warning = True
+    result = runner.invoke(app, ['database', 'sync-schema'])
+    assert result.exit_code == 1
+
+
+@pytest.mark.parametrize('batch_size', ['1', '1000'])
+def test_database_copy(
+    config_object: ConfigManager, tmp_path: Path, batch_size: str
+) -> None:
+    """Test copying all data from one context to another context.
+
+    Args:
+        config_object: fixture for the config object.
+        tmp_path: a temporary directory.
+        batch_size: the batch size for the copy.
+    """
+    config_object.contexts[
+        'context_01'
+    ].db_string = f'sqlite:///{tmp_path}/source.db'
+    config_object.contexts[
+        'context_03'
+    ].db_string = f'sqlite:///{tmp_path}/target.db'
+
+    source = get_my_data_object_for_context('context_01')
+    MyDataTableCreator(my_data_object=source).create_db_tables()
+    DataLoader(
+        my_data_object=source,
+        data_source=JSONDataSource('tests/test_data.json'),
+    ).load()
+
+    result = runner.invoke(
+        app,
+        [
+            'database',
+            'copy',
+            '--from',
+            'context_01',
+            '--to',
+            'context_03',
+            '--batch-size',
+            batch_size,
+        ],
+    )
+    assert result.exit_code == 0
+    assert re.search(r'user\s+4', result.stdout)
+
+    target = get_my_data_object_for_context('context_03')
+    with target.get_context_for_service_user() as context:
+        user_account = context.get_user_account_by_username('normal.user.1')
+        service_account = context.get_user_account_by_username('service.user')
+    assert user_account.id == 2
+    assert service_account.verify_credentials(
+        'service.user', 'service_password'
+    )
+
+
+@pytest.mark.parametrize(
+    'source, target',
+    [
+        ('context_01', 'context_01'),
+        ('context_01', 'non_existing_context'),
+        ('non_existing_context', 'context_01'),
+    ],
+)
+def test_database_copy_wrong_contexts(
+    config_object: ConfigManager,  # pylint: disable=unused-argument
+    source: str,
+    target: str,
+) -> None:
+    """Test copying between wrong contexts.
+
+    Args:
+        config_object: fixture for the config object.
+        source: the context to copy from.
+        target: the context to copy to.
+    """
+    result = runner.invoke(
+        app, ['database', 'copy', '--from', source, '--to', target]
+    )
+    assert result.exit_code == 1
+    assert isinstance(result.exception, GenericCLIError)
+
+
+def test_database_copy_without_source_tables(
+    config_object: ConfigManager, tmp_path: Path
+) -> None:
+    """Test copying from a context without tables.
+
+    Args:
+        config_object: fixture for the config object.
+        tmp_path: a temporary directory.
+    """
+    config_object.contexts[
+        'context_01'
+    ].db_string = f'sqlite:///{tmp_path}/source.db'
+    config_object.contexts[
+        'context_03'
+    ].db_string = f'sqlite:///{tmp_path}/target.db'
+
+    result = runner.invoke(
+        app, ['database', 'copy', '--from', 'context_01', '--to', 'context_03']
+    )
+    assert result.exit_code == 1
+    assert isinstance(result.exception, SQLError)
+
+
+@pytest.mark.parametrize('output', ['table', 'json'])
+def test_database_benchmark(
+    data_object_with_database_with_root_user: MyData,
+    monkeypatch: MonkeyPatch,
+    output: str,
+) -> None:
+    """Test the benchmark of the database.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        monkeypatch: a monkeypatch fixture.
+        output: the output format.
+    """
+    db = data_object_with_database_with_root_user
+
+    def replacement_data(*args: list[Any], **kwargs: dict[Any, Any]) -> MyData:
+        return db
+
+    monkeypatch.setattr(
+        'my_multitool.cli_database.get_my_data_object_for_context',
+        replacement_data,
+    )
+
+    result = runner.invoke(
+        app,
+        [
+            'database',
+            'benchmark',
+            '--users',
+            '5',
+            '--batch-size',
+            '2',
+            '--lookups',
+            '3',
+            '--scans',
+            '2',
+            '--password-updates',
+            '1',
+            '--output',
+            output,
+        ],
+    )
+    assert result.exit_code == 0
+    if output == 'json':
+        results = json.loads(result.stdout)
+        assert [item['name'] for item in results] == [
+            'insert-row',
+            'insert-bulk',
+            'lookup-username',
+            'scan-users',
+            'scan-users-projected',
+            'password-update',
+        ]
+        assert results[1]['operations'] == 5
+    else:
+        assert 'lookup-username' in result.stdout
+
+    # The benchmark users should be removed
+    with db.get_context_for_service_user() as service_context:
+        root_user = service_context.get_user_account_by_username('root')
+    with db.get_context(user=root_user) as user_context:
+        assert user_context.users.count() == 4
+
+
+def test_database_benchmark_without_root_user(
+    data_object_with_database_with_svc_user: MyData,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    """Test the benchmark of the database without a root user.
+
+    Args:
+        data_object_with_database_with_svc_user: a data object with a
+            configured database and a service user.
+        monkeypatch: a monkeypatch fixture.
+    """
+
+    def replacement_data(*args: list[Any], **kwargs: dict[Any, Any]) -> MyData:
+        return data_object_with_database_with_svc_user
+
+    monkeypatch.setattr(
+        'my_multitool.cli_database.get_my_data_object_for_context',
+        replacement_data,
+    )
+
+    result = runner.invoke(app, ['database', 'benchmark'])
+    assert result.exit_code == 1
+    assert isinstance(result.exception, GenericCLIError)
+
+
+@pytest.mark.parametrize('exact', [True, False])
+def test_database_stats(
+    data_object_with_database: MyData, monkeypatch: MonkeyPatch, exact: bool
+) -> None:
+    """Test the statistics for the database.
+
+    Args:
+        data_object_with_database: fixture for the data object.
+        monkeypatch: a monkeypatch fixture.
+        exact: if the rows should be counted.
+    """
+
+    def replacement_data(*args: list[Any], **kwargs: dict[Any, Any]) -> MyData:
+        return data_object_with_database
+
+    monkeypatch.setattr(
+        'my_multitool.cli_database.get_my_data_object_for_context',
+        replacement_data,
+    )
+
+    args = ['database', 'stats', '--output', 'json']
+    if exact:
+        args.append('--exact')
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0
+
+    stats = {item['name']: item for item in json.loads(result.stdout)}
+    assert stats['user']['rows'] == 4
+    assert stats['user']['exact'] == exact
+    assert stats['tag']['rows'] == 0
+    assert stats['tag']['exact']
+    assert stats['user']['size_bytes'] > 0
+
+
+def test_database_stats_table(
+    data_object_with_database: MyData, monkeypatch: MonkeyPatch
+) -> None:
+    """Test the statistics for a analyzed database as a table.
+
+    Args:
+        data_object_with_database: fixture for the data object.
+        monkeypatch: a monkeypatch fixture.
+    """
+
+    def replacement_data(*args: list[Any], **kwargs: dict[Any, Any]) -> MyData:
+        return data_object_with_database
+
+    monkeypatch.setattr(
+        'my_multitool.cli_database.get_my_data_object_for_context',
+        replacement_data,
+    )
+
+    engine = data_object_with_database.database_engine
+    assert engine is not None
+    with engine.begin() as connection:
+        connection.exec_driver_sql('ANALYZE')
+
+    result = runner.invoke(app, ['database', 'stats'])
+    assert result.exit_code == 0
+    assert re.search(r'user\s+~4\s+', result.stdout)
+
+
+def test_database_generate(
+    config_object: ConfigManager, tmp_path: Path
+) -> None:
+    """Test generating data in the database of the active context.
+
+    Args:
+        config_object: fixture for the config object.
+        tmp_path: a temporary directory.
+    """
+    config_object.active_context.db_string = f'sqlite:///{tmp_path}/gen.db'
+    data = get_my_data_object_for_context()
+    MyDataTableCreator(my_data_object=data).create_db_tables()
+    DataLoader(
+        my_data_object=data,
+        data_source=JSONDataSource('tests/test_data.json'),
+    ).load()
+
+    result = runner.invoke(
+        app,
+        [
+            'database',
+            'generate',
+            '--users',
+            '20',
+            '--scopes',
+            '5',
+            '--tokens',
+            '30',
+            '--batch-size',
+            '7',
+        ],
+    )
+    assert result.exit_code == 0
+    assert re.search(r'user\s+20', result.stdout)
+    assert re.search(r'apitoken\s+30', result.stdout)
+
+    with data.get_context_for_service_user() as context:
+        root = context.get_user_account_by_username('root')
+    with data.get_context(user=root) as context:
+        users = context.users.retrieve()
+    assert len(users) == 24
+    generated_ids = [user.id for user in users[4:]]
+    assert None not in generated_ids
+    assert min(user_id for user_id in generated_ids if user_id) == 5
+
+
+@pytest.mark.parametrize('extension', ['json', 'ndjson'])
+def test_database_generate_to_file(
+    config_object: ConfigManager,  # pylint: disable=unused-argument
+    tmp_path: Path,
+    extension: str,
+) -> None:
+    """Test that generated files are the same for the same seed.
+
+    Args:
+        config_object: fixture for the config object.
+        tmp_path: a temporary directory.
+        extension: the extension of the file.
+    """
+    contents = []
+    for name in ('first', 'second'):
+        filename = str(tmp_path / f'{name}.{extension}')
+        result = runner.invoke(
+            app,
+            ['database', 'generate', '--users', '10', '--to-file', filename],
+        )
+        assert result.exit_code == 0
+        assert re.search(r'user\s+10', result.stdout)
+        contents.append(Path(filename).read_text())
+    assert contents[0] == contents[1]
+
+
+def test_database_generate_tokens_to_ndjson(
+    config_object: ConfigManager,  # pylint: disable=unused-argument
+    tmp_path: Path,
+) -> None:
+    """Test that API tokens cannot be written to a NDJSON file.
+
+    Args:
+        config_object: fixture for the config object.
+        tmp_path: a temporary directory.
+    """
+    result = runner.invoke(
+        app,
+        [
+            'database',
+            'generate',
+            '--tokens',
+            '10',
+            '--to-file',
+            str(tmp_path / 'users.ndjson'),
+        ],
+    )
+    assert result.exit_code == 1
+    assert isinstance(result.exception, GenericCLIError)
+
+
+@pytest.mark.parametrize('root_share', ['-0.1', '1.5'])
+def test_database_generate_invalid_root_share(
+    config_object: ConfigManager,  # pylint: disable=unused-argument
+    tmp_path: Path,
+    root_share: str,
+) -> None:
+    """Test that the root share should be between 0 and 1.
+
+    Args:
+        config_object: fixture for the config object.
+        tmp_path: a temporary directory.
+        root_share: the share of root users.
+    """
+    result = runner.invoke(
+        app,
+        [
+            'database',
+            'generate',
+            '--root-share',
+            root_share,
+            '--to-file',
+            str(tmp_path / 'users.ndjson'),
+        ],
+    )
+    assert result.exit_code == 1
+    assert isinstance(result.exception, GenericCLIError)
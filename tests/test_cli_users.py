@@ -1,10 +1,17 @@
 """Tests to test the `users` portion of the CLI app."""
 
+import csv
+import io
+import json
+import re
+from pathlib import Path
 from typing import Any
 
 import pytest
 from _pytest.monkeypatch import MonkeyPatch
+from my_data.exceptions import UnknownUserAccountError
 from my_data.my_data import MyData
+from my_model import User
 from my_multitool.__main__ import app
 from my_multitool.exceptions import GenericCLIError
 from typer.testing import CliRunner
@@ -55,7 +62,7 @@ def test_users_retrieve_with_a_wrong_root_user(
     # always get the same data object.
     monkeypatch.setattr(
         'my_multitool.cli_users.get_my_data_object_for_context',
-        lambda: data_object_with_database_with_wrong_root_user,
+        lambda **kwargs: data_object_with_database_with_wrong_root_user,
     )
     result = runner.invoke(app, ['users', 'list'])
     assert result.exit_code != 0
@@ -76,12 +83,218 @@ def test_users_retrieve(
     # always get the same data object.
     monkeypatch.setattr(
         'my_multitool.cli_users.get_my_data_object_for_context',
-        lambda: data_object_with_database_with_root_user,
+        lambda **kwargs: data_object_with_database_with_root_user,
     )
     result = runner.invoke(app, ['users', 'list'])
     assert result.exit_code == 0
 
 
+@pytest.mark.parametrize(
+    'args, expected_users',
+    [
+        (['--limit', '2'], ['root', 'normal.user.1']),
+        (['--after-id', '2'], ['normal.user.2', 'service.user']),
+        (['--after-id', '1', '--limit', '1'], ['normal.user.1']),
+        (
+            ['--stream', '--chunk-size', '3'],
+            ['root', 'normal.user.1', 'normal.user.2', 'service.user'],
+        ),
+    ],
+)
+def test_users_retrieve_paginated(
+    data_object_with_database_with_root_user: MyData,
+    monkeypatch: MonkeyPatch,
+    args: list[str],
+    expected_users: list[str],
+) -> None:
+    """Test if we can retrieve users in pages and in streaming mode.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        monkeypatch: the mocker.
+        args: the arguments for the `list` command.
+        expected_users: the usernames that should be listed.
+    """
+    monkeypatch.setattr(
+        'my_multitool.cli_users.get_my_data_object_for_context',
+        lambda **kwargs: data_object_with_database_with_root_user,
+    )
+    result = runner.invoke(app, ['users', 'list', *args])
+    assert result.exit_code == 0
+    usernames = re.findall(
+        r'^\s*\d+\s+.+?\s{2,}(\S+)\s{2,}UserRole', result.stdout, re.M
+    )
+    assert usernames == expected_users
+    assert result.stdout.count('Fullname') == 1
+
+
+@pytest.mark.parametrize('output', ['json', 'ndjson', 'csv', 'tsv'])
+def test_users_retrieve_machine_readable(
+    data_object_with_database_with_root_user: MyData,
+    monkeypatch: MonkeyPatch,
+    output: str,
+) -> None:
+    """Test if we can retrieve users in machine-readable formats.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        monkeypatch: the mocker.
+        output: the output format.
+    """
+    monkeypatch.setattr(
+        'my_multitool.cli_users.get_my_data_object_for_context',
+        lambda **kwargs: data_object_with_database_with_root_user,
+    )
+    result = runner.invoke(
+        app, ['users', 'list', '--output', output, '--chunk-size', '2']
+    )
+    assert result.exit_code == 0
+    if output == 'json':
+        users = json.loads(result.stdout)
+    elif output == 'ndjson':
+        users = [json.loads(line) for line in result.stdout.splitlines()]
+    else:
+        users = list(
+            csv.DictReader(
+                io.StringIO(result.stdout),
+                delimiter=',' if output == 'csv' else '\t',
+            )
+        )
+    assert [user['username'] for user in users] == [
+        'root',
+        'normal.user.1',
+        'normal.user.2',
+        'service.user',
+    ]
+    assert users[0]['role'] == 'ROOT'
+
+
+@pytest.mark.parametrize(
+    'args, expected_users',
+    [
+        (['--role', 'root'], ['root']),
+        (['--role', 'root', '--role', 'service'], ['root', 'service.user']),
+        (['--username-prefix', 'normal'], ['normal.user.1', 'normal.user.2']),
+        (['--second-factor', 'yes'], []),
+        (['--second-factor', 'no', '--role', 'service'], ['service.user']),
+    ],
+)
+def test_users_retrieve_filtered(
+    data_object_with_database_with_root_user: MyData,
+    monkeypatch: MonkeyPatch,
+    args: list[str],
+    expected_users: list[str],
+) -> None:
+    """Test if we can filter the users to list.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        monkeypatch: the mocker.
+        args: the arguments for the `list` command.
+        expected_users: the usernames that should be listed.
+    """
+    monkeypatch.setattr(
+        'my_multitool.cli_users.get_my_data_object_for_context',
+        lambda **kwargs: data_object_with_database_with_root_user,
+    )
+    result = runner.invoke(app, ['users', 'list', '--output', 'ndjson', *args])
+    assert result.exit_code == 0
+    users = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [user['username'] for user in users] == expected_users
+
+
+@pytest.mark.parametrize('output', ['table', 'ndjson'])
+def test_users_retrieve_hides_second_factor_secret(
+    data_object_with_database_with_root_user: MyData,
+    monkeypatch: MonkeyPatch,
+    output: str,
+) -> None:
+    """Test that only the status of the second factor is listed.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        monkeypatch: the mocker.
+        output: the output format.
+    """
+    data = data_object_with_database_with_root_user
+    with data.get_context_for_service_user() as context:
+        root = context.get_user_account_by_username('root')
+    with data.get_context(user=root) as context:
+        users = context.users.retrieve(User.id == 2)  # type: ignore
+        secret = users[0].set_random_second_factor()
+        context.users.update(users)
+
+    monkeypatch.setattr(
+        'my_multitool.cli_users.get_my_data_object_for_context',
+        lambda **kwargs: data,
+    )
+    result = runner.invoke(app, ['users', 'list', '--output', output])
+    assert result.exit_code == 0
+    assert secret not in result.stdout
+    if output == 'ndjson':
+        rows = [json.loads(line) for line in result.stdout.splitlines()]
+        assert [row['second_factor'] for row in rows] == [
+            False,
+            True,
+            False,
+            False,
+        ]
+    else:
+        assert re.search(r'normal\.user\.1\s.*\sYes\s*$', result.stdout, re.M)
+
+
+@pytest.mark.parametrize(
+    'args', [['--limit', '0'], ['--stream', '--chunk-size', '0']]
+)
+def test_users_retrieve_invalid_pagination(
+    data_object_with_database_with_root_user: MyData,
+    monkeypatch: MonkeyPatch,
+    args: list[str],
+) -> None:
+    """Test if we get an error for invalid pagination options.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        monkeypatch: the mocker.
+        args: the arguments for the `list` command.
+    """
+    monkeypatch.setattr(
+        'my_multitool.cli_users.get_my_data_object_for_context',
+        lambda **kwargs: data_object_with_database_with_root_user,
+    )
+    result = runner.invoke(app, ['users', 'list', *args])
+    assert isinstance(result.exception, GenericCLIError)
+
+
+def test_users_retrieve_with_sql_summary(
+    data_object_with_database_with_root_user: MyData, monkeypatch: MonkeyPatch
+) -> None:
+    """Test if the SQL summary is printed for users commands.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        monkeypatch: the mocker.
+    """
+    monkeypatch.setattr(
+        'my_multitool.cli_users.get_my_data_object_for_context',
+        lambda **kwargs: data_object_with_database_with_root_user,
+    )
+    result = CliRunner(echo_stdin=True, mix_stderr=False).invoke(
+        app, ['users', '--sql-summary', '--sql-top', '3', 'list']
+    )
+    assert result.exit_code == 0
+    assert 'Slowest statements' in result.stderr
+    assert 'Most frequent statements' in result.stderr
+    assert 'FROM user' in result.stderr
+    assert 'Slowest statements' not in result.stdout
+
+
 def test_user_set_password_without_a_service_user(
     data_object_with_database: MyData,  # pylint: disable=unused-argument
 ) -> None:
@@ -128,7 +341,7 @@ def test_users_set_password_empty_password(
     # always get the same data object.
     monkeypatch.setattr(
         'my_multitool.cli_users.get_my_data_object_for_context',
-        lambda: data_object_with_database_with_root_user,
+        lambda **kwargs: data_object_with_database_with_root_user,
     )
     monkeypatch.setattr('getpass.getpass', replacement_input)
     result = runner.invoke(app, ['users', 'set-password', 'normal.user.1'])
@@ -151,7 +364,7 @@ def test_users_set_password_with_a_wrong_root_user(
     # always get the same data object.
     monkeypatch.setattr(
         'my_multitool.cli_users.get_my_data_object_for_context',
-        lambda: data_object_with_database_with_wrong_root_user,
+        lambda **kwargs: data_object_with_database_with_wrong_root_user,
     )
     result = runner.invoke(app, ['users', 'set-password', 'normal.user.1'])
     assert result.exit_code != 0
@@ -179,7 +392,7 @@ def test_users_set_password_inconsistent_passwords(
     # always get the same data object.
     monkeypatch.setattr(
         'my_multitool.cli_users.get_my_data_object_for_context',
-        lambda: data_object_with_database_with_root_user,
+        lambda **kwargs: data_object_with_database_with_root_user,
     )
     monkeypatch.setattr('getpass.getpass', replacement_input)
     result = runner.invoke(app, ['users', 'set-password', 'normal.user.1'])
@@ -205,7 +418,7 @@ def test_users_set_password_non_existing_user(
     # always get the same data object.
     monkeypatch.setattr(
         'my_multitool.cli_users.get_my_data_object_for_context',
-        lambda: data_object_with_database_with_root_user,
+        lambda **kwargs: data_object_with_database_with_root_user,
     )
     monkeypatch.setattr('getpass.getpass', replacement_input)
     result = runner.invoke(app, ['users', 'set-password', 'non-existing'])
@@ -245,7 +458,7 @@ def test_users_set_password(
     # always get the same data object.
     monkeypatch.setattr(
         'my_multitool.cli_users.get_my_data_object_for_context',
-        lambda: db,
+        lambda **kwargs: db,
     )
     monkeypatch.setattr('getpass.getpass', replacement_input)
 
@@ -255,3 +468,396 @@ def test_users_set_password(
     with db.get_context_for_service_user() as context:
         user_account = context.get_user_account_by_username('normal.user.1')
     assert user_account.verify_credentials('normal.user.1', password)
+
+
+@pytest.mark.parametrize('suffix', ['csv', 'ndjson'])
+def test_users_set_passwords(
+    data_object_with_database_with_root_user: MyData,
+    monkeypatch: MonkeyPatch,
+    tmp_path: Path,
+    suffix: str,
+) -> None:
+    """Test if we can reset the passwords for users from a file.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        monkeypatch: the mocker.
+        tmp_path: a temporary directory.
+        suffix: the extension of the file.
+    """
+    db = data_object_with_database_with_root_user
+    monkeypatch.setattr(
+        'my_multitool.cli_users.get_my_data_object_for_context',
+        lambda **kwargs: db,
+    )
+    passwords = {'normal.user.1': 'pw_one', 'normal.user.2': 'pw_two'}
+    filename = tmp_path / f'passwords.{suffix}'
+    if suffix == 'csv':
+        filename.write_text(
+            'username,password\n'
+            + ''.join(f'{user},{pw}\n' for user, pw in passwords.items())
+        )
+    else:
+        filename.write_text(
+            ''.join(
+                json.dumps({'username': user, 'password': pw}) + '\n'
+                for user, pw in passwords.items()
+            )
+        )
+
+    result = runner.invoke(
+        app,
+        [
+            'users',
+            'set-passwords',
+            '--from-file',
+            str(filename),
+            '--batch-size',
+            '1',
+            '--workers',
+            '1',
+        ],
+    )
+    assert result.exit_code == 0
+    assert 'Updated 2 passwords' in result.stdout
+
+    with db.get_context_for_service_user() as context:
+        for username, password in passwords.items():
+            user_account = context.get_user_account_by_username(username)
+            assert user_account.verify_credentials(username, password)
+
+
+def test_users_set_passwords_generated(
+    data_object_with_database_with_root_user: MyData,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    """Test if we can generate passwords for users read from stdin.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        monkeypatch: the mocker.
+    """
+    db = data_object_with_database_with_root_user
+    monkeypatch.setattr(
+        'my_multitool.cli_users.get_my_data_object_for_context',
+        lambda **kwargs: db,
+    )
+    result = CliRunner().invoke(
+        app,
+        [
+            'users',
+            'set-passwords',
+            '--from-file',
+            '-',
+            '--generate',
+            '--output',
+            'ndjson',
+            '--workers',
+            '1',
+        ],
+        input='{"username": "normal.user.1"}\n',
+    )
+    assert result.exit_code == 0
+    records = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [record['username'] for record in records] == ['normal.user.1']
+
+    with db.get_context_for_service_user() as context:
+        user_account = context.get_user_account_by_username('normal.user.1')
+    assert user_account.verify_credentials(
+        'normal.user.1', records[0]['password']
+    )
+
+
+@pytest.mark.parametrize(
+    'content',
+    [
+        'username,password\nnormal.user.1,pw\nunknown.user,pw\n',
+        'username,password\nnormal.user.1,pw\nnormal.user.1,pw\n',
+        'username,password\nnormal.user.1,\n',
+        'username\nnormal.user.1\n',
+    ],
+)
+def test_users_set_passwords_invalid(
+    data_object_with_database_with_root_user: MyData,
+    monkeypatch: MonkeyPatch,
+    tmp_path: Path,
+    content: str,
+) -> None:
+    """Test if no passwords are changed when a record is invalid.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        monkeypatch: the mocker.
+        tmp_path: a temporary directory.
+        content: the content of the file.
+    """
+    db = data_object_with_database_with_root_user
+    monkeypatch.setattr(
+        'my_multitool.cli_users.get_my_data_object_for_context',
+        lambda **kwargs: db,
+    )
+    with db.get_context_for_service_user() as context:
+        old_hash = context.get_user_account_by_username(
+            'normal.user.1'
+        ).password_hash
+
+    filename = tmp_path / 'passwords.csv'
+    filename.write_text(content)
+    result = runner.invoke(
+        app, ['users', 'set-passwords', '--from-file', str(filename)]
+    )
+    assert result.exit_code != 0
+    assert isinstance(result.exception, GenericCLIError)
+
+    with db.get_context_for_service_user() as context:
+        user_account = context.get_user_account_by_username('normal.user.1')
+    assert user_account.password_hash == old_hash
+
+
+def test_users_set_passwords_missing_file(tmp_path: Path) -> None:
+    """Test if we get an error when the file doesn't exist.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    result = runner.invoke(
+        app,
+        [
+            'users',
+            'set-passwords',
+            '--from-file',
+            str(tmp_path / 'missing.csv'),
+        ],
+    )
+    assert result.exit_code != 0
+    assert isinstance(result.exception, GenericCLIError)
+
+
+def test_users_import(
+    data_object_with_database_with_root_user: MyData,
+    monkeypatch: MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """Test if we can create users from a file and get a batch report.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        monkeypatch: the mocker.
+        tmp_path: a temporary directory.
+    """
+    db = data_object_with_database_with_root_user
+    monkeypatch.setattr(
+        'my_multitool.cli_users.get_my_data_object_for_context',
+        lambda **kwargs: db,
+    )
+    filename = tmp_path / 'users.csv'
+    filename.write_text(
+        'fullname,username,email,role\n'
+        + ''.join(
+            f'User {number},user.{number},user.{number}@example.com,user\n'
+            for number in range(5)
+        )
+    )
+    result = runner.invoke(
+        app,
+        [
+            'users',
+            'import',
+            '--from-file',
+            str(filename),
+            '--batch-size',
+            '2',
+            '--output',
+            'ndjson',
+        ],
+    )
+    assert result.exit_code == 0
+    report = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [batch['status'] for batch in report] == ['ok', 'ok', 'ok']
+
+    with db.get_context_for_service_user() as context:
+        assert context.get_user_account_by_username('user.4').email == (
+            'user.4@example.com'
+        )
+
+
+def test_users_import_failed_batch(
+    data_object_with_database_with_root_user: MyData,
+    monkeypatch: MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """Test if a failed batch is reported and gives a error.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        monkeypatch: the mocker.
+        tmp_path: a temporary directory.
+    """
+    db = data_object_with_database_with_root_user
+    monkeypatch.setattr(
+        'my_multitool.cli_users.get_my_data_object_for_context',
+        lambda **kwargs: db,
+    )
+    filename = tmp_path / 'users.ndjson'
+    filename.write_text(
+        json.dumps(
+            {'fullname': 'A', 'username': 'a.user', 'email': 'a@example.com'}
+        )
+        + '\n'
+        + json.dumps({'fullname': 'B', 'username': 'b.user', 'email': 'b'})
+        + '\n'
+    )
+    result = runner.invoke(
+        app,
+        [
+            'users',
+            'import',
+            '--from-file',
+            str(filename),
+            '--batch-size',
+            '1',
+            '--output',
+            'ndjson',
+        ],
+    )
+    assert result.exit_code != 0
+    assert isinstance(result.exception, GenericCLIError)
+    report = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [batch['error'] for batch in report] == [
+        None,
+        'Record 2 has invalid fields: email',
+    ]
+    assert str(result.exception).startswith('1 of 2 batches failed')
+
+
+def test_users_update_and_delete(
+    data_object_with_database_with_root_user: MyData,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    """Test if we can update and delete users with records from stdin.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        monkeypatch: the mocker.
+    """
+    db = data_object_with_database_with_root_user
+    monkeypatch.setattr(
+        'my_multitool.cli_users.get_my_data_object_for_context',
+        lambda **kwargs: db,
+    )
+    result = CliRunner().invoke(
+        app,
+        ['users', 'update', '--from-file', '-'],
+        input='{"username": "normal.user.1", "fullname": "Renamed"}\n',
+    )
+    assert result.exit_code == 0
+    with db.get_context_for_service_user() as context:
+        user_account = context.get_user_account_by_username('normal.user.1')
+    assert user_account.fullname == 'Renamed'
+
+    result = CliRunner().invoke(
+        app,
+        ['users', 'delete', '--from-file', '-'],
+        input='{"id": 2, "username": "normal.user.1"}\n',
+    )
+    assert result.exit_code == 0
+    with (
+        db.get_context_for_service_user() as context,
+        pytest.raises(UnknownUserAccountError),
+    ):
+        context.get_user_account_by_username('normal.user.1')
+
+
+@pytest.mark.parametrize('command', ['import', 'update', 'delete'])
+def test_users_bulk_missing_file(
+    data_object_with_database_with_root_user: MyData,
+    monkeypatch: MonkeyPatch,
+    tmp_path: Path,
+    command: str,
+) -> None:
+    """Test if we get an error when the file doesn't exist.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        monkeypatch: the mocker.
+        tmp_path: a temporary directory.
+        command: the command to run.
+    """
+    monkeypatch.setattr(
+        'my_multitool.cli_users.get_my_data_object_for_context',
+        lambda **kwargs: data_object_with_database_with_root_user,
+    )
+    result = runner.invoke(
+        app,
+        ['users', command, '--from-file', str(tmp_path / 'missing.csv')],
+    )
+    assert result.exit_code != 0
+    assert isinstance(result.exception, GenericCLIError)
+
+
+@pytest.mark.parametrize(
+    'args, expected',
+    [
+        ([], '4'),
+        (['--role', 'user'], '2'),
+        (['--output', 'json'], '[\n{"users": 4}\n]'),
+        (['--output', 'csv', '--second-factor', 'yes'], 'users\n0'),
+    ],
+)
+def test_users_count(
+    data_object_with_database_with_root_user: MyData,
+    monkeypatch: MonkeyPatch,
+    args: list[str],
+    expected: str,
+) -> None:
+    """Test if we can count users.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        monkeypatch: the mocker.
+        args: the arguments for the `count` command.
+        expected: the expected output.
+    """
+    monkeypatch.setattr(
+        'my_multitool.cli_users.get_my_data_object_for_context',
+        lambda **kwargs: data_object_with_database_with_root_user,
+    )
+    result = runner.invoke(app, ['users', 'count', *args])
+    assert result.exit_code == 0
+    assert result.stdout.strip() == expected
+
+
+def test_users_summary(
+    data_object_with_database_with_root_user: MyData,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    """Test if we can display the number of users per role.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        monkeypatch: the mocker.
+    """
+    monkeypatch.setattr(
+        'my_multitool.cli_users.get_my_data_object_for_context',
+        lambda **kwargs: data_object_with_database_with_root_user,
+    )
+    result = runner.invoke(app, ['users', 'summary', '--output', 'ndjson'])
+    assert result.exit_code == 0
+    assert [json.loads(line) for line in result.stdout.splitlines()] == [
+        {'role': 'ROOT', 'second_factor': False, 'users': 1},
+        {'role': 'SERVICE', 'second_factor': False, 'users': 1},
+        {'role': 'USER', 'second_factor': False, 'users': 2},
+    ]
+
+    result = runner.invoke(app, ['users', 'summary'])
+    assert result.exit_code == 0
+    assert re.search(r'Total\s+4', result.stdout)
@@ -23,10 +23,19 @@ def test_version() -> None:
     assert (
         len(
             re.findall(
-                r'^\s*My Multitool\s+' + mymt_version + r'\s+$',
+                r'^\s*My Multitool\s+' + mymt_version + r'\s*$',
                 result.output,
                 re.MULTILINE,
             )
         )
         == 1
     )
+
+
+def test_version_tsv() -> None:
+    """Run the `version` subcommand with TSV output."""
+    result = runner.invoke(app, ['version', '--output', 'tsv'])
+    assert result.exit_code == 0
+    lines = result.output.splitlines()
+    assert lines[0] == 'library\tversion'
+    assert f'My Multitool\t{mymt_version}' in lines
@@ -0,0 +1,90 @@
+"""Tests for the generator for synthetic data."""
+
+import io
+import json
+from pathlib import Path
+
+from my_data.data_loader import DataLoader, JSONDataSource
+from my_data.my_data import MyData
+from my_model import User, UserRole
+from my_multitool.data_generator import (
+    DataGenerator,
+    write_json,
+    write_ndjson,
+)
+from my_multitool.user_batches import get_user_fields
+
+
+def test_same_seed() -> None:
+    """Test that the same seed gives the same data."""
+    first = DataGenerator(users=50, scopes=3, tokens=40, seed=7)
+    second = DataGenerator(users=50, scopes=3, tokens=40, seed=7)
+    other = DataGenerator(users=50, scopes=3, tokens=40, seed=8)
+    assert list(first.iter_users()) == list(second.iter_users())
+    assert list(first.iter_token_scopes()) == list(second.iter_token_scopes())
+    assert list(first.iter_users()) != list(other.iter_users())
+
+
+def test_records() -> None:
+    """Test that the records are valid and linked to each other."""
+    generator = DataGenerator(users=100, scopes=30, tokens=250, start_id=10)
+    scopes = list(generator.iter_scopes())
+    users = list(generator.iter_users())
+    tokens = [token for user in users for token in user['_api_tokens']]
+    links = list(generator.iter_token_scopes())
+
+    assert len({(scope['module'], scope['subject']) for scope in scopes}) == 30
+    assert len({user['username'] for user in users}) == 100
+    assert [token['id'] for token in tokens] == list(range(10, 260))
+    assert {link['api_token_id'] for link in links} == set(range(10, 260))
+    assert {link['api_scope_id'] for link in links} <= set(range(10, 40))
+    for user in users:
+        fields = {key: value for key, value in user.items() if key[0] != '_'}
+        User.model_validate(fields)
+
+
+def test_write_json(data_object_with_tables: MyData, tmp_path: Path) -> None:
+    """Test that a JSON file can be loaded with `JSONDataSource`.
+
+    Args:
+        data_object_with_tables: a data object with a configured database.
+        tmp_path: a temporary directory.
+    """
+    filename = tmp_path / 'data.json'
+    with open(filename, 'w', encoding='utf-8') as file:
+        written = write_json(DataGenerator(users=5, scopes=2, tokens=4), file)
+    assert written == {
+        'apiscope': 2,
+        'user': 5,
+        'apitoken': 4,
+        'apitokenscope': len(
+            json.loads(filename.read_text())['api_token_scopes']
+        ),
+    }
+    DataLoader(
+        my_data_object=data_object_with_tables,
+        data_source=JSONDataSource(str(filename)),
+    ).load()
+
+
+def test_write_ndjson() -> None:
+    """Test that NDJSON records can be used by `users import`."""
+    file = io.StringIO()
+    assert write_ndjson(DataGenerator(users=3), file) == {'user': 3}
+    for number, line in enumerate(file.getvalue().splitlines(), start=1):
+        fields = get_user_fields(json.loads(line), number)
+        User.model_validate(fields)
+
+
+def test_root_share() -> None:
+    """Test that users only get the `root` role with a root share."""
+    users = list(DataGenerator(users=200).iter_users())
+    assert {user['role'] for user in users} == {UserRole.USER.value}
+
+    users = list(DataGenerator(users=200, root_share=0.5).iter_users())
+    assert {user['role'] for user in users} == {
+        UserRole.USER.value,
+        UserRole.ROOT.value,
+    }
+    users = list(DataGenerator(users=200, root_share=1).iter_users())
+    assert {user['role'] for user in users} == {UserRole.ROOT.value}
@@ -0,0 +1,117 @@
+"""Tests for the logging pipeline."""
+
+import json
+import logging
+from pathlib import Path
+
+from my_multitool.log_pipeline import (
+    JSONFormatter,
+    LogPipeline,
+    MessageQueueHandler,
+)
+from my_multitool.models import LogFormat
+
+
+def test_json_formatter() -> None:
+    """Test that records are formatted as JSON objects."""
+    try:
+        raise ValueError('invalid value')
+    except ValueError as exc:
+        record = logging.LogRecord(
+            'users-import',
+            logging.ERROR,
+            __file__,
+            1,
+            'Batch %d failed',
+            (3,),
+            (type(exc), exc, exc.__traceback__),
+        )
+    record.batch = 3
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry['level'] == 'ERROR'
+    assert entry['logger'] == 'users-import'
+    assert entry['message'] == 'Batch 3 failed'
+    assert entry['batch'] == 3
+    assert 'ValueError: invalid value' in entry['exception']
+    assert entry['time'].endswith('+00:00')
+
+
+def test_queue_handler_merges_arguments() -> None:
+    """Test that the arguments are merged before the record is queued."""
+    items = ['a']
+    record = logging.LogRecord(
+        'test', logging.INFO, __file__, 1, 'Items: %s', (items,), None
+    )
+    prepared = MessageQueueHandler(None).prepare(record)  # type: ignore
+    items.append('b')
+    assert prepared.msg == "Items: ['a']"
+    assert prepared.args is None
+    assert record.args == (items,)
+
+
+def test_log_pipeline(tmp_path: Path) -> None:
+    """Test that messages are written to the log file.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    log_file = tmp_path / 'my_multitool.log'
+    root_level = logging.getLogger().level
+    pipeline = LogPipeline()
+    pipeline.start(logging.INFO, LogFormat.JSON, str(log_file))
+    logger = logging.getLogger('pipeline-test')
+    logger.debug('Not written')
+    logger.info('Imported %d users', 10, extra={'context': 'default'})
+    pipeline.stop()
+    logger.warning('Written after stopping')
+
+    assert logging.getLogger().level == root_level
+    entries = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert len(entries) == 1
+    assert entries[0]['message'] == 'Imported 10 users'
+    assert entries[0]['context'] == 'default'
+
+
+def test_log_pipeline_text(tmp_path: Path) -> None:
+    """Test that text messages include the level and logger.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    log_file = tmp_path / 'my_multitool.log'
+    pipeline = LogPipeline()
+    pipeline.start(logging.INFO, LogFormat.TEXT, str(log_file))
+    pipeline.start(logging.WARNING, LogFormat.TEXT, str(log_file))
+    logging.getLogger('pipeline-test').info('Not written')
+    logging.getLogger('pipeline-test').warning('Slow query')
+    pipeline.stop()
+    assert (
+        log_file.read_text()
+        .splitlines()[0]
+        .endswith('WARNING  pipeline-test: Slow query')
+    )
+
+
+def test_log_pipeline_restore(tmp_path: Path) -> None:
+    """Test that earlier settings can be restored.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    configured_file = tmp_path / 'configured.log'
+    command_file = tmp_path / 'command.log'
+    pipeline = LogPipeline()
+    pipeline.start(logging.INFO, LogFormat.TEXT, str(configured_file))
+    settings = pipeline.settings
+    pipeline.start(logging.INFO, LogFormat.JSON, str(command_file))
+    logging.getLogger('pipeline-test').info('During the command')
+    pipeline.restore(settings)
+    assert pipeline.settings == settings
+    logging.getLogger('pipeline-test').info('After the command')
+    pipeline.restore(None)
+    assert pipeline.settings is None
+    assert pipeline.handler is None
+
+    assert 'During the command' in command_file.read_text()
+    assert 'After the command' in configured_file.read_text()
+    assert 'During the command' not in configured_file.read_text()
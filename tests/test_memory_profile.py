@@ -0,0 +1,67 @@
+"""Tests for the memory profile."""
+
+import json
+
+from my_multitool.__main__ import app
+from my_multitool.memory_profile import MemoryProfiler
+from my_multitool.timings import timings
+from typer.testing import CliRunner
+
+runner = CliRunner(echo_stdin=True, mix_stderr=False)
+
+
+def test_phase_memory() -> None:
+    """Test the memory and peak of a phase."""
+    profiler = MemoryProfiler()
+    profiler.start()
+    try:
+        with profiler.phase('data load'):
+            kept = bytearray(1_000_000)
+            freed = bytearray(4_000_000)
+            del freed
+        report = profiler.report()
+    finally:
+        profiler.stop()
+
+    assert len(kept) == 1_000_000
+    assert [phase.name for phase in report.phases] == ['data load']
+    phase = report.phases[0]
+    assert phase.count == 1
+    assert 1_000_000 <= phase.allocated_bytes < 2_000_000
+    assert phase.peak_bytes >= 5_000_000
+    assert report.peak_bytes >= phase.peak_bytes
+    assert report.allocation_sites
+
+
+def test_phases_of_timings() -> None:
+    """Test that the profiler measures the phases of the `PhaseRecorder`."""
+    profiler = MemoryProfiler()
+    profiler.start()
+    try:
+        assert not timings.enabled
+        with timings.phase('rendering'):
+            pass
+        with timings.phase('config.load'):
+            pass
+        report = profiler.report()
+    finally:
+        profiler.stop()
+
+    assert [phase.name for phase in report.phases] == [
+        'config.load',
+        'rendering',
+    ]
+    assert timings.phase_wrappers == []
+    assert timings.events == []
+
+
+def test_memprofile_option() -> None:
+    """Test that the `--memprofile` option prints the report to stderr."""
+    result = runner.invoke(
+        app, ['--memprofile', '--memprofile-format', 'json', 'version']
+    )
+    assert result.exit_code == 0
+    report = json.loads(result.stderr)
+    assert 'rendering' in [phase['name'] for phase in report['phases']]
+    assert report['peak_bytes'] > 0
+    assert timings.phase_wrappers == []
@@ -0,0 +1,261 @@
+"""Tests for the metrics of commands."""
+
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from my_multitool.__main__ import app, run_app
+from my_multitool.config import ConfigManager
+from my_multitool.exceptions import GenericCLIError
+from my_multitool.metrics import (
+    MetricsRecorder,
+    MetricsServer,
+    MetricsState,
+    metrics,
+)
+from sqlalchemy import create_engine, text
+from typer.testing import CliRunner
+
+runner = CliRunner(echo_stdin=True)
+
+
+def test_metrics_recorder(tmp_path: Path) -> None:
+    """Test that the metrics of runs are added up in the metrics file.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    metrics_file = tmp_path / 'metrics' / 'my_multitool.prom'
+    recorder = MetricsRecorder()
+    recorder.start(str(metrics_file), 'users import')
+    engine = create_engine('sqlite://')
+    with engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+        connection.execute(text('SELECT 2'))
+    recorder.add_rows('user', 'imported', 10)
+    recorder.finish(0)
+    assert not recorder.enabled
+
+    recorder.start(str(metrics_file), 'users import')
+    recorder.add_rows('user', 'imported', 5)
+    recorder.finish(2)
+    with engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+
+    lines = metrics_file.read_text().splitlines()
+    assert (
+        'my_multitool_command_duration_seconds_bucket'
+        + '{command="users import",le="+Inf"} 2'
+    ) in lines
+    assert (
+        'my_multitool_command_duration_seconds_count'
+        + '{command="users import"} 2'
+    ) in lines
+    assert (
+        'my_multitool_command_runs_total'
+        + '{command="users import",exit_code="0"} 1'
+    ) in lines
+    assert (
+        'my_multitool_command_runs_total'
+        + '{command="users import",exit_code="2"} 1'
+    ) in lines
+    assert (
+        'my_multitool_command_last_exit_code{command="users import"} 2'
+        in lines
+    )
+    assert 'my_multitool_queries_total{command="users import"} 2' in lines
+    assert (
+        'my_multitool_pool_checkouts_total{command="users import"} 1' in lines
+    )
+    assert (
+        'my_multitool_rows_total{table="user",direction="imported"} 15'
+        in lines
+    )
+    assert '# TYPE my_multitool_command_duration_seconds histogram' in lines
+
+
+def test_metrics_recorder_concurrent(
+    monkeypatch: MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test that commands that finish at the same time keep all runs.
+
+    Args:
+        monkeypatch: the mocker.
+        tmp_path: a temporary directory.
+    """
+    metrics_file = tmp_path / 'my_multitool.prom'
+    recorder = MetricsRecorder()
+    recorder.start(str(metrics_file), 'version')
+    recorder.finish(0)
+
+    validate_state = MetricsState.model_validate_json
+
+    def slow_validate_state(json_data: str) -> MetricsState:
+        # Give the other threads time to read the same totals
+        state = validate_state(json_data)
+        time.sleep(0.05)
+        return state
+
+    monkeypatch.setattr(
+        MetricsState, 'model_validate_json', slow_validate_state
+    )
+    recorders = [MetricsRecorder() for _ in range(5)]
+    for recorder in recorders:
+        recorder.start(str(metrics_file), 'version')
+    threads = [
+        threading.Thread(target=recorder.finish, args=(0,))
+        for recorder in recorders
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert (
+        'my_multitool_command_runs_total{command="version",exit_code="0"} 6'
+    ) in metrics_file.read_text().splitlines()
+
+
+@pytest.mark.parametrize(
+    'arguments, command',
+    [
+        (['version'], 'version'),
+        (['config', 'contexts', 'list'], 'config contexts list'),
+        (['users', 'list', '--output', 'json'], 'users list'),
+    ],
+)
+def test_metrics_file_option(
+    config_object: ConfigManager,
+    monkeypatch: MonkeyPatch,
+    tmp_path: Path,
+    arguments: list[str],
+    command: str,
+) -> None:
+    """Test that the option starts the recorder for the invoked command.
+
+    Args:
+        config_object: fixture for the config object.
+        monkeypatch: the mocker.
+        tmp_path: a temporary directory.
+        arguments: the arguments for the command.
+        command: the expected name of the command.
+    """
+    started: dict[str, str] = {}
+
+    def start(path: str, command: str, origin: float | None = None) -> None:
+        started.update(path=path, command=command)
+
+    monkeypatch.setattr(metrics, 'start', start)
+    runner.invoke(
+        app, ['--metrics-file', str(tmp_path / 'metrics.prom'), *arguments]
+    )
+    assert started == {
+        'path': str(tmp_path / 'metrics.prom'),
+        'command': command,
+    }
+
+
+def test_run_app(
+    config_object: ConfigManager, monkeypatch: MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test that the return codes of commands end up in the metrics.
+
+    Args:
+        config_object: fixture for the config object.
+        monkeypatch: the mocker.
+        tmp_path: a temporary directory.
+    """
+    metrics_file = tmp_path / 'metrics.prom'
+    for arguments, return_code in (
+        (['version'], 0),
+        (['database', 'copy', 'unknown', 'default'], 2),
+    ):
+        monkeypatch.setattr(
+            sys,
+            'argv',
+            ['my-multitool', '--metrics-file', str(metrics_file), *arguments],
+        )
+        assert run_app() == return_code
+
+    content = metrics_file.read_text()
+    assert 'command="version",exit_code="0"} 1' in content
+    assert 'command="database copy",exit_code="2"} 1' in content
+
+
+def test_run_app_unexpected_error(
+    monkeypatch: MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test that commands that crash are recorded in the metrics.
+
+    Args:
+        monkeypatch: the mocker.
+        tmp_path: a temporary directory.
+    """
+
+    def crash() -> None:
+        raise RuntimeError('Unexpected')
+
+    metrics_file = tmp_path / 'metrics.prom'
+    metrics.start(str(metrics_file), 'users list')
+    monkeypatch.setattr('my_multitool.__main__.app', crash)
+    with pytest.raises(RuntimeError):
+        run_app()
+
+    assert not metrics.enabled
+    assert (
+        'my_multitool_command_runs_total{command="users list",exit_code="1"} 1'
+    ) in metrics_file.read_text().splitlines()
+
+
+def test_metrics_server(tmp_path: Path) -> None:
+    """Test that the metrics file is served over HTTP.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    metrics_file = tmp_path / 'metrics.prom'
+    server = MetricsServer(str(metrics_file), '127.0.0.1', 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f'http://127.0.0.1:{server.server_port}'
+    try:
+        with urllib.request.urlopen(f'{url}/metrics') as response:
+            assert response.read() == b''
+
+        metrics_file.write_text('my_multitool_queries_total 1\n')
+        with urllib.request.urlopen(f'{url}/metrics') as response:
+            assert response.headers['Content-Type'].startswith('text/plain')
+            assert response.read() == b'my_multitool_queries_total 1\n'
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f'{url}/other')
+        assert error.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_metrics_serve_port_in_use(tmp_path: Path) -> None:
+    """Test that a port that is in use gives a error.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    server = MetricsServer(str(tmp_path / 'metrics.prom'), '127.0.0.1', 0)
+    try:
+        result = runner.invoke(
+            app,
+            ['metrics', 'serve', '--metrics-file', 'metrics.prom']
+            + ['--port', str(server.server_port)],
+        )
+    finally:
+        server.server_close()
+    assert isinstance(result.exception, GenericCLIError)
+    assert str(result.exception).startswith(
+        f'Cannot listen on 127.0.0.1:{server.server_port}'
+    )
@@ -0,0 +1,170 @@
+"""Tests for the output writers."""
+
+import csv
+import io
+import json
+from enum import Enum
+from typing import Any
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from my_multitool.models import OutputFormat
+from my_multitool.output import (
+    Column,
+    DelimitedWriter,
+    JSONWriter,
+    NDJSONWriter,
+    OutputWriter,
+    PlainTableWriter,
+    TableWriter,
+    get_writer,
+)
+
+
+class Color(Enum):
+    """Enum to test the conversion of enums."""
+
+    RED = 1
+
+
+COLUMNS = [
+    Column(key='id', title='#'),
+    Column(key='color', title='Color'),
+    Column(key='active', title='Active'),
+    Column(key='tags', title='Tags'),
+]
+
+ROWS: list[dict[str, Any]] = [
+    {'id': 1, 'color': Color.RED, 'active': True, 'tags': ['a', 'b']},
+    {'id': 2, 'color': None, 'active': False, 'tags': []},
+]
+
+
+def test_output_writer_is_abstract() -> None:
+    """Test that writers have to implement `write_row`."""
+    with pytest.raises(TypeError):
+        OutputWriter(COLUMNS)  # type: ignore[abstract]
+
+
+@pytest.mark.parametrize(
+    'output, writer_class',
+    [
+        (OutputFormat.TABLE, PlainTableWriter),
+        (OutputFormat.JSON, JSONWriter),
+        (OutputFormat.NDJSON, NDJSONWriter),
+        (OutputFormat.CSV, DelimitedWriter),
+        (OutputFormat.TSV, DelimitedWriter),
+    ],
+)
+def test_get_writer(output: OutputFormat, writer_class: type) -> None:
+    """Test that the correct writer is returned for a format.
+
+    Args:
+        output: the output format.
+        writer_class: the expected class.
+    """
+    writer = get_writer(output, COLUMNS)
+    assert isinstance(writer, writer_class)
+    writer.close()
+
+
+def test_get_writer_terminal(monkeypatch: MonkeyPatch) -> None:
+    """Test that Rich tables are used when the output is a terminal.
+
+    Args:
+        monkeypatch: the mocker.
+    """
+    monkeypatch.setattr('my_multitool.output.is_terminal', lambda _: True)
+    writer = get_writer(OutputFormat.TABLE, COLUMNS)
+    assert isinstance(writer, TableWriter)
+
+
+@pytest.mark.parametrize('rows', [ROWS, []])
+def test_json_writer(rows: list[dict]) -> None:
+    """Test that the JSON writer writes a valid JSON array.
+
+    Args:
+        rows: the rows to write.
+    """
+    output = io.StringIO()
+    with JSONWriter(COLUMNS, stream=output) as writer:
+        for row in rows:
+            writer.write_row(row)
+    data = json.loads(output.getvalue())
+    assert len(data) == len(rows)
+    if rows:
+        assert data[0] == {
+            'id': 1,
+            'color': 'RED',
+            'active': True,
+            'tags': ['a', 'b'],
+        }
+
+
+def test_ndjson_writer() -> None:
+    """Test that the NDJSON writer writes one object per line."""
+    output = io.StringIO()
+    with NDJSONWriter(COLUMNS, stream=output) as writer:
+        for row in ROWS:
+            writer.write_row(row)
+    lines = output.getvalue().splitlines()
+    assert len(lines) == len(ROWS)
+    assert json.loads(lines[1]) == {
+        'id': 2,
+        'color': None,
+        'active': False,
+        'tags': [],
+    }
+
+
+@pytest.mark.parametrize('delimiter', [',', '\t'])
+def test_delimited_writer(delimiter: str) -> None:
+    """Test that the delimited writer writes a header and the rows.
+
+    Args:
+        delimiter: the delimiter to use.
+    """
+    output = io.StringIO()
+    with DelimitedWriter(
+        COLUMNS, stream=output, delimiter=delimiter
+    ) as writer:
+        for row in ROWS:
+            writer.write_row(row)
+    output.seek(0)
+    lines = list(csv.reader(output, delimiter=delimiter))
+    assert lines == [
+        ['id', 'color', 'active', 'tags'],
+        ['1', 'RED', 'true', 'a, b'],
+        ['2', '', 'false', ''],
+    ]
+
+
+def test_plain_table_writer() -> None:
+    """Test that the plain-text table writer aligns the columns."""
+    output = io.StringIO()
+    columns = [
+        Column(key='id', title='#', width=3, justify='right'),
+        *COLUMNS[1:],
+    ]
+    with PlainTableWriter(columns, stream=output, title='Colors') as writer:
+        for row in ROWS:
+            writer.write_row(row)
+    assert output.getvalue().splitlines() == [
+        'Colors',
+        '  #  Color  Active  Tags',
+        '---  -----  ------  ----',
+        "  1  Color.RED  Yes     ['a', 'b']",
+        '  2         No      []',
+    ]
+
+
+def test_plain_table_writer_streams_rows() -> None:
+    """Test that the header and rows are written without waiting."""
+    output = io.StringIO()
+    columns = [Column(key='name', title='Name', width=6)]
+    with PlainTableWriter(columns, stream=output) as writer:
+        assert output.getvalue().splitlines() == ['Name', '------']
+        writer.write_row({'name': 'first'})
+        assert output.getvalue().splitlines()[-1] == 'first'
+        writer.write_row({'name': 'the second'})
+        assert output.getvalue().splitlines()[-1] == 'the second'
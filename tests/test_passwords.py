@@ -0,0 +1,42 @@
+"""Tests for the hashing of passwords in bulk."""
+
+import pytest
+from my_model import User
+from my_multitool.passwords import (
+    generate_password,
+    hash_password,
+    hash_passwords,
+)
+
+
+def _verify(password_hash: str, password: str) -> bool:
+    user = User(username='user', password_hash=password_hash)
+    return user.verify_credentials('user', password)
+
+
+def test_hash_password() -> None:
+    """Test if a hash can be verified by the user model."""
+    password_hash, _ = hash_password('secret')
+    assert _verify(password_hash, 'secret')
+    assert not _verify(password_hash, 'other')
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_hash_passwords(workers: int) -> None:
+    """Test if the hashes are returned in the order of the passwords.
+
+    Args:
+        workers: the number of processes to use.
+    """
+    passwords = ['one', 'two', 'three']
+    hashes = hash_passwords(passwords, workers=workers)
+    assert len(hashes) == len(passwords)
+    for (password_hash, _), password in zip(hashes, passwords):
+        assert _verify(password_hash, password)
+
+
+def test_generate_password() -> None:
+    """Test if generated passwords have the length and are unique."""
+    passwords = {generate_password(16) for _ in range(10)}
+    assert len(passwords) == 10
+    assert all(len(password) == 16 for password in passwords)
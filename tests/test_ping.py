@@ -0,0 +1,121 @@
+"""Tests for the latency probe for databases."""
+
+import threading
+import time
+from pathlib import Path
+
+from _pytest.monkeypatch import MonkeyPatch
+from my_multitool.ping import (
+    PingResult,
+    PingTarget,
+    ping_database,
+    ping_databases,
+)
+
+
+def test_ping_database() -> None:
+    """Test if a reachable database gets latencies."""
+    result = ping_database(
+        PingTarget(name='memory', db_string='sqlite:///:memory:'), samples=5
+    )
+    assert result.reachable
+    assert result.error is None
+    for value in (
+        result.connect_ms,
+        result.checkout_ms,
+        result.p50_ms,
+        result.p90_ms,
+        result.p99_ms,
+        result.max_ms,
+    ):
+        assert value is not None
+        assert value >= 0
+    assert result.p50_ms <= result.max_ms  # type: ignore
+
+
+def test_ping_unreachable_database(tmp_path: Path) -> None:
+    """Test if errors are reported for databases that cannot be reached.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    for path in (tmp_path / 'missing.sqlite', tmp_path / 'missing/db.sqlite'):
+        result = ping_database(
+            PingTarget(name='missing', db_string=f'sqlite:///{path}')
+        )
+        assert not result.reachable
+        assert result.error == f'Database file does not exist: {path}'
+        assert not path.exists()
+
+    result = ping_database(
+        PingTarget(name='driver', db_string='postgresql+nodriver://host/db')
+    )
+    assert not result.reachable
+    assert result.error
+
+
+def test_ping_databases_timeout(monkeypatch: MonkeyPatch) -> None:
+    """Test if databases that don't respond in time are reported.
+
+    Args:
+        monkeypatch: the mocker.
+    """
+    release = threading.Event()
+
+    def fake_ping(
+        target: PingTarget, samples: int, timeout: float
+    ) -> PingResult:
+        if target.name == 'slow':
+            release.wait(5)
+        return PingResult(name=target.name, reachable=True)
+
+    monkeypatch.setattr('my_multitool.ping.ping_database', fake_ping)
+    targets = [
+        PingTarget(name=name, db_string='sqlite://')
+        for name in ('fast', 'slow', 'other')
+    ]
+    results = ping_databases(targets, timeout=0.2, workers=2)
+    release.set()
+    assert [result.name for result in results] == ['fast', 'slow', 'other']
+    assert [result.reachable for result in results] == [True, False, True]
+    assert results[1].error == 'No response within 0.2 seconds'
+
+
+def test_ping_databases_timeout_per_database(monkeypatch: MonkeyPatch) -> None:
+    """Test if every database gets the timeout from the start of its probe.
+
+    Args:
+        monkeypatch: the mocker.
+    """
+    release = threading.Event()
+    running: list[str] = []
+    most_running: list[int] = []
+
+    def fake_ping(
+        target: PingTarget, samples: int, timeout: float
+    ) -> PingResult:
+        running.append(target.name)
+        most_running.append(len(running))
+        if target.name == 'hanging':
+            release.wait(5)
+        else:
+            time.sleep(0.4)
+        running.remove(target.name)
+        return PingResult(name=target.name, reachable=True)
+
+    monkeypatch.setattr('my_multitool.ping.ping_database', fake_ping)
+    targets = [
+        PingTarget(name=name, db_string='sqlite://')
+        for name in ('hanging', 'first', 'second', 'third')
+    ]
+    # The hanging database keeps one worker, so the other databases are
+    # probed one after the other; the last one starts after 0.8 seconds.
+    results = ping_databases(targets, timeout=0.5, workers=2)
+    release.set()
+    assert [result.reachable for result in results] == [
+        False,
+        True,
+        True,
+        True,
+    ]
+    assert max(most_running) == 2
@@ -0,0 +1,103 @@
+"""Tests for the reading of records from files."""
+
+import io
+from pathlib import Path
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from my_multitool.exceptions import InvalidRecordsError
+from my_multitool.models import RecordFormat
+from my_multitool.records import batched, get_record_format, read_records
+
+
+@pytest.mark.parametrize(
+    'filename, record_format, expected',
+    [
+        ('users.csv', None, RecordFormat.CSV),
+        ('users.CSV', None, RecordFormat.CSV),
+        ('users.ndjson', None, RecordFormat.NDJSON),
+        ('users.jsonl', None, RecordFormat.NDJSON),
+        ('-', None, RecordFormat.NDJSON),
+        ('users.txt', RecordFormat.CSV, RecordFormat.CSV),
+    ],
+)
+def test_get_record_format(
+    filename: str,
+    record_format: RecordFormat | None,
+    expected: RecordFormat,
+) -> None:
+    """Test if the format is determined from the extension.
+
+    Args:
+        filename: the name of the file.
+        record_format: the format given by the user.
+        expected: the expected format.
+    """
+    assert get_record_format(filename, record_format) == expected
+
+
+def test_get_record_format_unknown() -> None:
+    """Test if we get an error for a unknown extension."""
+    with pytest.raises(InvalidRecordsError):
+        get_record_format('users.txt')
+
+
+def test_read_records_csv(tmp_path: Path) -> None:
+    """Test if records are read from a CSV file.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    filename = tmp_path / 'users.csv'
+    filename.write_text('username,password\nuser.1,pw1\nuser.2,pw2\n')
+    assert list(read_records(str(filename))) == [
+        {'username': 'user.1', 'password': 'pw1'},
+        {'username': 'user.2', 'password': 'pw2'},
+    ]
+
+
+def test_read_records_ndjson_from_stdin(monkeypatch: MonkeyPatch) -> None:
+    """Test if records are read from stdin, skipping blank lines.
+
+    Args:
+        monkeypatch: the mocker.
+    """
+    monkeypatch.setattr(
+        'sys.stdin', io.StringIO('{"username": "user.1"}\n\n{"id": 2}\n')
+    )
+    assert list(read_records('-')) == [{'username': 'user.1'}, {'id': 2}]
+
+
+@pytest.mark.parametrize('content', ['{"username": \n', '[1, 2]\n'])
+def test_read_records_invalid_ndjson(tmp_path: Path, content: str) -> None:
+    """Test if we get an error for invalid lines.
+
+    Args:
+        tmp_path: a temporary directory.
+        content: the content of the file.
+    """
+    filename = tmp_path / 'users.ndjson'
+    filename.write_text('{"username": "user.1"}\n' + content)
+    with pytest.raises(InvalidRecordsError, match='Line 2'):
+        list(read_records(str(filename)))
+
+
+@pytest.mark.parametrize(
+    'items, size, expected',
+    [
+        ([1, 2, 3, 4, 5], 2, [[1, 2], [3, 4], [5]]),
+        ([1, 2], 5, [[1, 2]]),
+        ([], 3, []),
+    ],
+)
+def test_batched(
+    items: list[int], size: int, expected: list[list[int]]
+) -> None:
+    """Test if items are split in batches.
+
+    Args:
+        items: the items to split.
+        size: the size of the batches.
+        expected: the expected batches.
+    """
+    assert list(batched(items, size)) == expected
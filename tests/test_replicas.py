@@ -0,0 +1,338 @@
+"""Tests for the routing of read-only commands to read replicas."""
+
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from my_data.data_loader import DataLoader, JSONDataSource
+from my_data.my_data_table_creator import MyDataTableCreator
+from my_multitool.__main__ import app
+from my_multitool.config import ConfigManager, ContextModel
+from my_multitool.globals import get_my_data_object_for_context
+from my_multitool.models import Intent
+from my_multitool.replicas import ReplicaSelector, get_connect_args
+from sqlalchemy import Connection, create_engine, make_url
+from typer.testing import CliRunner
+
+TEST_DATA = str(Path(__file__).parent / 'test_data.json')
+
+runner = CliRunner()
+
+
+def _sqlite_file(path: Path) -> str:
+    path.touch()
+    return f'sqlite:///{path}'
+
+
+def test_connect(tmp_path: Path) -> None:
+    """Test if only existing SQLite files can be reached.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    selector = ReplicaSelector()
+    replica = _sqlite_file(tmp_path / 'replica.sqlite')
+    assert selector.connect(create_engine(replica), replica)
+    for missing in (
+        f'sqlite:///{tmp_path}/missing.sqlite',
+        f'sqlite:///{tmp_path}/missing/dir.sqlite',
+    ):
+        assert not selector.connect(create_engine(missing), missing)
+    assert not (tmp_path / 'missing.sqlite').exists()
+
+
+def test_connect_reuses_health(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    """Test if replicas that could be reached are not connected to again.
+
+    Args:
+        tmp_path: a temporary directory.
+        monkeypatch: the mocker.
+    """
+    state_file = tmp_path / 'replicas.json'
+    replica = _sqlite_file(tmp_path / 'replica.sqlite')
+    engine = create_engine(replica)
+    connections: list[Connection] = []
+    connect = engine.connect
+
+    def counted_connect() -> Connection:
+        connections.append(connect())
+        return connections[-1]
+
+    monkeypatch.setattr(engine, 'connect', counted_connect)
+    assert ReplicaSelector(state_file=str(state_file)).connect(engine, replica)
+    assert ReplicaSelector(state_file=str(state_file)).connect(engine, replica)
+    assert len(connections) == 1
+
+    # After the TTL, the replica is connected to again
+    now = time.time()
+    monkeypatch.setattr('time.time', lambda: now + 31)
+    assert ReplicaSelector(state_file=str(state_file)).connect(engine, replica)
+    assert len(connections) == 2
+
+
+@pytest.mark.parametrize(
+    'db_string, expected',
+    [
+        ('sqlite:///replica.sqlite', {'timeout': 2}),
+        ('postgresql+psycopg2://host/db', {'connect_timeout': 2}),
+        ('mysql+pymysql://host/db', {'connect_timeout': 2}),
+        ('oracle+oracledb://host/db', {}),
+    ],
+)
+def test_get_connect_args(db_string: str, expected: dict[str, Any]) -> None:
+    """Test the connect timeout arguments for the database drivers.
+
+    Args:
+        db_string: the connection string.
+        expected: the expected arguments.
+    """
+    assert get_connect_args(make_url(db_string), 2.5) == expected
+
+
+def test_select_write_uses_primary(tmp_path: Path) -> None:
+    """Test if writes and contexts without replicas use the primary.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    selector = ReplicaSelector()
+    context = ContextModel(
+        name='test',
+        db_string='sqlite:///primary.sqlite',
+        read_replicas=[_sqlite_file(tmp_path / 'replica.sqlite')],
+    )
+    assert selector.select(context, Intent.WRITE) == context.db_string
+    context.read_replicas = []
+    assert selector.select(context, Intent.READ) == context.db_string
+
+
+def test_select_round_robin(tmp_path: Path) -> None:
+    """Test if reads alternate between the replicas.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    selector = ReplicaSelector()
+    replicas = [
+        _sqlite_file(tmp_path / 'replica_1.sqlite'),
+        _sqlite_file(tmp_path / 'replica_2.sqlite'),
+    ]
+    context = ContextModel(
+        name='test',
+        db_string='sqlite:///primary.sqlite',
+        read_replicas=replicas,
+    )
+    selected = [selector.select(context, Intent.READ) for _ in range(4)]
+    assert sorted(selected[:2]) == replicas
+    assert selected[2:] == selected[:2]
+
+
+def test_select_skips_unhealthy_replicas(tmp_path: Path) -> None:
+    """Test if unreachable replicas are skipped for a while.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    selector = ReplicaSelector(retry_after=30)
+    missing = f'sqlite:///{tmp_path}/missing.sqlite'
+    healthy = _sqlite_file(tmp_path / 'replica.sqlite')
+    context = ContextModel(
+        name='test',
+        db_string='sqlite:///primary.sqlite',
+        read_replicas=[missing, healthy],
+    )
+    assert not selector.connect(create_engine(missing), missing)
+    assert {selector.select(context, Intent.READ) for _ in range(4)} == {
+        healthy
+    }
+
+    context.read_replicas = [missing]
+    assert selector.select(context, Intent.READ) == context.db_string
+    selector.reset()
+    assert selector.select(context, Intent.READ) == missing
+
+
+def test_unhealthy_replicas_are_stored(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    """Test if unreachable replicas are skipped in the next process too.
+
+    Args:
+        tmp_path: a temporary directory.
+        monkeypatch: the mocker.
+    """
+    state_file = tmp_path / 'replicas.json'
+    missing = f'sqlite:///{tmp_path}/missing.sqlite'
+    context = ContextModel(
+        name='test',
+        db_string='sqlite:///primary.sqlite',
+        read_replicas=[missing],
+    )
+    selector = ReplicaSelector(state_file=str(state_file))
+    assert not selector.connect(create_engine(missing), missing)
+    assert missing not in state_file.read_text()
+    state = json.loads(state_file.read_text())
+    assert [entry['healthy'] for entry in state.values()] == [False]
+
+    # A new selector, like in the next run of the application
+    selector = ReplicaSelector(state_file=str(state_file))
+    assert selector.select(context, Intent.READ) == context.db_string
+
+    # After the skip, the replica is selected again
+    now = time.time()
+    monkeypatch.setattr('time.time', lambda: now + 31)
+    selector = ReplicaSelector(state_file=str(state_file))
+    assert selector.select(context, Intent.READ) == missing
+
+
+def test_invalid_state_file(tmp_path: Path) -> None:
+    """Test if a invalid state file is ignored.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    state_file = tmp_path / 'replicas.json'
+    state_file.write_text('[1, 2]')
+    replica = _sqlite_file(tmp_path / 'replica.sqlite')
+    context = ContextModel(
+        name='test',
+        db_string='sqlite:///primary.sqlite',
+        read_replicas=[replica],
+    )
+    selector = ReplicaSelector(state_file=str(state_file))
+    assert selector.select(context, Intent.READ) == replica
+
+
+@pytest.fixture
+def context_with_replica(
+    config_object: ConfigManager, tmp_path: Path
+) -> ContextModel:
+    """Fixture for a context with a primary database and a read replica.
+
+    Both databases start with the same test data.
+
+    Args:
+        config_object: the fixture for the config object.
+        tmp_path: a temporary directory.
+
+    Returns:
+        The active context.
+    """
+    context = config_object.active_context
+    context.db_string = f'sqlite:///{tmp_path}/primary.sqlite'
+    context.read_replicas = [f'sqlite:///{tmp_path}/replica.sqlite']
+    context.root_user = 'root'
+    for db_string in (context.db_string, context.read_replicas[0]):
+        data = get_my_data_object_for_context()
+        data.configure(
+            db_connection_str=db_string,
+            service_username=context.service_user,
+            service_password=context.service_pass,
+        )
+        MyDataTableCreator(my_data_object=data).create_db_tables()
+        DataLoader(
+            my_data_object=data, data_source=JSONDataSource(TEST_DATA)
+        ).load()
+    return context
+
+
+def test_read_commands_use_replica(
+    context_with_replica: ContextModel, tmp_path: Path
+) -> None:
+    """Test if read commands use the replica and writes use the primary.
+
+    Args:
+        context_with_replica: a context with a primary and a replica.
+        tmp_path: a temporary directory.
+    """
+    filename = tmp_path / 'users.csv'
+    filename.write_text(
+        'fullname,username,email\nExtra user,extra.user,extra@example.com\n'
+    )
+    result = runner.invoke(
+        app, ['users', 'import', '--from-file', str(filename)]
+    )
+    assert result.exit_code == 0
+
+    # The user is created in the primary, so the replica doesn't have it
+    result = runner.invoke(app, ['users', 'count'])
+    assert result.stdout.strip() == '4'
+
+    context_with_replica.read_replicas = []
+    result = runner.invoke(app, ['users', 'count'])
+    assert result.stdout.strip() == '5'
+
+
+def test_unreachable_replica_falls_back(
+    context_with_replica: ContextModel, tmp_path: Path
+) -> None:
+    """Test if the next replica is used when a replica cannot be reached.
+
+    Args:
+        context_with_replica: a context with a primary and a replica.
+        tmp_path: a temporary directory.
+    """
+    replica = context_with_replica.read_replicas[0]
+    missing = f'sqlite:///{tmp_path}/missing.sqlite'
+    context_with_replica.read_replicas = [missing, replica]
+    for _ in range(3):
+        data = get_my_data_object_for_context(intent=Intent.READ)
+        assert data.database_engine is not None
+        assert str(data.database_engine.url) == replica
+    assert not (tmp_path / 'missing.sqlite').exists()
+
+    context_with_replica.read_replicas = [missing]
+    data = get_my_data_object_for_context(intent=Intent.READ)
+    data.create_engine()
+    assert data.database_engine is not None
+    assert str(data.database_engine.url) == context_with_replica.db_string
+
+
+def test_copy_reads_from_replica(
+    context_with_replica: ContextModel,
+    config_object: ConfigManager,
+    tmp_path: Path,
+) -> None:
+    """Test if `database copy` reads the source from the replica.
+
+    Args:
+        context_with_replica: a context with a primary and a replica.
+        config_object: the fixture for the config object.
+        tmp_path: a temporary directory.
+    """
+    filename = tmp_path / 'users.csv'
+    filename.write_text(
+        'fullname,username,email\nExtra user,extra.user,extra@example.com\n'
+    )
+    result = runner.invoke(
+        app, ['users', 'import', '--from-file', str(filename)]
+    )
+    assert result.exit_code == 0
+
+    config_object.contexts[
+        'context_03'
+    ].db_string = f'sqlite:///{tmp_path}/target.sqlite'
+    result = runner.invoke(
+        app,
+        [
+            'database',
+            'copy',
+            '--from',
+            context_with_replica.name,
+            '--to',
+            'context_03',
+        ],
+    )
+    assert result.exit_code == 0
+
+    # The user is created in the primary, so the replica doesn't have it
+    target = get_my_data_object_for_context('context_03')
+    with target.get_context_for_service_user() as context:
+        root = context.get_user_account_by_username('root')
+    with target.get_context(user=root) as context:
+        assert context.users.count() == 4
@@ -0,0 +1,287 @@
+"""Tests for the result cache for read commands."""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from my_data.my_data import MyData
+from my_model import User
+from my_multitool.__main__ import app
+from my_multitool.config import ConfigManager, ContextModel
+from my_multitool.globals import config, get_root_user_for_context
+from my_multitool.result_cache import (
+    ResultCache,
+    cached,
+    get_result_cache,
+    invalidate_cache,
+)
+from my_multitool.stats import TableStats
+from pydantic import TypeAdapter
+from typer.testing import CliRunner
+
+runner = CliRunner()
+
+CONTEXT = ContextModel(name='test', db_string='sqlite:///test.sqlite')
+OTHER_CONTEXT = ContextModel(name='other', db_string='sqlite:///other.sqlite')
+STATS: TypeAdapter[list[TableStats]] = TypeAdapter(list[TableStats])
+
+
+@pytest.fixture
+def enabled_cache(config_object: ConfigManager, tmp_path: Path) -> Path:
+    """Fixture that enables the result cache in a temporary directory.
+
+    Args:
+        config_object: the fixture for the config object.
+        tmp_path: a temporary directory.
+
+    Returns:
+        The directory for the cache.
+    """
+    directory = tmp_path / 'cache'
+    config_object.full_config.cache.enabled = True
+    config_object.full_config.cache.directory = str(directory)
+    return directory
+
+
+def test_get_and_set(tmp_path: Path) -> None:
+    """Test if a result is returned with its type.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    cache = ResultCache(str(tmp_path), ttl=60, max_size=1024 * 1024)
+    value = [TableStats(name='user', rows=4, exact=True)]
+    assert cache.get(CONTEXT, 'stats', {'exact': True}, STATS) is None
+    assert cache.set(CONTEXT, 'stats', {'exact': True}, STATS, value)
+    assert cache.get(CONTEXT, 'stats', {'exact': True}, STATS) == value
+    assert cache.get(CONTEXT, 'stats', {'exact': False}, STATS) is None
+    assert cache.get(OTHER_CONTEXT, 'stats', {'exact': True}, STATS) is None
+
+
+def test_expired_result(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    """Test if results are not returned after the TTL.
+
+    Args:
+        tmp_path: a temporary directory.
+        monkeypatch: the mocker.
+    """
+    cache = ResultCache(str(tmp_path), ttl=60, max_size=1024 * 1024)
+    cache.set(CONTEXT, 'count', {}, TypeAdapter(int), 4)
+    now = time.time()
+    monkeypatch.setattr('time.time', lambda: now + 61)
+    assert cache.get(CONTEXT, 'count', {}, TypeAdapter(int)) is None
+    assert not list(tmp_path.glob('*/*.json'))
+
+
+def test_invalid_file(tmp_path: Path) -> None:
+    """Test if a invalid cache file is removed.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    cache = ResultCache(str(tmp_path), ttl=60, max_size=1024 * 1024)
+    cache.set(CONTEXT, 'count', {}, TypeAdapter(int), 4)
+    (path,) = tmp_path.glob('*/*.json')
+    path.write_text(json.dumps({'created': time.time(), 'value': 'four'}))
+    assert cache.get(CONTEXT, 'count', {}, TypeAdapter(int)) is None
+    assert not path.exists()
+
+
+def test_size_bound(tmp_path: Path) -> None:
+    """Test if the oldest results are removed when the cache is full.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    cache = ResultCache(str(tmp_path), ttl=60, max_size=200)
+    adapter: TypeAdapter[str] = TypeAdapter(str)
+    for number in range(3):
+        assert cache.set(CONTEXT, 'echo', {'n': number}, adapter, 'x' * 50)
+        # Make the entries older in the order they are created
+        for path in tmp_path.glob('*/*.json'):
+            if path.stat().st_mtime > time.time() - 5:
+                mtime = time.time() - 10 + number
+                os.utime(path, (mtime, mtime))
+    assert cache.get(CONTEXT, 'echo', {'n': 0}, adapter) is None
+    assert cache.get(CONTEXT, 'echo', {'n': 1}, adapter) == 'x' * 50
+    assert cache.get(CONTEXT, 'echo', {'n': 2}, adapter) == 'x' * 50
+    assert not cache.set(CONTEXT, 'echo', {'n': 3}, adapter, 'x' * 500)
+
+
+def test_permissions(tmp_path: Path) -> None:
+    """Test if the cache can only be read by the user that runs the tool.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    cache = ResultCache(str(tmp_path / 'cache'), ttl=60, max_size=1024)
+    cache.set(CONTEXT, 'count', {}, TypeAdapter(int), 4)
+    (path,) = cache.directory.glob('*/*.json')
+    assert cache.directory.stat().st_mode & 0o777 == 0o700
+    assert path.parent.stat().st_mode & 0o777 == 0o700
+    assert path.stat().st_mode & 0o777 == 0o600
+
+
+def test_invalidate(tmp_path: Path) -> None:
+    """Test if only the results for the database of a context are removed.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    cache = ResultCache(str(tmp_path), ttl=60, max_size=1024 * 1024)
+    cache.set(CONTEXT, 'count', {}, TypeAdapter(int), 4)
+    cache.set(OTHER_CONTEXT, 'count', {}, TypeAdapter(int), 5)
+    cache.invalidate(CONTEXT)
+    assert cache.get(CONTEXT, 'count', {}, TypeAdapter(int)) is None
+    assert cache.get(OTHER_CONTEXT, 'count', {}, TypeAdapter(int)) == 5
+    cache.clear()
+    assert not tmp_path.exists()
+
+
+def test_cached(enabled_cache: Path) -> None:
+    """Test if `cached` only computes the result when it is not cached.
+
+    Args:
+        enabled_cache: the directory for the cache.
+    """
+    calls = []
+
+    def compute() -> int:
+        calls.append(1)
+        return len(calls)
+
+    assert cached('count', {}, TypeAdapter(int), compute) == 1
+    assert cached('count', {}, TypeAdapter(int), compute) == 1
+    invalidate_cache()
+    assert cached('count', {}, TypeAdapter(int), compute) == 2
+    assert enabled_cache.exists()
+
+
+def test_cached_disabled(config_object: ConfigManager) -> None:
+    """Test if `cached` always computes the result when disabled.
+
+    Args:
+        config_object: the fixture for the config object.
+    """
+    calls = []
+
+    def compute() -> int:
+        calls.append(1)
+        return len(calls)
+
+    assert not config_object.full_config.cache.enabled
+    assert cached('count', {}, TypeAdapter(int), compute) == 1
+    assert cached('count', {}, TypeAdapter(int), compute) == 2
+
+
+def test_users_commands_use_cache(
+    data_object_with_database_with_root_user: MyData,
+    monkeypatch: MonkeyPatch,
+    enabled_cache: Path,
+) -> None:
+    """Test if read commands are cached and mutating commands invalidate.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        monkeypatch: the mocker.
+        enabled_cache: the directory for the cache.
+    """
+    db = data_object_with_database_with_root_user
+    monkeypatch.setattr(
+        'my_multitool.cli_users.get_my_data_object_for_context',
+        lambda **kwargs: db,
+    )
+    list_args = ['users', 'list', '--output', 'ndjson']
+    result = runner.invoke(app, ['users', 'count'])
+    assert result.stdout.strip() == '4'
+    listed = runner.invoke(app, list_args).stdout
+    assert len(listed.splitlines()) == 4
+
+    # Changes outside of the tool are not seen while the result is cached
+    with db.get_context(user=get_root_user_for_context(db)) as context:
+        context.users.create(
+            User(fullname='New user', username='new.user', email='n@ex.com')
+        )
+    result = runner.invoke(app, ['users', 'count'])
+    assert result.stdout.strip() == '4'
+    assert runner.invoke(app, list_args).stdout == listed
+
+    # Commands that change users invalidate the cache
+    result = runner.invoke(
+        app,
+        ['users', 'delete', '--from-file', '-'],
+        input='{"username": "normal.user.1"}\n',
+    )
+    assert result.exit_code == 0
+    result = runner.invoke(app, ['users', 'count'])
+    assert result.stdout.strip() == '4'
+    assert len(runner.invoke(app, list_args).stdout.splitlines()) == 4
+    assert get_result_cache().directory == enabled_cache
+
+
+@pytest.mark.parametrize('command', ['list', 'count', 'summary'])
+def test_users_cache_checks_credentials(
+    data_object_with_database_with_root_user: MyData,
+    monkeypatch: MonkeyPatch,
+    enabled_cache: Path,
+    command: str,
+) -> None:
+    """Test if cached users are not shown without working credentials.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        monkeypatch: the mocker.
+        enabled_cache: the directory for the cache.
+        command: the users command.
+    """
+    monkeypatch.setattr(
+        'my_multitool.cli_users.get_my_data_object_for_context',
+        lambda **kwargs: data_object_with_database_with_root_user,
+    )
+    assert runner.invoke(app, ['users', command]).exit_code == 0
+    assert list(enabled_cache.glob('*/*.json'))
+
+    config.active_context.service_pass = None
+    result = runner.invoke(app, ['users', command])
+    assert result.exit_code != 0
+    assert 'normal.user.1' not in result.stdout
+
+
+@pytest.mark.parametrize('command', ['list', 'count', 'summary'])
+def test_users_cache_skips_database(
+    data_object_with_database_with_root_user: MyData,
+    monkeypatch: MonkeyPatch,
+    enabled_cache: Path,
+    command: str,
+) -> None:
+    """Test if cached results are used without the database.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        monkeypatch: the mocker.
+        enabled_cache: the directory for the cache.
+        command: the users command.
+    """
+    monkeypatch.setattr(
+        'my_multitool.cli_users.get_my_data_object_for_context',
+        lambda **kwargs: data_object_with_database_with_root_user,
+    )
+    first = runner.invoke(app, ['users', command])
+    assert first.exit_code == 0
+
+    def no_database(**kwargs: Any) -> MyData:  # noqa: ANN401
+        raise AssertionError('The database is used')
+
+    monkeypatch.setattr(
+        'my_multitool.cli_users.get_my_data_object_for_context', no_database
+    )
+    second = runner.invoke(app, ['users', command])
+    assert second.exit_code == 0
+    assert second.stdout == first.stdout
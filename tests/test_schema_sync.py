@@ -0,0 +1,71 @@
+"""Tests for the schema synchronisation."""
+
+import pytest
+from my_multitool.exceptions import UnsafeSchemaChangeError
+from my_multitool.schema_sync import apply_schema_changes, get_schema_changes
+from sqlalchemy import (
+    Column,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    create_engine,
+)
+
+
+def test_schema_sync_missing_index() -> None:
+    """Test if missing indexes are created on existing tables."""
+    engine = create_engine('sqlite:///:memory:')
+    metadata = MetaData()
+    table = Table(
+        'test_table',
+        metadata,
+        Column('id', Integer, primary_key=True),
+        Column('name', String(32)),
+    )
+    metadata.create_all(engine)
+
+    Index('ix_test_table_name', table.c.name)
+    statements = get_schema_changes(engine, metadata)
+    assert statements == [
+        'CREATE INDEX ix_test_table_name ON test_table (name)'
+    ]
+
+    apply_schema_changes(engine, statements)
+    assert get_schema_changes(engine, metadata) == []
+
+
+def test_schema_sync_not_null_column() -> None:
+    """Test that NOT NULL columns are only added with a server default."""
+    engine = create_engine('sqlite:///:memory:')
+    metadata = MetaData()
+    Table('test_table', metadata, Column('id', Integer, primary_key=True))
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql('INSERT INTO test_table (id) VALUES (1)')
+
+    metadata = MetaData()
+    Table(
+        'test_table',
+        metadata,
+        Column('id', Integer, primary_key=True),
+        Column('name', String(32), nullable=False),
+    )
+    with pytest.raises(UnsafeSchemaChangeError, match='test_table.name'):
+        get_schema_changes(engine, metadata)
+
+    metadata = MetaData()
+    Table(
+        'test_table',
+        metadata,
+        Column('id', Integer, primary_key=True),
+        Column('name', String(32), nullable=False, server_default='x'),
+    )
+    statements = get_schema_changes(engine, metadata)
+    assert statements == [
+        "ALTER TABLE test_table ADD COLUMN name VARCHAR(32) DEFAULT 'x' "
+        + 'NOT NULL'
+    ]
+    apply_schema_changes(engine, statements)
+    assert get_schema_changes(engine, metadata) == []
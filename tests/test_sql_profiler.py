@@ -0,0 +1,108 @@
+"""Tests for the SQL profiler."""
+
+import pytest
+from my_data.my_data import MyData
+from my_multitool.sql_profiler import (
+    PARAMETERS_LENGTH,
+    QueryProfiler,
+    normalize_statement,
+)
+from sqlalchemy import text
+
+
+@pytest.mark.parametrize(
+    'statement, shape',
+    [
+        (
+            "SELECT * FROM user WHERE username = 'root' AND id = 1",
+            'SELECT * FROM user WHERE username = ? AND id = ?',
+        ),
+        (
+            'SELECT * FROM user WHERE id IN (?, ?, ?)',
+            'SELECT * FROM user WHERE id IN (...)',
+        ),
+        (
+            'INSERT INTO tag (title) VALUES (?, ?), (?, ?)',
+            'INSERT INTO tag (title) VALUES (...)',
+        ),
+        (
+            'SELECT *\n  FROM user\n WHERE id = %(id_1)s',
+            'SELECT * FROM user WHERE id = ?',
+        ),
+        ('SELECT col_1 FROM table_2', 'SELECT col_1 FROM table_2'),
+    ],
+)
+def test_normalize_statement(statement: str, shape: str) -> None:
+    """Test the normalization of statements.
+
+    Args:
+        statement: the statement to normalize.
+        shape: the expected shape.
+    """
+    assert normalize_statement(statement) == shape
+
+
+def test_aggregation() -> None:
+    """Test that statements are aggregated by their shape."""
+    profiler = QueryProfiler()
+    profiler.record('SELECT * FROM user WHERE id = 1', 1.0, 0)
+    profiler.record('SELECT * FROM user WHERE id = 2', 3.0, 0)
+    profiler.record('UPDATE user SET fullname = ?', 10.0, 4)
+
+    assert profiler.total_count == 3
+    assert profiler.total_ms == pytest.approx(14.0)
+    frequent = profiler.most_frequent(1)[0]
+    assert frequent.count == 2
+    assert frequent.max_ms == pytest.approx(3.0)
+    assert frequent.mean_ms == pytest.approx(2.0)
+    slowest = profiler.slowest(1)[0]
+    assert slowest.shape == 'UPDATE user SET fullname = ?'
+    assert slowest.rows == 4
+
+
+def test_echo(capsys: pytest.CaptureFixture) -> None:
+    """Test that echoed statements are printed as they ran, to stderr.
+
+    Args:
+        capsys: fixture to capture the output.
+    """
+    profiler = QueryProfiler(echo=True)
+    profiler.record('SELECT *\n  FROM user\n WHERE id = ?', 1.5, 0, (1,))
+    profiler.record('INSERT INTO tag (title) VALUES (?)', 2.0, 1, ['x' * 500])
+
+    captured = capsys.readouterr()
+    assert captured.out == ''
+    first, second = captured.err.splitlines()
+    assert first == (
+        '[1.50 ms, 0 rows] SELECT * FROM user WHERE id = ? '
+        + '-- parameters: (1,)'
+    )
+    parameters = second.split(' -- parameters: ')[1]
+    assert parameters.endswith('xxx...')
+    assert len(parameters) == PARAMETERS_LENGTH
+
+
+def test_slow_query_logging(
+    data_object_with_database: MyData, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Test that statements above the threshold are logged.
+
+    Args:
+        data_object_with_database: a data object with a configured database.
+        caplog: fixture to capture log messages.
+    """
+    profiler = QueryProfiler(slow_query_ms=0)
+    profiler.start()
+    try:
+        assert data_object_with_database.database_engine
+        with data_object_with_database.database_engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+    finally:
+        profiler.stop()
+    assert profiler.total_count == 1
+    assert 'Slow query' in caplog.text
+
+    # After stopping, nothing is recorded anymore.
+    with data_object_with_database.database_engine.connect() as conn:
+        conn.execute(text('SELECT 1'))
+    assert profiler.total_count == 1
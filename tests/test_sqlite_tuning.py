@@ -0,0 +1,96 @@
+"""Tests for the SQLite performance profiles."""
+
+from pathlib import Path
+
+import pytest
+from my_multitool.config import ConfigManager, SQLiteSettingsModel
+from my_multitool.globals import get_my_data_object_for_context
+from my_multitool.models import SQLiteProfile
+from my_multitool.sqlite_tuning import get_sqlite_pragmas
+from pydantic import ValidationError
+from sqlalchemy import text
+
+
+def test_default_profile_has_no_pragmas() -> None:
+    """Test that the default profile leaves SQLite alone."""
+    assert get_sqlite_pragmas(SQLiteProfile.DEFAULT) == {}
+
+
+def test_settings_override_the_profile() -> None:
+    """Test that specific settings take precedence over the profile."""
+    pragmas = get_sqlite_pragmas(
+        SQLiteProfile.BULK_LOAD,
+        SQLiteSettingsModel(synchronous='NORMAL', busy_timeout=100),
+    )
+    assert pragmas['journal_mode'] == 'WAL'
+    assert pragmas['synchronous'] == 'NORMAL'
+    assert pragmas['busy_timeout'] == 100
+
+
+def test_invalid_setting() -> None:
+    """Test that only valid PRAGMA values are accepted."""
+    with pytest.raises(ValidationError):
+        SQLiteSettingsModel(journal_mode='WAL; DROP TABLE user')  # type: ignore
+
+
+@pytest.mark.parametrize(
+    'profile, journal_mode, synchronous, temp_store',
+    [
+        (SQLiteProfile.DEFAULT, 'delete', 2, 0),
+        (SQLiteProfile.SAFE, 'wal', 2, 0),
+        (SQLiteProfile.BULK_LOAD, 'wal', 0, 2),
+    ],
+)
+def test_profile_is_applied_to_connections(
+    config_object: ConfigManager,
+    tmp_path: Path,
+    profile: SQLiteProfile,
+    journal_mode: str,
+    synchronous: int,
+    temp_store: int,
+) -> None:
+    """Test that the PRAGMA statements are set on new connections.
+
+    Args:
+        config_object: fixture for the config object.
+        tmp_path: a temporary path for the database file.
+        profile: the profile to configure.
+        journal_mode: the expected journal mode.
+        synchronous: the expected synchronous setting.
+        temp_store: the expected temp store setting.
+    """
+    context = config_object.active_context
+    context.db_string = f'sqlite:///{tmp_path}/tuning.db'
+    context.sqlite_profile = profile
+    data = get_my_data_object_for_context()
+    data.create_engine()
+    assert data.database_engine
+    with data.database_engine.connect() as connection:
+        assert (
+            connection.execute(text('PRAGMA journal_mode')).scalar()
+            == journal_mode
+        )
+        assert (
+            connection.execute(text('PRAGMA synchronous')).scalar()
+            == synchronous
+        )
+        assert (
+            connection.execute(text('PRAGMA temp_store')).scalar()
+            == temp_store
+        )
+
+
+def test_saving_and_loading_a_profile(config_object: ConfigManager) -> None:
+    """Test that profiles survive a round trip through the YAML file.
+
+    Args:
+        config_object: fixture for the config object.
+    """
+    config_object.active_context.sqlite_profile = SQLiteProfile.BULK_LOAD
+    config_object.active_context.sqlite_settings.cache_size = -1024
+    config_object.save()
+    config_object.load()
+    assert (
+        config_object.active_context.sqlite_profile == SQLiteProfile.BULK_LOAD
+    )
+    assert config_object.active_context.sqlite_settings.cache_size == -1024
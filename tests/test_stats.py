@@ -0,0 +1,25 @@
+"""Tests for the database statistics."""
+
+import pytest
+from my_multitool.stats import format_size
+
+
+@pytest.mark.parametrize(
+    'size_bytes, expected',
+    [
+        (None, ''),
+        (0, '0 B'),
+        (1023, '1023 B'),
+        (1536, '1.5 KiB'),
+        (5 * 1024 * 1024, '5.0 MiB'),
+        (3 * 1024**4, '3.0 TiB'),
+    ],
+)
+def test_format_size(size_bytes: int | None, expected: str) -> None:
+    """Test the formatting of sizes.
+
+    Args:
+        size_bytes: the size in bytes.
+        expected: the expected formatted size.
+    """
+    assert format_size(size_bytes) == expected
@@ -1,8 +1,15 @@
 """Tests for the global style of the application."""
 
 import pytest
+from _pytest.capture import CaptureFixture
 from _pytest.monkeypatch import MonkeyPatch
-from my_multitool.style import print_error
+from my_multitool.style import (
+    ConsoleFactory,
+    PlainConsole,
+    TimedConsole,
+    print_error,
+    strip_markup,
+)
 
 
 @pytest.mark.parametrize('message', ['testmessage', 'Something went wrong'])
@@ -27,4 +34,38 @@ def test_print_error(
         assert input_text == f'[red][b]{prefix}:[/b] {message}'
 
     monkeypatch.setattr('rich.console.Console.print', test_print_statement)
+    monkeypatch.setattr(ConsoleFactory, 'global_console', TimedConsole())
     print_error(message, prefix)
+
+
+def test_print_error_plain(
+    monkeypatch: MonkeyPatch, capsys: CaptureFixture
+) -> None:
+    """Test that errors are printed without markup when piped.
+
+    Args:
+        monkeypatch: the mocker.
+        capsys: fixture to capture the output.
+    """
+    monkeypatch.setattr(ConsoleFactory, 'global_console', PlainConsole())
+    print_error('Something went wrong', 'CLI error')
+    assert capsys.readouterr().out == 'CLI error: Something went wrong\n'
+
+
+@pytest.mark.parametrize(
+    'text, expected',
+    [
+        ('[red][b]Error:[/b] message[/]', 'Error: message'),
+        ('[yellow]Continue? [ Y/n ] [/yellow]', 'Continue? [ Y/n ] '),
+        (r'Use \[b] for bold', 'Use [b] for bold'),
+        ("Roles: ['admin']", "Roles: ['admin']"),
+    ],
+)
+def test_strip_markup(text: str, expected: str) -> None:
+    """Test that markup is removed from texts.
+
+    Args:
+        text: the text with markup.
+        expected: the text without markup.
+    """
+    assert strip_markup(text) == expected
@@ -0,0 +1,77 @@
+"""Tests for the phase timings."""
+
+import json
+
+from my_data.my_data import MyData
+from my_multitool.__main__ import app
+from my_multitool.timings import PhaseRecorder
+from sqlalchemy import text
+from typer.testing import CliRunner
+
+runner = CliRunner(echo_stdin=True, mix_stderr=False)
+
+
+def test_disabled_recorder() -> None:
+    """Test that nothing is recorded when the recorder is not enabled."""
+    recorder = PhaseRecorder()
+    with recorder.phase('rendering'):
+        pass
+    assert recorder.events == []
+
+
+def test_report_order() -> None:
+    """Test that the report follows the order of the phases."""
+    recorder = PhaseRecorder()
+    recorder.start()
+    try:
+        recorder.add('custom', 0.0, 0.5)
+        recorder.add('rendering', 0.0, 0.25)
+        recorder.add('rendering', 1.0, 1.25)
+        with recorder.phase('config.load'):
+            pass
+        report = recorder.report()
+    finally:
+        recorder.stop()
+
+    assert [phase.name for phase in report.phases] == [
+        'config.load',
+        'rendering',
+        'custom',
+    ]
+    assert report.phases[1].count == 2
+    assert report.phases[1].total_ms == 500.0
+    assert recorder.events == []
+
+
+def test_database_phases(data_object_with_tables: MyData) -> None:
+    """Test that connections and queries are recorded.
+
+    Args:
+        data_object_with_tables: a data object with a configured database.
+    """
+    recorder = PhaseRecorder()
+    recorder.start()
+    try:
+        engine = data_object_with_tables.database_engine
+        assert engine
+        engine.dispose()
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+            connection.execute(text('SELECT 2'))
+        totals = {phase.name: phase for phase in recorder.report().phases}
+    finally:
+        recorder.stop()
+
+    assert totals['connection acquisition'].count == 1
+    assert totals['queries'].count == 2
+
+
+def test_timings_option() -> None:
+    """Test that the `--timings` option prints a report on stderr."""
+    result = runner.invoke(
+        app, ['--timings', '--timings-format', 'json', 'version']
+    )
+    assert result.exit_code == 0
+    assert 'My Multitool' in result.stdout
+    report = json.loads(result.stderr)
+    assert 'rendering' in [phase['name'] for phase in report['phases']]
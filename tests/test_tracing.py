@@ -0,0 +1,109 @@
+"""Tests for the trace files."""
+
+import json
+from pathlib import Path
+
+from my_multitool.__main__ import app
+from my_multitool.models import TraceFormat
+from my_multitool.timings import PhaseEvent, PhaseRecorder
+from my_multitool.tracing import (
+    get_chrome_trace,
+    get_otlp_trace,
+    write_trace,
+)
+from typer.testing import CliRunner
+
+runner = CliRunner(echo_stdin=True, mix_stderr=False)
+
+
+def get_events() -> list[PhaseEvent]:
+    """Create phases with a query nested in a transaction.
+
+    Returns:
+        The phases.
+    """
+    return [
+        PhaseEvent(name='transaction', start=1.0, end=2.0, thread_id=1),
+        PhaseEvent(
+            name='queries',
+            start=1.25,
+            end=1.5,
+            thread_id=1,
+            details={'statement': 'SELECT 1'},
+        ),
+        PhaseEvent(name='rendering', start=2.5, end=3.0, thread_id=1),
+    ]
+
+
+def test_chrome_trace() -> None:
+    """Test the events in a Chrome trace."""
+    trace = get_chrome_trace('users list', get_events(), 1.0, 4.0)
+    events = trace['traceEvents']
+    assert [event['name'] for event in events] == [
+        'thread_name',
+        'users list',
+        'transaction',
+        'queries',
+        'rendering',
+    ]
+    assert events[1]['dur'] == 3_000_000
+    assert events[3]['ts'] == 250_000
+    assert events[3]['args'] == {'statement': 'SELECT 1'}
+    assert 'args' not in events[4]
+
+
+def test_otlp_trace() -> None:
+    """Test that the spans in an OTLP trace are nested by their time."""
+    trace = get_otlp_trace('users list', get_events(), 1.0, 4.0)
+    spans = trace['resourceSpans'][0]['scopeSpans'][0]['spans']
+    root, transaction, query, rendering = spans
+    assert 'parentSpanId' not in root
+    assert transaction['parentSpanId'] == root['spanId']
+    assert query['parentSpanId'] == transaction['spanId']
+    assert rendering['parentSpanId'] == root['spanId']
+    assert {span['traceId'] for span in spans} == {root['traceId']}
+    duration = int(query['endTimeUnixNano']) - int(query['startTimeUnixNano'])
+    assert abs(duration - 250_000_000) < 1000
+
+
+def test_write_trace(tmp_path: Path) -> None:
+    """Test writing a trace file in the OTLP format.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    recorder = PhaseRecorder()
+    recorder.start()
+    try:
+        with recorder.phase('rendering'):
+            pass
+        write_trace(
+            str(tmp_path / 'trace.json'),
+            recorder,
+            'version',
+            TraceFormat.OTLP,
+        )
+    finally:
+        recorder.stop()
+
+    trace = json.loads((tmp_path / 'trace.json').read_text())
+    spans = trace['resourceSpans'][0]['scopeSpans'][0]['spans']
+    assert [span['name'] for span in spans] == ['version', 'rendering']
+
+
+def test_trace_option(tmp_path: Path) -> None:
+    """Test that the `--trace` option writes a Chrome trace.
+
+    Args:
+        tmp_path: a temporary directory.
+    """
+    trace_file = tmp_path / 'trace.json'
+    result = runner.invoke(app, ['--trace', str(trace_file), 'version'])
+    assert result.exit_code == 0
+    assert result.stderr == ''
+    names = [
+        event['name']
+        for event in json.loads(trace_file.read_text())['traceEvents']
+    ]
+    assert 'version' in names
+    assert 'rendering' in names
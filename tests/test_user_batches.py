@@ -0,0 +1,225 @@
+"""Tests for the bulk changes for users."""
+
+from typing import Any
+
+import pytest
+from my_data.my_data import MyData
+from my_model import User, UserRole
+from my_multitool.exceptions import InvalidRecordsError
+from my_multitool.globals import get_root_user_for_context
+from my_multitool.user_batches import (
+    apply_in_batches,
+    create_users,
+    delete_users,
+    get_user_fields,
+    update_users,
+)
+
+
+def _new_user(number: int) -> dict[str, Any]:
+    return {
+        'fullname': f'New user {number}',
+        'username': f'new.user.{number}',
+        'email': f'new.user.{number}@example.com',
+    }
+
+
+def _usernames(data: MyData) -> list[str]:
+    with data.get_context(user=get_root_user_for_context(data)) as context:
+        usernames = [user.username for user in context.users.retrieve()]
+    return usernames
+
+
+def test_get_user_fields() -> None:
+    """Test if empty fields are left out and roles are converted."""
+    assert get_user_fields(
+        {'username': 'user', 'fullname': '', 'role': 'Service'}, 1
+    ) == {'username': 'user', 'role': UserRole.SERVICE}
+
+
+@pytest.mark.parametrize(
+    'record', [{'username': 'user', 'id': 1}, {'role': 'admin'}]
+)
+def test_get_user_fields_invalid(record: dict[str, Any]) -> None:
+    """Test if we get an error for unknown fields and roles.
+
+    Args:
+        record: the invalid record.
+    """
+    with pytest.raises(InvalidRecordsError, match='Record 3'):
+        get_user_fields(record, 3)
+
+
+def test_apply_in_batches_create(
+    data_object_with_database_with_root_user: MyData,
+) -> None:
+    """Test if users are created in batches.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+    """
+    data = data_object_with_database_with_root_user
+    user = get_root_user_for_context(data)
+    records = [_new_user(number) for number in range(5)]
+    records[0]['password'] = 'secret'
+    results = list(
+        apply_in_batches(data, user, records, create_users, batch_size=2)
+    )
+    assert [
+        (result.first_record, result.last_record) for result in results
+    ] == [
+        (1, 2),
+        (3, 4),
+        (5, 5),
+    ]
+    assert not any(result.error for result in results)
+    with data.get_context_for_service_user() as context:
+        new_user = context.get_user_account_by_username('new.user.0')
+    assert new_user.verify_credentials('new.user.0', 'secret')
+    assert new_user.role == UserRole.USER
+
+
+def test_apply_in_batches_failed_batch(
+    data_object_with_database_with_root_user: MyData,
+) -> None:
+    """Test if only the failing batch is rolled back.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+    """
+    data = data_object_with_database_with_root_user
+    user = get_root_user_for_context(data)
+    records = [_new_user(number) for number in range(4)]
+    records[2]['email'] = 'not an email address'
+    results = list(
+        apply_in_batches(data, user, records, create_users, batch_size=2)
+    )
+    assert results[0].error is None
+    assert results[1].error == 'Record 3 has invalid fields: email'
+    usernames = _usernames(data)
+    assert 'new.user.1' in usernames
+    assert 'new.user.3' not in usernames
+
+
+def test_apply_in_batches_stop_on_error(
+    data_object_with_database_with_root_user: MyData,
+) -> None:
+    """Test if no batches are applied after a failed batch.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+    """
+    data = data_object_with_database_with_root_user
+    user = get_root_user_for_context(data)
+    records = [_new_user(1), _new_user(1), _new_user(2)]
+    results = list(
+        apply_in_batches(
+            data,
+            user,
+            records,
+            create_users,
+            batch_size=2,
+            stop_on_error=True,
+        )
+    )
+    assert len(results) == 1
+    assert results[0].error
+    assert 'new.user.2' not in _usernames(data)
+
+
+def test_apply_in_batches_update(
+    data_object_with_database_with_root_user: MyData,
+) -> None:
+    """Test if only the given fields of users are updated.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+    """
+    data = data_object_with_database_with_root_user
+    user = get_root_user_for_context(data)
+    records = [
+        {'username': 'normal.user.1', 'fullname': 'Changed', 'email': ''},
+        {'username': 'normal.user.2', 'role': 'root', 'password': 'new_pw'},
+    ]
+    results = list(apply_in_batches(data, user, records, update_users))
+    assert results[0].error is None
+    with data.get_context_for_service_user() as context:
+        user_1 = context.get_user_account_by_username('normal.user.1')
+        user_2 = context.get_user_account_by_username('normal.user.2')
+    assert user_1.fullname == 'Changed'
+    assert user_1.email == 'normal_user_1@example.com'
+    assert user_2.role == UserRole.ROOT
+    assert user_2.verify_credentials('normal.user.2', 'new_pw')
+
+
+@pytest.mark.parametrize(
+    'records, error',
+    [
+        ([{'username': 'unknown'}], 'Record 1: user "unknown" not found'),
+        ([{'fullname': 'No username'}], 'Record 1 has no username'),
+        (
+            [{'username': 'normal.user.1'}, {'username': 'normal.user.1'}],
+            'Record 2 has the same username as record 1',
+        ),
+    ],
+)
+def test_apply_in_batches_update_invalid(
+    data_object_with_database_with_root_user: MyData,
+    records: list[dict[str, Any]],
+    error: str,
+) -> None:
+    """Test if we get a error for records that don't match a user.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        records: the invalid records.
+        error: the expected error.
+    """
+    data = data_object_with_database_with_root_user
+    user = get_root_user_for_context(data)
+    results = list(apply_in_batches(data, user, records, update_users))
+    assert results[0].error == error
+
+
+def test_apply_in_batches_delete(
+    data_object_with_database_with_root_user: MyData,
+) -> None:
+    """Test if users are deleted and other fields are ignored.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+    """
+    data = data_object_with_database_with_root_user
+    user = get_root_user_for_context(data)
+    records = [
+        {'id': 2, 'username': 'normal.user.1'},
+        {'id': 3, 'username': 'normal.user.2'},
+    ]
+    results = list(apply_in_batches(data, user, records, delete_users))
+    assert results[0].error is None
+    assert _usernames(data) == ['root', 'service.user']
+
+
+def test_create_users_without_password(
+    data_object_with_database_with_root_user: MyData,
+) -> None:
+    """Test if users without a password get no password hash.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+    """
+    data = data_object_with_database_with_root_user
+    user = get_root_user_for_context(data)
+    with data.get_context(user=user) as context:
+        create_users(context, [(1, _new_user(1))], workers=1)
+    with data.get_context_for_service_user() as context:
+        new_user = context.get_user_account_by_username('new.user.1')
+    assert new_user.password_hash is None
+    assert isinstance(new_user, User)
@@ -0,0 +1,286 @@
+"""Tests for the retrieval of users for listings."""
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from my_data.my_data import MyData
+from my_model import User, UserRole
+from my_multitool.user_listing import (
+    get_user_filters,
+    iter_user_rows,
+    summarize_users,
+)
+from sqlalchemy import Connection
+from sqlalchemy.dialects import postgresql
+
+
+@pytest.mark.parametrize(
+    'after_id, limit, chunk_size, expected',
+    [
+        (None, None, 1000, [[1, 2, 3, 4]]),
+        (None, None, 3, [[1, 2, 3], [4]]),
+        (None, None, 2, [[1, 2], [3, 4]]),
+        (1, None, 2, [[2, 3], [4]]),
+        (None, 3, 2, [[1, 2], [3]]),
+        (2, 1, 10, [[3]]),
+        (4, None, 10, []),
+    ],
+)
+def test_iter_user_rows(
+    data_object_with_database_with_root_user: MyData,
+    after_id: int | None,
+    limit: int | None,
+    chunk_size: int,
+    expected: list[list[int]],
+) -> None:
+    """Test the keyset pagination of users.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        after_id: the ID to start after.
+        limit: the maximum number of users.
+        chunk_size: the size of the chunks.
+        expected: the expected IDs per chunk.
+    """
+    data = data_object_with_database_with_root_user
+    with data.get_context_for_service_user() as context:
+        root = context.get_user_account_by_username('root')
+    with data.get_context(user=root) as context:
+        chunks = [
+            [row['id'] for row in chunk]
+            for chunk in iter_user_rows(
+                context, after_id=after_id, limit=limit, chunk_size=chunk_size
+            )
+        ]
+    assert chunks == expected
+
+
+def test_iter_user_rows_with_filter(
+    data_object_with_database_with_root_user: MyData,
+) -> None:
+    """Test that additional filters are combined with the pagination.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+    """
+    data = data_object_with_database_with_root_user
+    with data.get_context_for_service_user() as context:
+        root = context.get_user_account_by_username('root')
+    with data.get_context(user=root) as context:
+        chunks = list(
+            iter_user_rows(
+                context,
+                flt=[User.username.startswith('normal')],  # type: ignore
+                chunk_size=1,
+            )
+        )
+    assert [[row['username'] for row in chunk] for chunk in chunks] == [
+        ['normal.user.1'],
+        ['normal.user.2'],
+    ]
+
+
+@pytest.mark.parametrize(
+    'kwargs, expected',
+    [
+        ({}, ['root', 'normal.user.1', 'normal.user.2', 'service.user']),
+        ({'roles': [UserRole.ROOT]}, ['root']),
+        (
+            {'roles': [UserRole.ROOT, UserRole.SERVICE]},
+            ['root', 'service.user'],
+        ),
+        ({'username_prefix': 'normal.'}, ['normal.user.1', 'normal.user.2']),
+        ({'username_prefix': 'normal_'}, []),
+        ({'username_prefix': '%'}, []),
+        ({'second_factor': True}, ['normal.user.2']),
+        (
+            {'second_factor': False, 'roles': [UserRole.USER]},
+            ['normal.user.1'],
+        ),
+    ],
+)
+def test_get_user_filters(
+    data_object_with_database_with_root_user: MyData,
+    kwargs: dict,
+    expected: list[str],
+) -> None:
+    """Test the SQL filters for users.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        kwargs: the arguments for `get_user_filters`.
+        expected: the expected usernames.
+    """
+    data = data_object_with_database_with_root_user
+    with data.get_context_for_service_user() as context:
+        root = context.get_user_account_by_username('root')
+    with data.get_context(user=root) as context:
+        users = context.users.retrieve(User.id == 3)  # type: ignore
+        users[0].set_random_second_factor()
+        context.users.update(users)
+    with data.get_context(user=root) as context:
+        usernames = [
+            row['username']
+            for chunk in iter_user_rows(
+                context, flt=get_user_filters(**kwargs)
+            )
+            for row in chunk
+        ]
+    assert usernames == expected
+
+
+@pytest.mark.parametrize(
+    'email_domain, expected',
+    [('example.com', 4), ('EXAMPLE.com', 4), ('ample.com', 0), ('test', 0)],
+)
+def test_email_domain_filter(
+    data_object_with_database_with_root_user: MyData,
+    email_domain: str,
+    expected: int,
+) -> None:
+    """Test the filter on the domain of the email address.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        email_domain: the domain to filter on.
+        expected: the expected number of users.
+    """
+    data = data_object_with_database_with_root_user
+    with data.get_context_for_service_user() as context:
+        root = context.get_user_account_by_username('root')
+    with data.get_context(user=root) as context:
+        chunks = list(
+            iter_user_rows(
+                context, flt=get_user_filters(email_domain=email_domain)
+            )
+        )
+    assert sum(len(chunk) for chunk in chunks) == expected
+
+
+def test_email_domain_filter_ignores_case() -> None:
+    """Test that the domain filter lowercases the stored email address."""
+    (email_filter,) = get_user_filters(email_domain='Example.COM')
+    sql = str(
+        email_filter.compile(
+            dialect=postgresql.dialect(),
+            compile_kwargs={'literal_binds': True},
+        )
+    )
+    assert sql.startswith('lower("user".email) LIKE')
+    assert "'%%' || '@example.com'" in sql
+
+
+def test_user_rows_match_users(
+    data_object_with_database_with_root_user: MyData,
+) -> None:
+    """Test that the projected rows match the ORM objects.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+    """
+    data = data_object_with_database_with_root_user
+    with data.get_context_for_service_user() as context:
+        root = context.get_user_account_by_username('root')
+    with data.get_context(user=root) as context:
+        users = context.users.retrieve(User.id == 2)  # type: ignore
+        users[0].set_random_second_factor()
+        context.users.update(users)
+    with data.get_context(user=root) as context:
+        expected = [
+            {
+                'id': user.id,
+                'fullname': user.fullname,
+                'username': user.username,
+                'role': user.role,
+                'second_factor': user.second_factor is not None,
+            }
+            for user in context.users.retrieve(sort=User.id)  # type: ignore
+        ]
+        rows = [
+            dict(row) for chunk in iter_user_rows(context) for row in chunk
+        ]
+    assert rows == expected
+
+
+def test_iter_user_rows_uses_context_filters(
+    data_object_with_database_with_root_user: MyData,
+) -> None:
+    """Test that a normal user only gets its own row.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+    """
+    data = data_object_with_database_with_root_user
+    with data.get_context_for_service_user() as context:
+        user = context.get_user_account_by_username('normal.user.1')
+    with data.get_context(user=user) as context:
+        rows = [row for chunk in iter_user_rows(context) for row in chunk]
+    assert [row['username'] for row in rows] == ['normal.user.1']
+
+
+def test_summarize_users(
+    data_object_with_database_with_root_user: MyData,
+) -> None:
+    """Test if users are counted per role and second factor status.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+    """
+    data = data_object_with_database_with_root_user
+    with data.get_context_for_service_user() as context:
+        root = context.get_user_account_by_username('root')
+    with data.get_context(user=root) as context:
+        users = context.users.retrieve(
+            User.username == 'normal.user.2'  # type: ignore
+        )
+        users[0].set_random_second_factor()
+        context.users.update(users)
+    with data.get_context(user=root) as context:
+        groups = summarize_users(context)
+    assert [
+        (group.role, group.second_factor, group.users) for group in groups
+    ] == [
+        (UserRole.ROOT, False, 1),
+        (UserRole.SERVICE, False, 1),
+        (UserRole.USER, False, 1),
+        (UserRole.USER, True, 1),
+    ]
+
+
+def test_queries_use_context_session(
+    data_object_with_database_with_root_user: MyData, monkeypatch: MonkeyPatch
+) -> None:
+    """Test that the queries run in the session of the context.
+
+    Args:
+        data_object_with_database_with_root_user: a data object with a
+            configured database, a service user and a root user.
+        monkeypatch: the mocker.
+    """
+    data = data_object_with_database_with_root_user
+    with data.get_context_for_service_user() as service_context:
+        root = service_context.get_user_account_by_username('root')
+
+    engine = data.database_engine
+    assert engine is not None
+    connections: list[Connection] = []
+    connect = engine.connect
+
+    def counted_connect() -> Connection:
+        connections.append(connect())
+        return connections[-1]
+
+    monkeypatch.setattr(engine, 'connect', counted_connect)
+    with data.get_context(user=root) as context:
+        assert context.users.count() == 4
+        rows = [row for chunk in iter_user_rows(context) for row in chunk]
+        groups = summarize_users(context)
+    assert len(rows) == 4
+    assert sum(group.users for group in groups) == 4
+    assert len(connections) == 1
@@ -0,0 +1,115 @@
+"""Benchmark suite for the hot paths of My Multitool.
+
+Run the suite and add the results to the history file:
+
+    python tools/benchmark-suite.py run --history benchmarks.json
+
+Compare the last run with the earlier runs; the exit code is 1 when a metric
+is slower than the threshold allows:
+
+    python tools/benchmark-suite.py compare --history benchmarks.json
+"""
+
+import tempfile
+
+import typer
+from my_multitool.benchmark_suite import (
+    BenchmarkSuite,
+    compare_runs,
+    load_history,
+    save_history,
+)
+from my_multitool.exceptions import BenchmarkSuiteError
+from my_multitool.models import OutputFormat
+from my_multitool.output import Column, get_writer
+
+app = typer.Typer(no_args_is_help=True)
+
+COMPARE_COLUMNS = [
+    Column(key='name', title='Metric', width=32),
+    Column(key='baseline', title='Baseline (s)', justify='right'),
+    Column(key='current', title='Current (s)', justify='right'),
+    Column(key='change', title='Change', justify='right'),
+    Column(key='status', title='Status'),
+]
+
+
+@app.command()
+def run(
+    history: str = 'benchmarks.json',
+    repeat: int = 3,
+    quick: bool = False,
+) -> None:
+    """Run the suite and add the results to the history file.
+
+    Args:
+        history: the history file.
+        repeat: the number of times every metric is measured.
+        quick: if set to True, small sizes are used. The metrics have the
+            sizes in their names, so quick runs are only compared with quick
+            runs.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        if quick:
+            suite = BenchmarkSuite(
+                directory,
+                repeat=repeat,
+                config_contexts=(10, 100),
+                import_rows=(100, 1000),
+                list_users=1000,
+            )
+        else:
+            suite = BenchmarkSuite(directory, repeat=repeat)
+        try:
+            suite_run = suite.run()
+        except BenchmarkSuiteError as exception:
+            typer.echo(f'Error: {exception}', err=True)
+            raise typer.Exit(1) from exception
+
+    results = load_history(history)
+    results.runs.append(suite_run)
+    save_history(history, results)
+    for name, value in suite_run.metrics.items():
+        typer.echo(f'{name}: {value:.4f}s')
+
+
+@app.command()
+def compare(
+    history: str = 'benchmarks.json',
+    threshold: float = 0.2,
+    baseline_runs: int = 5,
+) -> None:
+    """Compare the last run with the earlier runs.
+
+    Args:
+        history: the history file.
+        threshold: the relative change at which a metric is a regression;
+            `0.2` means 20% slower.
+        baseline_runs: the number of earlier runs to use for the baseline.
+    """
+    try:
+        comparisons = compare_runs(
+            load_history(history), threshold, baseline_runs
+        )
+    except BenchmarkSuiteError as exception:
+        typer.echo(f'Error: {exception}', err=True)
+        raise typer.Exit(1) from exception
+
+    with get_writer(OutputFormat.TABLE, COMPARE_COLUMNS) as writer:
+        for comparison in comparisons:
+            writer.write_row(
+                {
+                    'name': comparison.name,
+                    'baseline': f'{comparison.baseline:.4f}',
+                    'current': f'{comparison.current:.4f}',
+                    'change': f'{comparison.change:+.1%}',
+                    'status': 'REGRESSION' if comparison.regression else 'ok',
+                }
+            )
+
+    if any(comparison.regression for comparison in comparisons):
+        raise typer.Exit(1)
+
+
+if __name__ == '__main__':
+    app()